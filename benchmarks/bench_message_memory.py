@@ -0,0 +1,114 @@
+"""
+Memory benchmark: bytes per loaded message, old vs. compact representation.
+
+Decodes a synthetic history of 50k messages (JSON Lines, as stored on disk)
+into:
+
+* ``dataclass``: the previous ``Message`` layout, a plain dataclass holding a
+  ``datetime`` and its own role/model strings (reproduced below)
+* ``slots``: the current ``Message`` with ``__slots__``, interned strings and
+  an epoch timestamp
+
+and reports the memory held per message, in total and without the message
+content itself (which is the same for both).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_message_memory
+"""
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+
+from cmdai_terminal.models.message import Message
+from cmdai_terminal.models.metrics import MessageMetrics
+
+MESSAGES = 50_000
+MESSAGES_PER_CONVERSATION = 50
+MODELS = ["llama3:8b", "mistral:latest", "openai/gpt-4o", "openai/gpt-4o-mini"]
+WORDS = "the a to of and in is it you that for on with this be are as can not or".split()
+
+
+@dataclass
+class DataclassMessage:
+    """The previous Message layout."""
+
+    role: str
+    content: str
+    timestamp: datetime
+    model: str | None = None
+    truncated: bool = False
+    metrics: MessageMetrics | None = None
+    error: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DataclassMessage":
+        return cls(
+            role=data["role"],
+            content=data["content"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            model=data.get("model"),
+            truncated=data.get("truncated", False),
+            metrics=MessageMetrics.from_dict(data["metrics"]) if data.get("metrics") else None,
+            error=data.get("error"),
+        )
+
+
+def record_history() -> list[str]:
+    """Build the history as JSON lines, one per message."""
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1).timestamp()
+    lines = []
+    for i in range(MESSAGES):
+        conversation_model = MODELS[(i // MESSAGES_PER_CONVERSATION) % len(MODELS)]
+        assistant = i % 2 == 1
+        lines.append(json.dumps({
+            "type": "message",
+            "role": "assistant" if assistant else "user",
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(5, 120))),
+            "timestamp": datetime.fromtimestamp(start + i * 37.5).isoformat(),
+            "model": conversation_model if assistant else None,
+            "truncated": False,
+            "metrics": None,
+            "error": None,
+        }))
+    return lines
+
+
+def measure(name: str, cls, lines: list[str], content_bytes: int) -> int:
+    """Decode every line into a message and report the memory the messages hold."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    messages = [cls.from_dict(json.loads(line)) for line in lines]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(messages) == MESSAGES
+    per_message = held / MESSAGES
+    overhead = (held - content_bytes) / MESSAGES
+    print(
+        f"  {name:<10} {per_message:8.0f} B/message  {overhead:6.0f} B/message without content"
+        f"  ({held / 1024 / 1024:.1f} MiB, decoded in {elapsed * 1000:.0f} ms)"
+    )
+    del messages
+    return overhead
+
+
+def main() -> None:
+    lines = record_history()
+    content_bytes = sum(sys.getsizeof(json.loads(line)["content"]) for line in lines)
+    print(f"{MESSAGES} messages, {content_bytes / MESSAGES:.0f} B of content each on average")
+    before = measure("dataclass", DataclassMessage, lines, content_bytes)
+    after = measure("slots", Message, lines, content_bytes)
+    print(f"  overhead per message: {before:.0f} B -> {after:.0f} B ({before / after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Micro-benchmark: byte-level stream parsers vs. the per-line text path.
+
+Replays synthetic recordings of an Ollama NDJSON stream and an OpenAI SSE
+stream, split into network-sized reads, through:
+
+* ``lines``: ``response.aiter_lines()`` + ``json.loads`` per line (the old path)
+* ``bytes/json``: ``response.aiter_bytes()`` + the incremental parser, stdlib json
+* ``bytes/orjson``: the same with orjson, when installed
+
+Run from the repository root:
+
+    python -m benchmarks.bench_stream_parsers
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+from cmdai_terminal.api import jsonlib
+from cmdai_terminal.api.stream_parsers import NDJSONParser, SSEParser
+
+TOKENS = 4000
+READ_SIZE = 1400
+ROUNDS = 5
+
+
+def record_ollama() -> bytes:
+    lines = [
+        json.dumps({
+            "model": "llama3",
+            "created_at": "2024-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": f" token{i}"},
+            "done": False,
+        })
+        for i in range(TOKENS)
+    ]
+    lines.append(json.dumps({"model": "llama3", "message": {"role": "assistant", "content": ""}, "done": True}))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def record_openai() -> bytes:
+    events = [
+        "data: " + json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "delta": {"content": f" token{i}"}, "finish_reason": None}],
+        })
+        for i in range(TOKENS)
+    ]
+    events.append("data: [DONE]")
+    return ("\n\n".join(events) + "\n\n").encode()
+
+
+def make_response(recording: bytes) -> httpx.Response:
+    async def body():
+        for i in range(0, len(recording), READ_SIZE):
+            yield recording[i:i + READ_SIZE]
+
+    return httpx.Response(200, content=body())
+
+
+async def ollama_lines(recording: bytes) -> int:
+    count = 0
+    async for line in make_response(recording).aiter_lines():
+        if line.strip():
+            chunk = json.loads(line)
+            if chunk["message"]["content"]:
+                count += 1
+    return count
+
+
+async def ollama_bytes(recording: bytes, backend) -> int:
+    count = 0
+    parser = NDJSONParser(backend)
+    async for data in make_response(recording).aiter_bytes():
+        for chunk in parser.feed(data):
+            if chunk["message"]["content"]:
+                count += 1
+    return count
+
+
+async def openai_lines(recording: bytes) -> int:
+    count = 0
+    async for line in make_response(recording).aiter_lines():
+        if line.startswith("data: ") and line[6:].strip() != "[DONE]":
+            chunk = json.loads(line[6:])
+            if chunk["choices"][0]["delta"].get("content"):
+                count += 1
+    return count
+
+
+async def openai_bytes(recording: bytes, backend) -> int:
+    count = 0
+    parser = SSEParser()
+    async for data in make_response(recording).aiter_bytes():
+        for event in parser.feed(data):
+            if event.data != b"[DONE]":
+                chunk = event.json(backend)
+                if chunk["choices"][0]["delta"].get("content"):
+                    count += 1
+    return count
+
+
+def bench(name: str, factory) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        count = asyncio.run(factory())
+        best = min(best, time.perf_counter() - start)
+    assert count == TOKENS, (name, count)
+    print(f"  {name:<14} {best * 1000:8.2f} ms  {TOKENS / best / 1000:8.1f} k chunks/s")
+    return best
+
+
+def main() -> None:
+    backends = ["json"] + (["orjson"] if jsonlib.orjson is not None else [])
+    for label, recording, lines_path, bytes_path in (
+        ("Ollama NDJSON", record_ollama(), ollama_lines, ollama_bytes),
+        ("OpenAI SSE", record_openai(), openai_lines, openai_bytes),
+    ):
+        print(f"{label}: {TOKENS} chunks, {len(recording) / 1024:.0f} KiB in {READ_SIZE} byte reads")
+        baseline = bench("lines", lambda: lines_path(recording))
+        for name in backends:
+            backend = jsonlib.get_backend(name)
+            elapsed = bench(f"bytes/{name}", lambda: bytes_path(recording, backend))
+            print(f"  {'':<14} {baseline / elapsed:8.2f}x vs lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Circuit breaker for unreachable providers."""
+import time
+from typing import Callable
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of a provider so calls fail fast while it is down.
+
+    The breaker starts closed. After ``failure_threshold`` consecutive
+    failures it opens and rejects calls. Once ``reset_timeout`` seconds have
+    passed it becomes half-open and lets a single probe through: success
+    closes it again, failure re-opens it for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Current breaker state."""
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    @property
+    def available(self) -> bool:
+        """Whether calls are currently expected to go through."""
+        return self.state == self.CLOSED
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may proceed.
+
+        In the half-open state only one caller at a time is let through as
+        the probe; it must report back with record_success/record_failure.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker past the threshold."""
+        self.failures += 1
+        self._probing = False
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            self._opened_at = self.clock()
+
+    def release(self) -> None:
+        """Give up a call that ended without telling us anything (e.g. cancelled)."""
+        self._probing = False
@@ -0,0 +1,89 @@
+"""Pool of provider endpoints with health tracking and load balancing."""
+from typing import Iterable, List
+
+from .circuit_breaker import CircuitBreaker
+from .ollama import OllamaClient
+from .openai_client import OpenAIClient
+from .retry import classify_error
+
+
+class Endpoint:
+    """One server of a provider, with its circuit breaker and in-flight counter."""
+
+    def __init__(
+        self,
+        provider: str,
+        client: OllamaClient | OpenAIClient,
+        breaker: CircuitBreaker,
+    ):
+        self.provider = provider
+        self.client = client
+        self.breaker = breaker
+        self.in_flight = 0
+        self.models: set[str] = set()
+        self.last_model: str | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the endpoint."""
+        return self.client.base_url
+
+    @property
+    def key(self) -> str:
+        """Unique key of the endpoint, e.g. for caching its model catalog."""
+        return f"{self.provider}@{self.url}"
+
+    def record_error(self, error: Exception) -> None:
+        """Feed a failed call into the circuit breaker."""
+        if classify_error(error).provider_down:
+            self.breaker.record_failure()
+        else:
+            # The server answered, just not successfully (e.g. unknown model)
+            self.breaker.record_success()
+
+
+class EndpointPool:
+    """
+    The endpoints of one provider.
+
+    Requests go to the healthy endpoint with the fewest requests in flight,
+    preferring endpoints known to have the model and, on a tie, the one that
+    served the model last (it is likely still loaded there).
+    """
+
+    def __init__(self, endpoints: List[Endpoint]):
+        """Initialize the pool."""
+        self.endpoints = endpoints
+
+    def hosts(self, model: str) -> List[Endpoint]:
+        """Get the endpoints known to have a model (all of them if none are known)."""
+        return [e for e in self.endpoints if model in e.models] or list(self.endpoints)
+
+    def model_available(self, model: str) -> bool:
+        """Whether a healthy endpoint can serve a model."""
+        return any(e.breaker.available for e in self.hosts(model))
+
+    def acquire(self, model: str, exclude: Iterable[Endpoint] = ()) -> Endpoint | None:
+        """
+        Pick an endpoint for a request and count it as in flight.
+
+        Returns None when no endpoint will take the request. Every acquired
+        endpoint must be given back with release().
+        """
+        excluded = set(exclude)
+        candidates = [
+            e for e in self.hosts(model)
+            if e not in excluded and e.breaker.state != CircuitBreaker.OPEN
+        ]
+        candidates.sort(key=lambda e: (e.in_flight, e.last_model != model))
+        for endpoint in candidates:
+            if endpoint.breaker.allow():
+                endpoint.in_flight += 1
+                endpoint.last_model = model
+                return endpoint
+        return None
+
+    def release(self, endpoint: Endpoint) -> None:
+        """Return an endpoint acquired for a request."""
+        endpoint.in_flight -= 1
+        endpoint.breaker.release()
@@ -0,0 +1,91 @@
+"""Typed events emitted by chat streams."""
+from typing import Any, Dict
+
+
+class StreamEvent:
+    """Base class of everything a chat stream yields."""
+
+    __slots__ = ()
+
+
+class ContentDelta(StreamEvent):
+    """A piece of the response text."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"ContentDelta({self.text!r})"
+
+
+class Usage(StreamEvent):
+    """
+    Token usage reported by the provider, usually at the end of the stream.
+
+    Durations are in seconds and only present when the provider reports
+    them (Ollama does, OpenAI does not).
+    """
+
+    __slots__ = ("prompt_tokens", "completion_tokens", "durations", "endpoint")
+
+    def __init__(
+        self,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        durations: Dict[str, float] | None = None,
+        endpoint: str | None = None,
+    ):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.durations = durations or {}
+        self.endpoint = endpoint
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flatten into a dict, e.g. for MessageMetrics.from_stream."""
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "endpoint": self.endpoint,
+            **self.durations,
+        }
+
+    def __repr__(self) -> str:
+        return f"Usage(prompt_tokens={self.prompt_tokens}, completion_tokens={self.completion_tokens})"
+
+
+class Finish(StreamEvent):
+    """The provider finished the response, e.g. with reason 'stop' or 'length'."""
+
+    __slots__ = ("reason",)
+
+    def __init__(self, reason: str | None = None):
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return f"Finish({self.reason!r})"
+
+
+class StreamError(StreamEvent):
+    """The stream failed; no more content follows."""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"StreamError({self.message!r})"
+
+
+class Heartbeat(StreamEvent):
+    """The server is alive but sent no content (keep-alive comment, empty chunk)."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "Heartbeat()"
+
+
+HEARTBEAT = Heartbeat()
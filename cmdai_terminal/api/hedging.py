@@ -0,0 +1,62 @@
+"""Hedged requests: race a slow request against a second endpoint."""
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class HedgeStats:
+    """How often hedged requests were sent and won, and how many losers left a censored sample."""
+
+    requests: int = 0
+    fired: int = 0
+    won: int = 0
+    censored: int = 0
+
+
+class HedgePolicy:
+    """
+    Decides when a request that has not produced its first token gets hedged.
+
+    With a fixed ``delay`` the hedge is sent after that many seconds.
+    Without one the delay is learned: it is the given ``percentile`` of
+    recent time-to-first-token samples, so only the slowest requests are
+    hedged. Until ``min_samples`` samples are collected nothing is hedged.
+
+    A request that loses the race is cancelled before its first token, so
+    only a lower bound of its latency is known: the time it had waited.
+    That bound is recorded as a censored sample. Leaving the losers out
+    would drop exactly the slow requests and pull the delay down.
+    """
+
+    def __init__(
+        self,
+        delay: float | None = None,
+        percentile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.25,
+    ):
+        """Initialize the policy."""
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.stats = HedgeStats()
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, first_token_latency: float, censored: bool = False) -> None:
+        """Add a time-to-first-token sample; a censored one is a lower bound."""
+        self._samples.append(first_token_latency)
+        if censored:
+            self.stats.censored += 1
+
+    @property
+    def threshold(self) -> float | None:
+        """Seconds to wait for the first token before hedging (None: don't hedge)."""
+        if self.delay is not None:
+            return self.delay
+        if len(self._samples) < self.min_samples:
+            return None
+        samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(self.percentile * len(samples)))
+        return max(self.min_delay, samples[index])
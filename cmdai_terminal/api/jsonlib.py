@@ -0,0 +1,49 @@
+"""JSON decoding backend for the streaming hot path."""
+import json
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class JSONBackend:
+    """
+    A JSON decoder used by the stream parsers.
+
+    ``binary`` backends decode raw bytes directly; text backends are handed
+    already-decoded strings so each payload is only decoded once.
+    """
+
+    __slots__ = ("name", "loads", "binary")
+
+    def __init__(self, name: str, loads: Callable[[Any], Any], binary: bool):
+        self.name = name
+        self.loads = loads
+        self.binary = binary
+
+    def decode(self, data: bytes) -> Any:
+        """Decode one JSON document from bytes. Raises ValueError on bad input."""
+        return self.loads(data if self.binary else data.decode("utf-8"))
+
+
+def get_backend(name: str | None = None) -> JSONBackend:
+    """
+    Get a JSON backend by name ("orjson" or "json").
+
+    By default orjson is used when installed and the standard library otherwise.
+    """
+    if name is None:
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson":
+        if orjson is None:
+            raise ValueError("orjson is not installed")
+        return JSONBackend("orjson", orjson.loads, binary=True)
+    if name == "json":
+        # JSONDecoder.decode skips the type and encoding checks of json.loads
+        return JSONBackend("json", json.JSONDecoder().decode, binary=False)
+    raise ValueError(f"Unknown JSON backend: {name}")
+
+
+default_backend = get_backend()
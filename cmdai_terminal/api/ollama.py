@@ -1,30 +1,122 @@
 """Ollama API client with streaming support."""
 import httpx
-from typing import AsyncIterator, List, Dict, Any
-import json
+from typing import AsyncIterator, Iterator, List, Dict, Any, Tuple
+
+from .events import HEARTBEAT, ContentDelta, Finish, StreamError, StreamEvent, Usage
+from .retry import RetryPolicy, retry_request, retry_stream
+from .stream_parsers import NDJSONParser
+from ..models.model_info import ModelInfo
 
 
 class OllamaClient:
     """Client for interacting with Ollama API."""
 
-    def __init__(self, base_url: str, timeout: int = 60):
-        """Initialize the Ollama client."""
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 60,
+        limits: httpx.Limits | None = None,
+        connect_timeout: float = 5.0,
+        first_token_timeout: float | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        """
+        Initialize the Ollama client.
+
+        Args:
+            base_url: Ollama server URL
+            timeout: Read timeout, i.e. the longest gap allowed between chunks
+            limits: Connection pool limits
+            connect_timeout: Timeout for establishing a connection
+            first_token_timeout: Longest wait for the first streamed chunk,
+                including retries (None for no limit)
+            retry_policy: How transient failures are retried
+        """
         self.base_url = base_url.rstrip("/")
-        self.timeout = timeout
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.first_token_timeout = first_token_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.limits = limits or httpx.Limits(
+            max_connections=10,
+            max_keepalive_connections=5,
+            keepalive_expiry=30.0,
+        )
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use and kept alive between calls."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def get_model_catalog(
+        self,
+        validators: Dict[str, str] | None = None,
+    ) -> Tuple[List[ModelInfo] | None, Dict[str, str]]:
+        """
+        Fetch model metadata from the API.
+
+        Args:
+            validators: 'etag'/'last_modified' values from an earlier response,
+                sent as conditional request headers
+
+        Returns:
+            Tuple of (models, validators). models is None when the server
+            reports the catalog as unchanged. Errors are raised.
+        """
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = await self.http.get("/api/tags", headers=headers)
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+        data = response.json()
+
+        models = []
+        for model in data.get("models", []):
+            details = model.get("details") or {}
+            models.append(ModelInfo(
+                name=model["name"],
+                provider="ollama",
+                size=model.get("size"),
+                family=details.get("family"),
+                parameter_size=details.get("parameter_size"),
+                quantization=details.get("quantization_level"),
+            ))
+
+        new_validators = {
+            key: response.headers[header]
+            for key, header in (("etag", "etag"), ("last_modified", "last-modified"))
+            if header in response.headers
+        }
+        return models, new_validators
 
     async def get_models(self) -> List[str]:
         """Fetch available models from the API."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                response.raise_for_status()
-                data = response.json()
-                # Extract model names from the response
-                models = [model["name"] for model in data.get("models", [])]
-                if models:
-                    return models
-                # If no models in response, return common defaults
-                return ["llama2", "llama3", "mistral", "mixtral", "codellama"]
+            catalog, _ = await self.get_model_catalog()
+            # Extract model names from the response
+            models = [model.name for model in catalog or []]
+            if models:
+                return models
+            # If no models in response, return common defaults
+            return ["llama2", "llama3", "mistral", "mixtral", "codellama"]
         except Exception as e:
             # Return common model names as fallback
             return ["llama2", "llama3", "mistral", "mixtral", "codellama", "phi3", "gemma"]
@@ -33,7 +125,7 @@ class OllamaClient:
         self,
         model: str,
         messages: List[Dict[str, str]],
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[StreamEvent]:
         """
         Stream chat responses from the Ollama API.
 
@@ -42,7 +134,12 @@ class OllamaClient:
             messages: List of message dicts with 'role' and 'content' keys
 
         Yields:
-            Content chunks as they arrive from the API
+            ContentDelta events as text arrives, Heartbeat for chunks without
+            text, Usage and Finish from the final chunk, and StreamError for
+            an error reported in the stream
+
+        Raises:
+            ProviderError: If the request fails after retries
         """
         payload = {
             "model": model,
@@ -50,28 +147,54 @@ class OllamaClient:
             "stream": True,
         }
 
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/api/chat",
-                    json=payload,
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            try:
-                                chunk = json.loads(line)
-                                # Ollama returns content in message.content field
-                                if "message" in chunk and "content" in chunk["message"]:
-                                    content = chunk["message"]["content"]
-                                    if content:
-                                        yield content
-                            except json.JSONDecodeError:
-                                continue
-        except Exception as e:
-            yield f"\n\n[Error: {str(e)}]"
+        # Transient failures are retried until the first event arrives
+        async for event in retry_stream(
+            lambda: self._stream_chat(payload),
+            self.retry_policy,
+            self.first_token_timeout,
+        ):
+            yield event
+
+    @staticmethod
+    def _events(chunk: Dict[str, Any]) -> Iterator[StreamEvent]:
+        """Convert one NDJSON chunk into stream events."""
+        # Failures after the response started, e.g. the model crashed
+        if chunk.get("error"):
+            yield StreamError(str(chunk["error"]))
+            return
+        # Ollama returns content in message.content field
+        content = (chunk.get("message") or {}).get("content")
+        if content:
+            yield ContentDelta(content)
+        if chunk.get("done"):
+            # Timings are reported in nanoseconds
+            durations = {
+                key: chunk[key] / 1e9
+                for key in ("eval_duration", "prompt_eval_duration", "load_duration", "total_duration")
+                if chunk.get(key)
+            }
+            yield Usage(chunk.get("prompt_eval_count"), chunk.get("eval_count"), durations)
+            yield Finish(chunk.get("done_reason") or "stop")
+        elif not content:
+            yield HEARTBEAT
+
+    async def _stream_chat(self, payload: Dict[str, Any]) -> AsyncIterator[StreamEvent]:
+        """Make a single streaming chat request."""
+        async with self.http.stream(
+            "POST",
+            "/api/chat",
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+
+            parser = NDJSONParser()
+            async for data in response.aiter_bytes():
+                for chunk in parser.feed(data):
+                    for event in self._events(chunk):
+                        yield event
+            for chunk in parser.flush():
+                for event in self._events(chunk):
+                    yield event
 
     async def chat(
         self,
@@ -87,6 +210,9 @@ class OllamaClient:
 
         Returns:
             The complete response content
+
+        Raises:
+            ProviderError: If the request fails after retries
         """
         payload = {
             "model": model,
@@ -94,14 +220,11 @@ class OllamaClient:
             "stream": False,
         }
 
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/chat",
-                    json=payload,
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data.get("message", {}).get("content", "")
-        except Exception as e:
-            return f"[Error: {str(e)}]"
+        async def post() -> httpx.Response:
+            response = await self.http.post("/api/chat", json=payload)
+            response.raise_for_status()
+            return response
+
+        response = await retry_request(post, self.retry_policy)
+        data = response.json()
+        return data.get("message", {}).get("content", "")
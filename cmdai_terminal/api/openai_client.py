@@ -1,40 +1,133 @@
 """OpenAI API client with streaming support."""
 import httpx
-from typing import AsyncIterator, List, Dict, Any
-import json
+import importlib.util
+from typing import AsyncIterator, Iterator, List, Dict, Any, Tuple
+
+from .events import HEARTBEAT, ContentDelta, Finish, StreamError, StreamEvent, Usage
+from .retry import RetryPolicy, retry_request, retry_stream
+from .stream_parsers import SSEEvent, SSEParser
+from ..models.model_info import ModelInfo
+
+
+def http2_available() -> bool:
+    """Check whether the optional ``h2`` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
 
 
 class OpenAIClient:
     """Client for interacting with OpenAI API."""
 
-    def __init__(self, api_key: str, timeout: int = 60):
-        """Initialize the OpenAI client."""
+    def __init__(
+        self,
+        api_key: str,
+        timeout: int = 60,
+        limits: httpx.Limits | None = None,
+        http2: bool = False,
+        connect_timeout: float = 5.0,
+        first_token_timeout: float | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        """
+        Initialize the OpenAI client.
+
+        Args:
+            api_key: OpenAI API key
+            timeout: Read timeout, i.e. the longest gap allowed between chunks
+            limits: Connection pool limits
+            http2: Negotiate HTTP/2 when the h2 package is installed
+            connect_timeout: Timeout for establishing a connection
+            first_token_timeout: Longest wait for the first streamed chunk,
+                including retries (None for no limit)
+            retry_policy: How transient failures are retried
+        """
         self.api_key = api_key
-        self.timeout = timeout
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.first_token_timeout = first_token_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
         self.base_url = "https://api.openai.com/v1"
+        self.limits = limits or httpx.Limits(
+            max_connections=10,
+            max_keepalive_connections=5,
+            keepalive_expiry=30.0,
+        )
+        # HTTP/2 needs the h2 extra; quietly fall back to HTTP/1.1 without it
+        self.http2 = http2 and http2_available()
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared HTTP client, created on first use and kept alive between calls."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def get_model_catalog(
+        self,
+        validators: Dict[str, str] | None = None,
+    ) -> Tuple[List[ModelInfo] | None, Dict[str, str]]:
+        """
+        Fetch model metadata from the OpenAI API.
+
+        Args:
+            validators: 'etag'/'last_modified' values from an earlier response,
+                sent as conditional request headers
+
+        Returns:
+            Tuple of (models, validators). models is None when the server
+            reports the catalog as unchanged. Model names are unprefixed.
+            Errors are raised.
+        """
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = await self.http.get("/models", headers=headers)
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+        data = response.json()
+
+        # Sort alphabetically for consistency
+        models = sorted(
+            (ModelInfo(name=model["id"], provider="openai") for model in data.get("data", [])),
+            key=lambda m: m.name,
+        )
+
+        new_validators = {
+            key: response.headers[header]
+            for key, header in (("etag", "etag"), ("last_modified", "last-modified"))
+            if header in response.headers
+        }
+        return models, new_validators
 
     async def get_models(self) -> List[str]:
         """Fetch available models from the OpenAI API."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{self.base_url}/models",
-                    headers={"Authorization": f"Bearer {self.api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            catalog, _ = await self.get_model_catalog()
 
-                # Extract all model IDs
-                all_models = [model["id"] for model in data.get("data", [])]
+            # Extract all model IDs
+            all_models = [model.name for model in catalog or []]
 
-                # Sort alphabetically for consistency
-                all_models.sort()
+            if all_models:
+                return all_models
 
-                if all_models:
-                    return all_models
-
-                # Fallback to common models
-                return ["gpt-4o", "gpt-4-turbo-preview", "gpt-3.5-turbo"]
+            # Fallback to common models
+            return ["gpt-4o", "gpt-4-turbo-preview", "gpt-3.5-turbo"]
 
         except Exception as e:
             # Return common model names as fallback
@@ -44,7 +137,7 @@ class OpenAIClient:
         self,
         model: str,
         messages: List[Dict[str, str]],
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[StreamEvent]:
         """
         Stream chat responses from the OpenAI API.
 
@@ -53,7 +146,12 @@ class OpenAIClient:
             messages: List of message dicts with 'role' and 'content' keys
 
         Yields:
-            Content chunks as they arrive from the API
+            ContentDelta events as text arrives, Finish with the finish
+            reason, Usage at the end, Heartbeat for keep-alive comments and
+            StreamError for an error reported in the stream
+
+        Raises:
+            ProviderError: If the request fails after retries
         """
         # Convert messages to OpenAI format (remove timestamp and model fields)
         openai_messages = [
@@ -65,43 +163,71 @@ class OpenAIClient:
             "model": model,
             "messages": openai_messages,
             "stream": True,
+            "stream_options": {"include_usage": True},
         }
 
+        # Transient failures are retried until the first event arrives
+        async for event in retry_stream(
+            lambda: self._stream_chat(payload),
+            self.retry_policy,
+            self.first_token_timeout,
+        ):
+            yield event
+
+    @staticmethod
+    def _events(event: SSEEvent) -> Iterator[StreamEvent]:
+        """Convert one server-sent event into stream events."""
+        # Skip the [DONE] message
+        if event.data.strip() == b"[DONE]":
+            return
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/chat/completions",
-                    json=payload,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            # OpenAI uses SSE format: "data: {json}"
-                            if line.startswith("data: "):
-                                data_str = line[6:]  # Remove "data: " prefix
-
-                                # Skip the [DONE] message
-                                if data_str.strip() == "[DONE]":
-                                    continue
-
-                                try:
-                                    chunk = json.loads(data_str)
-                                    # OpenAI returns content in choices[0].delta.content
-                                    if "choices" in chunk and len(chunk["choices"]) > 0:
-                                        delta = chunk["choices"][0].get("delta", {})
-                                        content = delta.get("content")
-                                        if content:
-                                            yield content
-                                except json.JSONDecodeError:
-                                    continue
-        except Exception as e:
-            yield f"\n\n[Error: {str(e)}]"
+            chunk = event.json()
+        except ValueError:
+            return
+        # Failures after the response started are sent as an error object
+        if chunk.get("error"):
+            error = chunk["error"]
+            message = error.get("message") if isinstance(error, dict) else None
+            yield StreamError(str(message or error))
+            return
+        # OpenAI returns content in choices[0].delta.content
+        if chunk.get("choices"):
+            choice = chunk["choices"][0]
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield ContentDelta(content)
+            if choice.get("finish_reason"):
+                yield Finish(choice["finish_reason"])
+        # The final chunk carries usage and no choices
+        if chunk.get("usage"):
+            yield Usage(
+                chunk["usage"].get("prompt_tokens"),
+                chunk["usage"].get("completion_tokens"),
+            )
+
+    async def _stream_chat(self, payload: Dict[str, Any]) -> AsyncIterator[StreamEvent]:
+        """Make a single streaming chat request."""
+        async with self.http.stream(
+            "POST",
+            "/chat/completions",
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+
+            # OpenAI uses SSE format: "data: {json}"
+            parser = SSEParser()
+            async for data in response.aiter_bytes():
+                comments = parser.comments
+                for event in parser.feed(data):
+                    for stream_event in self._events(event):
+                        yield stream_event
+                # Keep-alive comments between events
+                if parser.comments > comments:
+                    yield HEARTBEAT
+            # A last event the server didn't end with a blank line
+            for event in parser.flush():
+                for stream_event in self._events(event):
+                    yield stream_event
 
     async def chat(
         self,
@@ -117,6 +243,9 @@ class OpenAIClient:
 
         Returns:
             The complete response content
+
+        Raises:
+            ProviderError: If the request fails after retries
         """
         # Convert messages to OpenAI format
         openai_messages = [
@@ -130,21 +259,14 @@ class OpenAIClient:
             "stream": False,
         }
 
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    json=payload,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                if "choices" in data and len(data["choices"]) > 0:
-                    return data["choices"][0].get("message", {}).get("content", "")
-                return ""
-        except Exception as e:
-            return f"[Error: {str(e)}]"
+        async def post() -> httpx.Response:
+            response = await self.http.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            return response
+
+        response = await retry_request(post, self.retry_policy)
+        data = response.json()
+
+        if "choices" in data and len(data["choices"]) > 0:
+            return data["choices"][0].get("message", {}).get("content", "")
+        return ""
@@ -0,0 +1,169 @@
+"""Retries with exponential backoff for provider requests."""
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """A provider request failed."""
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool = False,
+        retry_after: float | None = None,
+        timeout: bool = False,
+    ):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.timeout = timeout
+
+    @property
+    def provider_down(self) -> bool:
+        """Whether the error suggests the provider itself is unreachable or failing."""
+        return self.retryable or self.timeout
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_error(error: Exception) -> ProviderError:
+    """
+    Convert an exception from a request into a ProviderError.
+
+    Connection failures, dropped connections, 429 and 5xx responses are
+    retryable; timeouts while waiting for data and other errors are not.
+    """
+    if isinstance(error, ProviderError):
+        return error
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return ProviderError(
+            f"HTTP {status} from {error.request.url}",
+            retryable=status in RETRYABLE_STATUS,
+            retry_after=parse_retry_after(error.response.headers.get("retry-after")),
+        )
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return ProviderError(f"Could not connect: {error}", retryable=True)
+    if isinstance(error, (httpx.RemoteProtocolError, httpx.ReadError)):
+        # Typically a pooled keep-alive connection the server already closed
+        return ProviderError(f"Connection dropped: {error}", retryable=True)
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return ProviderError(f"Timed out: {error}", timeout=True)
+    return ProviderError(str(error) or type(error).__name__)
+
+
+@dataclass
+class RetryPolicy:
+    """How failed provider requests are retried."""
+
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+
+    def delay(self, error: ProviderError, attempt: int) -> float | None:
+        """
+        Get the wait before retry number ``attempt`` (starting at 0).
+
+        Returns None when the error should not be retried: it is not
+        retryable, retries are exhausted, or the server asks us to wait
+        longer than ``backoff_max``.
+        """
+        if not error.retryable or attempt >= self.max_retries:
+            return None
+        if error.retry_after is not None:
+            return error.retry_after if error.retry_after <= self.backoff_max else None
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+async def retry_request(call: Callable[[], Awaitable[T]], policy: RetryPolicy) -> T:
+    """Await a request, retrying transient failures. Raises ProviderError."""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            error = classify_error(e)
+            delay = policy.delay(error, attempt)
+            if delay is None:
+                raise error from e
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def retry_stream(
+    open_stream: Callable[[], AsyncIterator[T]],
+    policy: RetryPolicy,
+    first_token_timeout: float | None = None,
+) -> AsyncIterator[T]:
+    """
+    Iterate a stream, retrying transient failures until its first item arrives.
+
+    Once anything has been yielded the stream is never restarted, so a
+    failure mid-response raises instead of duplicating output. Raises
+    ProviderError, including when no first item arrives within
+    ``first_token_timeout`` seconds. The timeout covers all attempts and the
+    waits between them, not each attempt on its own.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if first_token_timeout is None else loop.time() + first_token_timeout
+    attempt = 0
+    while True:
+        remaining = None if deadline is None else max(0.0, deadline - loop.time())
+        stream = open_stream()
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), remaining)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError as e:
+            await stream.aclose()
+            raise ProviderError(f"No response within {first_token_timeout:g}s", timeout=True) from e
+        except Exception as e:
+            await stream.aclose()
+            error = classify_error(e)
+            delay = policy.delay(error, attempt)
+            if delay is None:
+                raise error from e
+            if deadline is not None and loop.time() + delay >= deadline:
+                # The retry couldn't start before the deadline
+                raise ProviderError(
+                    f"No response within {first_token_timeout:g}s: {error}", timeout=True
+                ) from e
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+
+        try:
+            yield first
+            async for item in stream:
+                yield item
+        except Exception as e:
+            raise classify_error(e) from e
+        finally:
+            await stream.aclose()
+        return
@@ -0,0 +1,189 @@
+"""Incremental byte-level parsers for streamed API responses."""
+import re
+from typing import Any, List
+
+from . import jsonlib
+
+EOL_RE = re.compile(rb"\r\n|\r|\n")
+BOM = b"\xef\xbb\xbf"
+
+
+class NDJSONParser:
+    """
+    Parser for newline-delimited JSON (used by Ollama).
+
+    Feed it raw bytes as they arrive; it returns every complete JSON object.
+    Lines that fail to decode are skipped.
+    """
+
+    def __init__(self, backend: jsonlib.JSONBackend | None = None):
+        """Initialize the parser, optionally with a specific JSON backend."""
+        self.backend = backend or jsonlib.default_backend
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Any]:
+        """Add bytes and return the objects completed by them."""
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._buffer += data
+            return []
+
+        if self._buffer:
+            self._buffer += data[:end]
+            complete = bytes(self._buffer)
+            self._buffer = bytearray(data[end + 1:])
+        else:
+            complete = data[:end]
+            self._buffer += data[end + 1:]
+        return self._decode(complete.split(b"\n"))
+
+    def flush(self) -> List[Any]:
+        """Decode whatever is left in the buffer at the end of the stream."""
+        remaining = bytes(self._buffer)
+        self._buffer.clear()
+        return self._decode([remaining])
+
+    def _decode(self, lines: List[bytes]) -> List[Any]:
+        loads = self.backend.loads
+        if not self.backend.binary:
+            # Decode the whole block once rather than line by line
+            lines = b"\n".join(lines).decode("utf-8", "replace").split("\n")
+        objects = []
+        for line in lines:
+            if line.strip():
+                try:
+                    objects.append(loads(line))
+                except ValueError:
+                    continue
+        return objects
+
+
+class SSEEvent:
+    """A dispatched server-sent event."""
+
+    __slots__ = ("event", "data", "id")
+
+    def __init__(self, event: str, data: bytes, id: str):
+        self.event = event
+        self.data = data
+        self.id = id
+
+    def json(self, backend: jsonlib.JSONBackend | None = None) -> Any:
+        """Decode the event data as JSON. Raises ValueError on bad input."""
+        return (backend or jsonlib.default_backend).decode(self.data)
+
+    def __repr__(self) -> str:
+        return f"SSEEvent(event={self.event!r}, data={self.data!r}, id={self.id!r})"
+
+
+class SSEParser:
+    """
+    Parser for server-sent events (used by OpenAI).
+
+    Implements the event stream format from the HTML spec: CR, LF and CRLF
+    line endings, multi-line data fields, comments, and the event, id and
+    retry fields. Feed it raw bytes; it returns each event once dispatched by
+    a blank line.
+    """
+
+    def __init__(self):
+        """Initialize the parser."""
+        self.last_event_id = ""
+        self.retry: int | None = None
+        self.comments = 0
+        self._buffer = bytearray()
+        self._data: List[bytes] = []
+        self._event = ""
+        self._started = False
+
+    def feed(self, data: bytes) -> List[SSEEvent]:
+        """Add bytes and return the events dispatched by them."""
+        buffer = self._buffer
+        buffer += data
+        if not self._started:
+            # Strip a leading UTF-8 BOM, which may itself arrive in pieces
+            if len(buffer) < 3 and BOM.startswith(buffer):
+                return []
+            self._started = True
+            if buffer.startswith(BOM):
+                del buffer[:3]
+
+        events = []
+        if b"\r" not in buffer:
+            # Fast path for the usual LF-only streams
+            end = buffer.rfind(b"\n")
+            if end < 0:
+                return events
+            for line in bytes(buffer[:end]).split(b"\n"):
+                event = self._process_line(line)
+                if event is not None:
+                    events.append(event)
+            del buffer[:end + 1]
+            return events
+
+        pos = 0
+        while True:
+            match = EOL_RE.search(buffer, pos)
+            if match is None:
+                break
+            if match.end() == len(buffer) and match.group() == b"\r":
+                # A trailing CR may be the first half of a CRLF split across reads
+                break
+            event = self._process_line(bytes(buffer[pos:match.start()]))
+            pos = match.end()
+            if event is not None:
+                events.append(event)
+        del buffer[:pos]
+        return events
+
+    def flush(self) -> List[SSEEvent]:
+        """
+        Finish the stream and return the events still pending.
+
+        The spec discards an event that isn't ended by a blank line, but
+        servers do end streams on their last event's data line, so the end
+        of the stream also ends the last line and dispatches its event.
+        Data cut off mid-line is then incomplete and fails to decode like
+        any other bad event.
+        """
+        events = self.feed(b"\n") if self._buffer else []
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        self._buffer.clear()
+        return events
+
+    def _process_line(self, line: bytes) -> SSEEvent | None:
+        if not line:
+            return self._dispatch()
+        if line.startswith(b"data: "):
+            self._data.append(line[6:])
+            return None
+        if line[0] == 0x3A:  # ":" starts a comment
+            self.comments += 1
+            return None
+
+        field, colon, value = line.partition(b":")
+        if colon and value[:1] == b" ":
+            value = value[1:]
+
+        if field == b"data":
+            self._data.append(value)
+        elif field == b"event":
+            self._event = value.decode("utf-8", "replace")
+        elif field == b"id":
+            if b"\0" not in value:
+                self.last_event_id = value.decode("utf-8", "replace")
+        elif field == b"retry":
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+    def _dispatch(self) -> SSEEvent | None:
+        event_type = self._event or "message"
+        self._event = ""
+        if not self._data:
+            return None
+        data = b"\n".join(self._data)
+        self._data = []
+        return SSEEvent(event_type, data, self.last_event_id)
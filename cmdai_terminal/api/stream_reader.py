@@ -0,0 +1,130 @@
+"""Background reading of streamed API responses."""
+import asyncio
+from collections import deque
+from typing import AsyncIterator, List
+
+from .events import ContentDelta, Finish, Heartbeat, StreamError, StreamEvent, Usage
+
+
+class StreamReader:
+    """
+    Reads an event stream in its own task so the consumer never slows the socket.
+
+    Text deltas are buffered in a bounded queue. When the consumer falls
+    behind and the queue is full, new text is coalesced into the newest entry
+    instead of blocking the network read. Iterating the reader yields all text
+    that is available at that moment, joined into a single string. Usage,
+    finish reason, errors and heartbeats are kept as attributes.
+    """
+
+    def __init__(self, stream: AsyncIterator[StreamEvent], maxsize: int = 64):
+        """Initialize the reader for a chunk stream."""
+        self.maxsize = maxsize
+        self.chunks = 0
+        self.chars = 0
+        self.started_at: float | None = None
+        self.first_chunk_at: float | None = None
+        self.finished_at: float | None = None
+        self.gaps: List[float] = []
+        self.usage: Usage | None = None
+        self.finish_reason: str | None = None
+        self.error_message: str | None = None
+        self.heartbeats = 0
+        self._stream = stream
+        self._items: deque[List[str]] = deque()
+        self._ready = asyncio.Event()
+        self._done = False
+        self._error: BaseException | None = None
+        self._task: asyncio.Task | None = None
+        self._cancelled = False
+
+    def start(self) -> "StreamReader":
+        """Start reading the stream in a background task."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def _run(self) -> None:
+        """Producer: pull chunks off the network as fast as they arrive."""
+        loop = asyncio.get_running_loop()
+        self.started_at = loop.time()
+        last_chunk_at = None
+        try:
+            async for event in self._stream:
+                if type(event) is not ContentDelta:
+                    self._record(event)
+                    continue
+                chunk = event.text
+                now = loop.time()
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = now
+                else:
+                    self.gaps.append(now - last_chunk_at)
+                last_chunk_at = now
+                self.chunks += 1
+                self.chars += len(chunk)
+                if len(self._items) >= self.maxsize:
+                    self._items[-1].append(chunk)
+                else:
+                    self._items.append([chunk])
+                self._ready.set()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.finished_at = loop.time()
+            self._done = True
+            self._ready.set()
+
+    def _record(self, event: StreamEvent) -> None:
+        """Keep a non-text event."""
+        if isinstance(event, Usage):
+            self.usage = event
+        elif isinstance(event, Finish):
+            self.finish_reason = event.reason
+        elif isinstance(event, StreamError):
+            self.error_message = event.message
+        elif isinstance(event, Heartbeat):
+            self.heartbeats += 1
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Network read rate, measured from the first chunk to the end of the stream."""
+        if self.first_chunk_at is None or self.chunks < 2:
+            return 0.0
+        end = self.finished_at or asyncio.get_running_loop().time()
+        elapsed = end - self.first_chunk_at
+        return self.chunks / elapsed if elapsed > 0 else 0.0
+
+    def __aiter__(self) -> "StreamReader":
+        return self
+
+    async def __anext__(self) -> str:
+        """Consumer: wait for buffered text and take all of it."""
+        self.start()
+        while not self._items:
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+
+        parts = []
+        while self._items:
+            parts.extend(self._items.popleft())
+        return "".join(parts)
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the stream was stopped before it finished."""
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """
+        Stop reading. Cancelling the task closes the underlying HTTP response,
+        which tells the server to stop generating. Text read so far can still
+        be consumed.
+        """
+        if self._task is not None and not self._task.done():
+            self._cancelled = True
+            self._task.cancel()
@@ -1,7 +1,16 @@
 """Unified API client that supports both Ollama and OpenAI."""
-from typing import AsyncIterator, List, Dict, Any
+import asyncio
+import httpx
+from dataclasses import replace
+from typing import AsyncIterator, Awaitable, List, Dict, Any, Tuple
 from .ollama import OllamaClient
+from .circuit_breaker import CircuitBreaker
+from .endpoint_pool import Endpoint, EndpointPool
+from .events import StreamError, StreamEvent, Usage
+from .hedging import HedgePolicy, HedgeStats
 from .openai_client import OpenAIClient
+from .retry import RetryPolicy, classify_error
+from ..models.model_info import ModelInfo
 
 
 class UnifiedClient:
@@ -18,19 +27,108 @@ class UnifiedClient:
         ollama_timeout: int,
         openai_api_key: str | None = None,
         openai_timeout: int = 60,
+        ollama_limits: Dict[str, Any] | None = None,
+        openai_limits: Dict[str, Any] | None = None,
+        openai_http2: bool = False,
+        ollama_discovery_timeout: float = 3.0,
+        openai_discovery_timeout: float = 5.0,
+        ollama_connect_timeout: float = 5.0,
+        openai_connect_timeout: float = 5.0,
+        ollama_first_token_timeout: float | None = None,
+        openai_first_token_timeout: float | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breaker_failure_threshold: int = 3,
+        breaker_reset_timeout: float = 30.0,
+        ollama_endpoints: List[str] | None = None,
+        hedging: bool = False,
+        hedge_delay: float | None = None,
+        hedge_percentile: float = 0.95,
     ):
-        """Initialize the unified client."""
-        self.ollama_client = OllamaClient(ollama_base_url, ollama_timeout)
+        """
+        Initialize the unified client.
+
+        Each endpoint keeps one long-lived connection pool for the lifetime of
+        the client; call ``aclose()`` on shutdown to release it. Each endpoint
+        also has a circuit breaker so that calls fail fast while it is down.
+        With several ``ollama_endpoints`` requests are balanced between them
+        (``ollama_base_url`` is used when none are given), and with ``hedging``
+        a stream whose first token takes longer than ``hedge_delay`` seconds
+        (or, without a delay, the learned ``hedge_percentile`` of recent
+        first-token times) is also sent to a second endpoint.
+        """
+        def breaker() -> CircuitBreaker:
+            return CircuitBreaker(breaker_failure_threshold, breaker_reset_timeout)
+
+        ollama = [
+            Endpoint("ollama", OllamaClient(
+                url,
+                ollama_timeout,
+                limits=httpx.Limits(**ollama_limits) if ollama_limits else None,
+                connect_timeout=ollama_connect_timeout,
+                first_token_timeout=ollama_first_token_timeout,
+                retry_policy=retry_policy,
+            ), breaker())
+            for url in dict.fromkeys(ollama_endpoints or [ollama_base_url])
+        ]
+        self.pools = {"ollama": EndpointPool(ollama)}
+        self.ollama_client = ollama[0].client
         self.openai_client = None
 
         if openai_api_key:
-            self.openai_client = OpenAIClient(openai_api_key, openai_timeout)
+            self.openai_client = OpenAIClient(
+                openai_api_key,
+                openai_timeout,
+                limits=httpx.Limits(**openai_limits) if openai_limits else None,
+                http2=openai_http2,
+                connect_timeout=openai_connect_timeout,
+                first_token_timeout=openai_first_token_timeout,
+                retry_policy=retry_policy,
+            )
+            self.pools["openai"] = EndpointPool([Endpoint("openai", self.openai_client, breaker())])
+
+        # Model discovery gets its own short deadline, separate from the chat timeout
+        self.discovery_timeouts = {
+            "ollama": ollama_discovery_timeout,
+            "openai": openai_discovery_timeout,
+        }
+
+        self.hedging: Dict[str, HedgePolicy] = {}
+        if hedging:
+            self.hedging = {
+                provider: HedgePolicy(hedge_delay, hedge_percentile)
+                for provider, pool in self.pools.items()
+                if len(pool.endpoints) > 1
+            }
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        """All endpoints of all configured providers."""
+        return [e for pool in self.pools.values() for e in pool.endpoints]
+
+    @property
+    def hedge_stats(self) -> Dict[str, HedgeStats]:
+        """How often hedged requests fired and won, per provider."""
+        return {provider: hedge.stats for provider, hedge in self.hedging.items()}
+
+    @property
+    def sources(self) -> List[str]:
+        """Keys of all endpoints, i.e. the separate model catalogs."""
+        return [e.key for e in self.endpoints]
+
+    async def aclose(self) -> None:
+        """Close the connection pools of all endpoints."""
+        await asyncio.gather(*(e.client.aclose() for e in self.endpoints), return_exceptions=True)
 
     @staticmethod
     def is_openai_model(model: str) -> bool:
         """Check if a model name refers to an OpenAI model."""
         return model.startswith("openai/")
 
+    @classmethod
+    def provider_for(cls, model: str) -> str:
+        """Get the provider name that serves a model."""
+        return "openai" if cls.is_openai_model(model) else "ollama"
+
     @staticmethod
     def strip_provider_prefix(model: str) -> str:
         """Remove the provider prefix from a model name."""
@@ -45,65 +143,337 @@ class UnifiedClient:
             return f"openai/{model}"
         return model
 
-    async def get_models(self) -> List[str]:
+    @property
+    def unavailable_endpoints(self) -> List[Endpoint]:
+        """Endpoints whose circuit breaker is not closed."""
+        return [e for e in self.endpoints if not e.breaker.available]
+
+    def unavailable_models(self, models: List[str]) -> List[str]:
+        """Get the models that no healthy endpoint can currently serve."""
+        return [
+            model for model in models
+            if self.provider_for(model) in self.pools
+            and not self.pools[self.provider_for(model)].model_available(
+                self.strip_provider_prefix(model)
+            )
+        ]
+
+    def merge_catalogs(self, models: List[ModelInfo]) -> List[ModelInfo]:
         """
-        Fetch available models from both Ollama and OpenAI.
+        Merge the catalogs of all endpoints into one list of models.
+
+        A model offered by several endpoints is listed once, with all of them
+        in its ``endpoints``. Endpoints also learn which models they have, so
+        requests are only routed to endpoints that can serve them.
 
-        Returns a combined list with OpenAI models prefixed with 'openai/'
+        Args:
+            models: Models as fetched from each endpoint, in endpoint order
+
+        Returns:
+            One entry per model name, in order of first appearance
         """
-        models = []
+        merged: Dict[str, ModelInfo] = {}
+        for model in models:
+            if model.name in merged:
+                merged[model.name].endpoints.extend(
+                    url for url in model.endpoints if url not in merged[model.name].endpoints
+                )
+            else:
+                merged[model.name] = replace(model, endpoints=list(model.endpoints))
 
-        # Get Ollama models
-        try:
-            ollama_models = await self.ollama_client.get_models()
-            models.extend(ollama_models)
-        except Exception:
-            pass
+        for endpoint in self.endpoints:
+            endpoint.models = {
+                self.strip_provider_prefix(m.name)
+                for m in merged.values()
+                if m.provider == endpoint.provider and endpoint.url in m.endpoints
+            }
+        return list(merged.values())
 
-        # Get OpenAI models if API key is configured
-        if self.openai_client:
+    async def _discover(
+        self,
+        requests: Dict[Endpoint, Awaitable[Any]],
+    ) -> AsyncIterator[Tuple[Endpoint, Any]]:
+        """
+        Run one request per endpoint concurrently, each under its provider's discovery deadline.
+
+        Yields:
+            (endpoint, result) tuples in completion order, so a slow or
+            unreachable endpoint never holds back the others. Endpoints that
+            fail, miss their deadline or have an open circuit breaker are
+            skipped.
+        """
+        async def run(endpoint: Endpoint, request: Awaitable[Any]) -> Any:
+            breaker = endpoint.breaker
+            if not breaker.allow():
+                request.close()
+                raise ConnectionError(f"{endpoint.url} is unavailable")
             try:
-                openai_models = await self.openai_client.get_models()
-                # Add openai/ prefix to distinguish them
-                prefixed_openai_models = [
-                    self.add_provider_prefix(m, "openai")
-                    for m in openai_models
-                ]
-                models.extend(prefixed_openai_models)
-            except Exception:
-                pass
+                result = await asyncio.wait_for(
+                    request, self.discovery_timeouts[endpoint.provider]
+                )
+            except Exception as e:
+                endpoint.record_error(e)
+                raise
+            finally:
+                breaker.release()
+            breaker.record_success()
+            return result
+
+        tasks = {
+            asyncio.ensure_future(run(endpoint, request)): endpoint
+            for endpoint, request in requests.items()
+        }
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        yield tasks[task], task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_models(self) -> AsyncIterator[Tuple[str, List[str]]]:
+        """
+        Query all endpoints concurrently and yield their models as they arrive.
+
+        Yields:
+            (provider, models) tuples in completion order, one per endpoint.
+            OpenAI models are prefixed with 'openai/'.
+        """
+        async for source, models, _ in self.iter_model_catalogs():
+            yield source.split("@", 1)[0], [m.name for m in models or []]
+
+    async def iter_model_catalogs(
+        self,
+        validators: Dict[str, Dict[str, str]] | None = None,
+        sources: List[str] | None = None,
+    ) -> AsyncIterator[Tuple[str, List[ModelInfo] | None, Dict[str, str]]]:
+        """
+        Query endpoint model catalogs concurrently and yield them as they arrive.
+
+        Args:
+            validators: Per-source cache validators from a previous fetch
+            sources: Restrict the query to these endpoint keys (default: all)
+
+        Yields:
+            (source, models, validators) tuples. models is None when the
+            endpoint reports its catalog unchanged since the given validators.
+        """
+        validators = validators or {}
+        requests = {
+            endpoint: endpoint.client.get_model_catalog(validators.get(endpoint.key))
+            for endpoint in self.endpoints
+            if sources is None or endpoint.key in sources
+        }
+        async for endpoint, (models, new_validators) in self._discover(requests):
+            if models is not None:
+                for model in models:
+                    model.name = self.add_provider_prefix(model.name, endpoint.provider)
+                    model.endpoints = [endpoint.url]
+            yield endpoint.key, models, new_validators
+
+    async def probe(
+        self,
+        validators: Dict[str, Dict[str, str]] | None = None,
+        retry: List[str] | None = None,
+    ) -> AsyncIterator[Tuple[str, List[ModelInfo] | None, Dict[str, str]]]:
+        """
+        Probe endpoints whose circuit breaker is half-open with a catalog request.
+
+        Args:
+            validators: Per-source cache validators from a previous fetch
+            retry: Also query these endpoint keys, e.g. ones whose catalog
+                couldn't be fetched yet although their breaker never opened
+
+        Yields:
+            (source, models, validators) tuples, as ``iter_model_catalogs``,
+            for the endpoints that answered and are available again
+        """
+        retry = retry or []
+        due = [
+            e.key for e in self.endpoints
+            if e.breaker.state == CircuitBreaker.HALF_OPEN or e.key in retry
+        ]
+        if not due:
+            return
+        async for catalog in self.iter_model_catalogs(validators, due):
+            yield catalog
+
+    async def get_models(self) -> List[str]:
+        """
+        Fetch available models from all Ollama endpoints and OpenAI.
+
+        Returns a combined list with OpenAI models prefixed with 'openai/'.
+        A model offered by several endpoints is listed once.
+        """
+        by_provider: Dict[str, List[str]] = {}
+        async for provider, models in self.iter_models():
+            listed = by_provider.setdefault(provider, [])
+            for model in models:
+                if model not in listed:
+                    listed.append(model)
+
+        models = by_provider.get("ollama", []) + by_provider.get("openai", [])
 
         # Return models or fallback
         return models if models else ["llama2"]
 
+    async def _open_stream(
+        self,
+        pool: EndpointPool,
+        model: str,
+        messages: List[Dict[str, str]],
+        hedge: HedgePolicy | None = None,
+    ) -> Tuple[Endpoint, AsyncIterator[StreamEvent], StreamEvent | None] | None:
+        """
+        Start a chat stream and wait for its first event.
+
+        Endpoints that are down are failed over to. With a hedge policy, a
+        request whose first token is slow is raced against the same request
+        on a second endpoint; whichever streams first wins and the other one
+        is cancelled.
+
+        Returns:
+            (endpoint, stream, first event) of the winning request, or None if
+            no endpoint is available. The first event is None for an empty
+            response. The endpoint stays acquired until released by the caller.
+
+        Raises:
+            The last error if every attempt failed
+        """
+        loop = asyncio.get_running_loop()
+        tried: List[Endpoint] = []
+        racers: Dict[asyncio.Future, Tuple[Endpoint, AsyncIterator[StreamEvent], float]] = {}
+        error: Exception | None = None
+        hedged = False
+
+        def launch() -> bool:
+            endpoint = pool.acquire(model, exclude=tried)
+            if endpoint is None:
+                return False
+            tried.append(endpoint)
+            stream = endpoint.client.chat_stream(model, messages)
+            racers[asyncio.ensure_future(anext(stream))] = (endpoint, stream, loop.time())
+            return True
+
+        if hedge:
+            hedge.stats.requests += 1
+        try:
+            while True:
+                if not racers:
+                    if error is not None and not classify_error(error).provider_down:
+                        raise error
+                    if not launch():
+                        if error is not None:
+                            raise error
+                        return None
+
+                timeout = None
+                if hedge and not hedged and hedge.threshold is not None:
+                    first_started = min(started for _, _, started in racers.values())
+                    timeout = max(0.0, first_started + hedge.threshold - loop.time())
+                done, _ = await asyncio.wait(
+                    racers, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # No first token yet: hedge on another endpoint, at most once
+                    hedged = True
+                    if launch():
+                        hedge.stats.fired += 1
+                    continue
+
+                for task in done:
+                    endpoint, stream, started = racers.pop(task)
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        first = None
+                    except Exception as e:
+                        endpoint.record_error(e)
+                        pool.release(endpoint)
+                        error = e
+                        continue
+                    endpoint.breaker.record_success()
+                    if hedge:
+                        now = loop.time()
+                        hedge.record(now - started)
+                        # The losers are cancelled before their first token,
+                        # which would have taken at least this long
+                        for _, _, loser_started in racers.values():
+                            hedge.record(now - loser_started, censored=True)
+                        if hedged and endpoint is not tried[0]:
+                            hedge.stats.won += 1
+                    return endpoint, stream, first
+        finally:
+            # Cancel the losers, which closes their HTTP responses
+            for task in racers:
+                task.cancel()
+            await asyncio.gather(*racers, return_exceptions=True)
+            for endpoint, stream, _ in racers.values():
+                await stream.aclose()
+                pool.release(endpoint)
+
     async def chat_stream(
         self,
         model: str,
         messages: List[Dict[str, str]],
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[StreamEvent]:
         """
         Stream chat responses from the appropriate provider.
 
+        The request goes to the least busy healthy endpoint that has the
+        model. If that endpoint is down before anything was streamed, the
+        next one is tried. With hedging enabled, a slow first token sends the
+        request to a second endpoint as well (see ``_open_stream``).
+
         Args:
             model: The model to use (with or without provider prefix)
             messages: List of message dicts with 'role' and 'content' keys
 
         Yields:
-            Content chunks as they arrive from the API
-        """
-        if self.is_openai_model(model):
-            # Route to OpenAI
-            if not self.openai_client:
-                yield "[Error: OpenAI API key not configured]"
-                return
-
-            clean_model = self.strip_provider_prefix(model)
-            async for chunk in self.openai_client.chat_stream(clean_model, messages):
-                yield chunk
-        else:
-            # Route to Ollama
-            async for chunk in self.ollama_client.chat_stream(model, messages):
-                yield chunk
+            Stream events from the provider. Usage carries the URL of the
+            endpoint that answered. Failures end the stream with a
+            StreamError instead of raising.
+        """
+        provider = self.provider_for(model)
+        pool = self.pools.get(provider)
+        if not pool:
+            yield StreamError("OpenAI API key not configured")
+            return
+
+        try:
+            opened = await self._open_stream(
+                pool,
+                self.strip_provider_prefix(model),
+                messages,
+                self.hedging.get(provider),
+            )
+        except Exception as e:
+            yield StreamError(str(e))
+            return
+        if opened is None:
+            yield StreamError(f"{provider} is unavailable, retrying in the background")
+            return
+
+        endpoint, stream, first = opened
+        usage_seen = False
+        try:
+            event = first
+            while event is not None:
+                if type(event) is Usage:
+                    event.endpoint = endpoint.url
+                    usage_seen = True
+                yield event
+                event = await anext(stream, None)
+            if not usage_seen:
+                yield Usage(endpoint=endpoint.url)
+        except Exception as e:
+            yield StreamError(str(e))
+        finally:
+            await stream.aclose()
+            pool.release(endpoint)
 
     async def chat(
         self,
@@ -120,13 +490,29 @@ class UnifiedClient:
         Returns:
             The complete response content
         """
-        if self.is_openai_model(model):
-            # Route to OpenAI
-            if not self.openai_client:
-                return "[Error: OpenAI API key not configured]"
+        provider = self.provider_for(model)
+        pool = self.pools.get(provider)
+        if not pool:
+            return "[Error: OpenAI API key not configured]"
+
+        name = self.strip_provider_prefix(model)
+        tried: List[Endpoint] = []
+        error: Exception | None = None
+        while (endpoint := pool.acquire(name, exclude=tried)) is not None:
+            tried.append(endpoint)
+            try:
+                content = await endpoint.client.chat(name, messages)
+            except Exception as e:
+                endpoint.record_error(e)
+                error = e
+                if not classify_error(e).provider_down:
+                    break
+                continue
+            finally:
+                pool.release(endpoint)
+            endpoint.breaker.record_success()
+            return content
 
-            clean_model = self.strip_provider_prefix(model)
-            return await self.openai_client.chat(clean_model, messages)
-        else:
-            # Route to Ollama
-            return await self.ollama_client.chat(model, messages)
+        if error is not None:
+            return f"[Error: {str(error)}]"
+        return f"[Error: {provider} is unavailable, retrying in the background]"
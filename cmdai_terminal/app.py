@@ -3,18 +3,37 @@ from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical, VerticalScroll
 from textual.widgets import Footer, Header, Static
 from textual.binding import Binding
+from textual.message import Message as TextualMessage
 from textual.screen import Screen
-from textual.widgets import Label, ListItem, ListView, OptionList
+from textual.widgets import Input, Label, ListItem, ListView, OptionList
+from textual.worker import get_current_worker
 from textual.widgets.option_list import Option
+from rich.text import Text
+from dataclasses import replace
 from datetime import datetime
+from functools import partial
+from typing import Callable
+import asyncio
+import threading
 
 from .components.sidebar import Sidebar
-from .components.chat_view import ChatView
+from .components.chat_view import ChatView, StreamingMessageWidget
 from .components.input_box import InputBox
+from .components.render_scheduler import RenderScheduler
+from .api.retry import RetryPolicy
+from .api.stream_reader import StreamReader
 from .api.unified_client import UnifiedClient
 from .models.conversation import Conversation
+from .models.conversation_summary import ConversationSummary
 from .models.message import Message
+from .models.search_result import SearchResult
+from .models.metrics import MessageMetrics
+from .models.model_info import ModelInfo
+from .storage.backends import open_storage
+from .storage.conversation_cache import ConversationCache
 from .storage.history import ConversationStorage
+from .storage.model_cache import ModelCatalogCache
+from .storage.writer import BackgroundWriter
 from .config import Config
 
 
@@ -26,10 +45,18 @@ class ModelSelectorScreen(Screen[str | None]):
         ("q", "cancel", "Cancel"),
     ]
 
-    def __init__(self, models: list[str], current_model: str):
+    def __init__(
+        self,
+        models: list[str],
+        current_model: str,
+        details: dict[str, ModelInfo] | None = None,
+        unavailable: list[str] | None = None,
+    ):
         super().__init__()
         self.models = models if models else ["llama2"]
         self.current_model = current_model
+        self.details = details or {}
+        self.unavailable = unavailable or []
 
     def compose(self) -> ComposeResult:
         """Compose the model selector screen."""
@@ -40,37 +67,70 @@ class ModelSelectorScreen(Screen[str | None]):
                 yield Static(f"SELECT A MODEL", id="model-screen-title")
                 yield Static(f"Available models: {len(self.models)}", id="model-screen-subtitle")
                 yield Static("=" * 50, id="separator-mid")
-
-                # Create option list with models
-                options = []
-                for i, m in enumerate(self.models, 1):
-                    prefix = "✓ " if m == self.current_model else f"{i}."
-                    # Add emoji indicator for provider
-                    display_name = m
-                    if m.startswith("openai/"):
-                        display_name = f"⭐ {m}"  # OpenAI models get star emoji
-                    else:
-                        display_name = f"🦙 {m}"  # Ollama models get llama emoji
-                    options.append(Option(f"{prefix} {display_name}", id=m))
-
-                yield OptionList(*options, id="model-options")
+                yield OptionList(*self._build_options(), id="model-options")
                 yield Static("-" * 50, id="separator-bottom")
                 yield Static("↑/↓: Navigate | Enter: Select | Esc/Q: Cancel", id="model-screen-hint")
         yield Footer()
 
+    def _build_options(self) -> list[Option]:
+        """Create option list entries for the models."""
+        options = []
+        for i, m in enumerate(self.models, 1):
+            prefix = "✓ " if m == self.current_model else f"{i}."
+            # Add emoji indicator for provider
+            display_name = m
+            if m.startswith("openai/"):
+                display_name = f"⭐ {m}"  # OpenAI models get star emoji
+            else:
+                display_name = f"🦙 {m}"  # Ollama models get llama emoji
+            info = self.details.get(m)
+            summary = info.describe() if info else ""
+            # Models without a healthy endpoint are greyed out
+            down = m in self.unavailable
+            if down:
+                summary = f"{summary} · unavailable" if summary else "unavailable"
+            prompt = Text.assemble(f"{prefix} {display_name}", (f"  {summary}" if summary else "", "dim"))
+            options.append(Option(prompt, id=m, disabled=down))
+        return options
+
+    def _highlight_current(self, option_list: OptionList) -> None:
+        """Highlight the current model in the option list."""
+        try:
+            current_index = self.models.index(self.current_model)
+            option_list.highlighted = current_index
+        except (ValueError, IndexError):
+            pass
+
     def on_mount(self) -> None:
         """Focus the option list when mounted."""
         self.title = "Model Selection"
         self.sub_title = ""
         option_list = self.query_one("#model-options", OptionList)
         # Select the current model by default
-        try:
-            current_index = self.models.index(self.current_model)
-            option_list.highlighted = current_index
-        except (ValueError, IndexError):
-            pass
+        self._highlight_current(option_list)
         option_list.focus()
 
+    def update_models(
+        self,
+        models: list[str],
+        details: dict[str, ModelInfo],
+        unavailable: list[str],
+    ) -> None:
+        """Replace the listed models, e.g. after a background catalog refresh."""
+        self.models = models if models else ["llama2"]
+        self.details = details
+        self.unavailable = unavailable
+        option_list = self.query_one("#model-options", OptionList)
+        highlighted = option_list.highlighted
+        selected = self.models[highlighted] if highlighted is not None and highlighted < len(self.models) else None
+        option_list.clear_options()
+        option_list.add_options(self._build_options())
+        self.query_one("#model-screen-subtitle", Static).update(f"Available models: {len(self.models)}")
+        if selected in self.models:
+            option_list.highlighted = self.models.index(selected)
+        else:
+            self._highlight_current(option_list)
+
     def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
         """Handle model selection."""
         selected_model = event.option.id
@@ -82,6 +142,128 @@ class ModelSelectorScreen(Screen[str | None]):
         self.dismiss(None)
 
 
+class SearchScreen(Screen[SearchResult | None]):
+    """Full-screen search across all conversations."""
+
+    BINDINGS = [
+        ("escape", "cancel", "Cancel"),
+    ]
+
+    def __init__(
+        self,
+        search: Callable[[str, int], list[SearchResult]],
+        pending: Callable[[], int] = lambda: 0,
+        limit: int = 30,
+    ):
+        """
+        Initialize the search screen.
+
+        Args:
+            search: Storage search function, called on a worker thread
+            pending: Number of conversations the last search had yet to
+                index; the search is repeated until it is 0
+            limit: Maximum number of results shown
+        """
+        super().__init__()
+        self.search = search
+        self.pending = pending
+        self.limit = limit
+        self.results: list[SearchResult] = []
+
+    def compose(self) -> ComposeResult:
+        """Compose the search screen."""
+        yield Header()
+        with Vertical(id="search-outer"):
+            with Vertical(id="search-container"):
+                yield Static("SEARCH CONVERSATIONS", id="search-title")
+                yield Input(placeholder="Search messages...", id="search-input")
+                yield Static("Type to search", id="search-status")
+                yield OptionList(id="search-results")
+                yield Static("Enter: Open | ↓: Results | Esc: Cancel", id="search-hint")
+        yield Footer()
+
+    def on_mount(self) -> None:
+        """Focus the search input when mounted."""
+        self.title = "Search"
+        self.sub_title = ""
+        self.query_one("#search-input", Input).focus()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Search as the query is typed, dropping searches for outdated queries."""
+        query = event.value.strip()
+        if not query:
+            self.show_results(query, [])
+            return
+        self.run_worker(partial(self._run_search, query), thread=True, exclusive=True, group="search")
+
+    def _run_search(self, query: str) -> None:
+        """Worker thread: search storage and hand the results to the UI, again as long as indexing continues."""
+        worker = get_current_worker()
+        while True:
+            try:
+                results = self.search(query, self.limit)
+                pending = self.pending()
+            except Exception as e:
+                if not worker.is_cancelled:
+                    self.app.call_from_thread(self.query_one("#search-status", Static).update, f"Search failed: {e}")
+                return
+            if worker.is_cancelled:
+                return
+            self.app.call_from_thread(self.show_results, query, results, pending)
+            if not pending:
+                return
+
+    def show_results(self, query: str, results: list[SearchResult], pending: int = 0) -> None:
+        """List search results, best match first."""
+        if query != self.query_one("#search-input", Input).value.strip():
+            return
+        self.results = results
+        option_list = self.query_one("#search-results", OptionList)
+        option_list.clear_options()
+        option_list.add_options([
+            Option(
+                Text.assemble(
+                    (f"{r.title}", "bold"),
+                    (f"  #{r.message_index + 1} {r.role}\n", "dim"),
+                    f"  {r.snippet}",
+                ),
+                id=str(i),
+            )
+            for i, r in enumerate(results)
+        ])
+        if not query:
+            status = "Type to search"
+        elif not results:
+            status = "No matches"
+        else:
+            status = f"{len(results)} best matches" if len(results) >= self.limit else f"{len(results)} matches"
+        if query and pending:
+            status += f" (indexing, {pending} conversations to go)"
+        self.query_one("#search-status", Static).update(status)
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Open the best match."""
+        if self.results:
+            self.dismiss(self.results[0])
+
+    def on_key(self, event) -> None:
+        """Move from the query to the results with the down arrow."""
+        if event.key == "down" and self.focused is self.query_one("#search-input", Input) and self.results:
+            option_list = self.query_one("#search-results", OptionList)
+            option_list.focus()
+            option_list.highlighted = 0
+            event.stop()
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        """Open the selected match."""
+        if event.option.id is not None:
+            self.dismiss(self.results[int(event.option.id)])
+
+    def action_cancel(self) -> None:
+        """Close search and return to main screen."""
+        self.dismiss(None)
+
+
 class CmdAITerminalApp(App):
     """cmdAI Terminal - Beautiful Ollama API client."""
 
@@ -366,6 +548,78 @@ class CmdAITerminalApp(App):
         width: 100%;
     }
 
+    SearchScreen {
+        background: #171717;
+    }
+
+    #search-outer {
+        align: center middle;
+        width: 100%;
+        height: 1fr;
+        background: #171717;
+    }
+
+    #search-container {
+        width: 100;
+        height: auto;
+        background: #171717;
+    }
+
+    #search-title {
+        text-align: center;
+        text-style: bold;
+        color: #e0e0e0;
+        padding: 1;
+        width: 100%;
+    }
+
+    #search-input {
+        width: 100%;
+        background: #262626;
+        color: #e0e0e0;
+        border: solid #262626;
+    }
+
+    #search-input:focus {
+        border: solid #757575;
+    }
+
+    #search-status {
+        color: #757575;
+        padding: 0 1;
+        width: 100%;
+    }
+
+    #search-results {
+        height: 1fr;
+        max-height: 30;
+        min-height: 10;
+        border: solid #262626;
+        margin: 1 0;
+        background: #1f1f1f;
+    }
+
+    #search-results:focus {
+        border: solid #757575;
+    }
+
+    #search-results > .option-list--option-highlighted {
+        background: #262626;
+        color: #e0e0e0;
+    }
+
+    #search-hint {
+        text-align: center;
+        color: #757575;
+        text-style: bold;
+        padding: 1;
+        width: 100%;
+    }
+
+    .search-hit {
+        border-left: thick #e0e0e0;
+    }
+
     #welcome-message {
         text-align: center;
         color: #757575;
@@ -411,11 +665,19 @@ class CmdAITerminalApp(App):
         Binding("ctrl+q", "quit", "Quit", show=True),
         Binding("ctrl+n", "new_conversation", "New Chat", show=True),
         Binding("ctrl+m", "change_model", "Change Model", show=True),
+        Binding("ctrl+f", "search", "Search", show=True),
     ]
 
     # Notification position
     NOTIFICATION_TIMEOUT = 3
 
+    class ConversationsChanged(TextualMessage, namespace="storage"):
+        """Posted from the storage writer thread after a conversation was saved or deleted."""
+
+        def __init__(self, conversations: list[ConversationSummary]):
+            super().__init__()
+            self.conversations = conversations
+
     def __init__(self):
         super().__init__()
         self.config = Config()
@@ -424,13 +686,58 @@ class CmdAITerminalApp(App):
             ollama_timeout=self.config.ollama_timeout,
             openai_api_key=self.config.openai_api_key if self.config.has_openai_key else None,
             openai_timeout=self.config.openai_timeout,
+            ollama_limits=self.config.pool_limits("ollama"),
+            openai_limits=self.config.pool_limits("openai"),
+            openai_http2=self.config.openai_http2,
+            ollama_discovery_timeout=self.config.discovery_timeout("ollama"),
+            openai_discovery_timeout=self.config.discovery_timeout("openai"),
+            ollama_connect_timeout=self.config.connect_timeout("ollama"),
+            openai_connect_timeout=self.config.connect_timeout("openai"),
+            ollama_first_token_timeout=self.config.first_token_timeout("ollama"),
+            openai_first_token_timeout=self.config.first_token_timeout("openai"),
+            retry_policy=RetryPolicy(**self.config.retry_settings),
+            breaker_failure_threshold=self.config.breaker_settings["failure_threshold"],
+            breaker_reset_timeout=self.config.breaker_settings["reset_timeout"],
+            ollama_endpoints=self.config.ollama_endpoints,
+            **self.config.hedge_settings,
+        )
+        self.storage = open_storage(
+            self.config.storage_backend,
+            self.config.conversations_dir,
+            self.config.database_path,
+            fsync=self.config.storage_fsync,
+            cold_after_days=self.config.cold_after_days,
+            blob_threshold=self.config.blob_threshold,
+        )
+        # Conversation and config writes run here, off the event loop
+        self.writer = BackgroundWriter()
+        # id -> snapshot queued for writing (None: queued for deletion), so
+        # opening a conversation never has to wait for the writer
+        self._unwritten: dict[str, Conversation | None] = {}
+        self._unwritten_lock = threading.Lock()
+        # Recently opened conversations; the sidebar only holds their metadata
+        self.conversation_cache = ConversationCache(
+            self.config.conversation_cache_size,
+            self.config.conversation_cache_bytes,
+        )
+        self.model_cache = ModelCatalogCache(
+            self.config.model_cache_path,
+            ttl=self.config.model_cache_ttl,
         )
-        self.storage = ConversationStorage(self.config.conversations_dir)
 
         # Use last model if available, otherwise use default
         initial_model = self.config.last_model or self.config.default_model
         self.current_conversation = Conversation(model=initial_model)
-        self.available_models = []
+        self.available_models = [initial_model]
+        self.active_stream: StreamReader | None = None
+        self.active_widget: StreamingMessageWidget | None = None
+        # Serve the cached catalog right away; stale entries are refreshed on mount
+        cached_models = self.client.merge_catalogs(self.model_cache.models(self.client.sources))
+        self.model_details: dict[str, ModelInfo] = {m.name: m for m in cached_models}
+        if self.model_details:
+            self.available_models = list(self.model_details)
+        # Sources whose catalog discovery didn't get; probed until one arrives
+        self.undiscovered_sources: set[str] = set()
 
 
     def compose(self) -> ComposeResult:
@@ -448,29 +755,170 @@ class CmdAITerminalApp(App):
         self.title = "cmdAI Terminal"
         self.sub_title = "v1.0"
 
-        # Load available models
-        self.available_models = await self.client.get_models()
-        if not self.available_models:
-            # self.notify("Could not load models from API - using fallback models", severity="warning")
-            self.available_models = [self.config.default_model]
-        # else:
-            # self.notify(f"Loaded {len(self.available_models)} models from API", severity="information")
+        # Discover models in the background so the UI is usable immediately
+        self.run_worker(self.load_models(), group="models", exclusive=True)
+
+        # Periodically probe providers whose circuit breaker has tripped
+        self.set_interval(5, self.schedule_probe)
 
         # Load conversations
         self.refresh_conversation_list()
 
+        # Pack conversations nobody touched in a while, off the event loop
+        if self.config.cold_after_days and isinstance(self.storage, ConversationStorage):
+            self.writer.submit(("archive",), self.storage.archive_cold)
+        # Drop shared message bodies left unreferenced by an interrupted save
+        if isinstance(self.storage, ConversationStorage):
+            self.writer.submit(("blob-gc",), self.storage.collect_garbage)
+
         # Focus input
         input_box = self.query_one(InputBox)
         input_box.focus_input()
 
+    def set_models(self, models: list[ModelInfo]) -> None:
+        """Update the available models, including an open model selector."""
+        if not models:
+            return
+        self.model_details = {m.name: m for m in models}
+        self.available_models = list(self.model_details)
+        self.refresh_model_selector()
+
+    def refresh_model_selector(self) -> None:
+        """Update an open model selector with the current models and endpoint health."""
+        if isinstance(self.screen, ModelSelectorScreen):
+            self.screen.update_models(
+                self.available_models,
+                self.model_details,
+                self.client.unavailable_models(self.available_models),
+            )
+
+    async def load_models(self) -> None:
+        """Refresh stale endpoint catalogs, updating the model list as each one arrives."""
+        stale = self.model_cache.stale_sources(self.client.sources)
+        if not stale:
+            return
+
+        answered = set()
+        async for source, models, validators in self.client.iter_model_catalogs(
+            self.model_cache.validators(), stale
+        ):
+            answered.add(source)
+            self.add_catalog(source, models, validators)
+        self.model_cache.save(writer=self.writer)
+        # One failure doesn't open a breaker, so the probe retries these explicitly
+        self.undiscovered_sources = set(stale) - answered
+        # Models whose endpoints failed to answer are now greyed out
+        self.refresh_model_selector()
+
+    def add_catalog(
+        self,
+        source: str,
+        models: list[ModelInfo] | None,
+        validators: dict[str, str],
+    ) -> None:
+        """Record a catalog fetched from a source and update the model list with it."""
+        self.undiscovered_sources.discard(source)
+        self.model_cache.update(source, models, validators)
+        self.set_models(self.client.merge_catalogs(self.model_cache.models(self.client.sources)))
+
+    def schedule_probe(self) -> None:
+        """Start a background probe if any endpoint is unavailable or its catalog is still missing."""
+        if self.client.unavailable_endpoints or self.undiscovered_sources:
+            self.run_worker(self.probe_providers(), group="probe", exclusive=True)
+
+    async def probe_providers(self) -> None:
+        """Check on unavailable endpoints, adding the catalogs of the ones that recovered."""
+        recovered = False
+        async for source, models, validators in self.client.probe(
+            self.model_cache.validators(), list(self.undiscovered_sources)
+        ):
+            self.add_catalog(source, models, validators)
+            recovered = True
+        if recovered:
+            self.model_cache.save(writer=self.writer)
+            self.refresh_model_selector()
+
+    async def on_unmount(self) -> None:
+        """Finish pending writes and release pooled API connections on shutdown."""
+        await asyncio.to_thread(self.writer.close)
+        await asyncio.to_thread(self.storage.close)
+        await self.client.aclose()
+
     def refresh_conversation_list(self) -> None:
-        """Refresh the conversation list in the sidebar."""
-        conversations = self.storage.list_conversations()
-        sidebar = self.query_one(Sidebar)
-        sidebar.update_conversations(conversations)
+        """Refresh the conversation list in the sidebar; storage is listed on a worker thread."""
+        self.run_worker(self._list_conversations, thread=True, exclusive=True, group="list")
+
+    def _list_conversations(self) -> None:
+        """Worker thread: list the stored conversations and post them to the sidebar."""
+        try:
+            conversations = self.storage.list_conversations()
+        except Exception as e:
+            self.log(f"Listing conversations failed: {e}")
+            return
+        self.post_message(self.ConversationsChanged(conversations))
+
+    def on_storage_conversations_changed(self, message: ConversationsChanged) -> None:
+        """Show the conversation list as of the last background write."""
+        # Writes finish whenever they do: the main screen may be covered
+        # (e.g. by search) or, on exit, already torn down
+        if self.screen_stack:
+            for sidebar in self.screen_stack[0].query(Sidebar):
+                sidebar.update_conversations(message.conversations)
+
+    @staticmethod
+    def _write_key(conversation_id: str) -> tuple:
+        """Get the background writer key of a conversation."""
+        return ("conversation", conversation_id)
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        """
+        Save a conversation on the background writer.
+
+        A snapshot is queued, so messages added meanwhile wait for the next
+        save; queued saves of the same conversation collapse into the last.
+        """
+        snapshot = replace(conversation, messages=list(conversation.messages))
+        with self._unwritten_lock:
+            self._unwritten[conversation.id] = snapshot
+        self.writer.submit(
+            self._write_key(conversation.id),
+            partial(self._write_conversation, snapshot),
+        )
+
+    def delete_conversation(self, conversation_id: str) -> None:
+        """Delete a conversation on the background writer, superseding a queued save."""
+        self.conversation_cache.pop(conversation_id)
+        with self._unwritten_lock:
+            self._unwritten[conversation_id] = None
+        self.writer.submit(
+            self._write_key(conversation_id),
+            partial(self._write_conversation, None, conversation_id),
+        )
 
-    async def on_input_box_send_message(self, message: InputBox.SendMessage) -> None:
+    def _write_conversation(self, conversation: Conversation | None, delete_id: str | None = None) -> None:
+        """Writer thread: save or delete a conversation, then post the updated list."""
+        if conversation is not None:
+            self.storage.save_conversation(conversation)
+        else:
+            self.storage.delete_conversation(delete_id)
+        conversation_id = delete_id if conversation is None else conversation.id
+        with self._unwritten_lock:
+            # Unless a newer save or delete was queued meanwhile
+            if self._unwritten.get(conversation_id, conversation) is conversation:
+                self._unwritten.pop(conversation_id, None)
+        self.post_message(self.ConversationsChanged(self.storage.list_conversations()))
+
+    def on_input_box_send_message(self, message: InputBox.SendMessage) -> None:
         """Handle message send event."""
+        # Generate in a worker so key bindings (e.g. stop) keep working meanwhile
+        self.run_worker(self.generate_response(message.text), group="generation")
+
+    async def generate_response(self, text: str) -> None:
+        """Send a user message and stream the assistant's reply."""
+        # The user may switch conversations while this streams; the reply
+        # belongs to the conversation it was asked in
+        conversation = self.current_conversation
+
         # Disable input during processing
         input_box = self.query_one(InputBox)
         input_box.set_enabled(False)
@@ -478,98 +926,244 @@ class CmdAITerminalApp(App):
         # Add user message
         user_message = Message(
             role="user",
-            content=message.text,
+            content=text,
             timestamp=datetime.now(),
         )
-        self.current_conversation.add_message(user_message)
+        conversation.add_message(user_message)
 
         # Display user message
         chat_view = self.query_one(ChatView)
         chat_view.add_message(user_message)
+        chat_view.focus()
 
-        # Create streaming assistant message
+        # Create streaming assistant message; repaints are capped at ui.max_fps
         streaming_widget = chat_view.create_streaming_message()
+        scheduler = RenderScheduler(streaming_widget.append_content, self.config.max_fps)
 
         # Prepare messages for API
         api_messages = [
             {"role": msg.role, "content": msg.content}
-            for msg in self.current_conversation.messages
+            for msg in conversation.messages
+            if msg.content or not msg.error
         ]
 
-        # Stream response
+        # Stream response: the reader task pulls from the network while this
+        # coroutine renders at its own pace
+        reader = StreamReader(
+            self.client.chat_stream(conversation.model, api_messages)
+        ).start()
+        self.active_stream = reader
+        self.active_widget = streaming_widget
+        assistant_message = None
         try:
-            async for chunk in self.client.chat_stream(
-                self.current_conversation.model,
-                api_messages
-            ):
-                streaming_widget.append_content(chunk)
+            async for chunk in reader:
+                scheduler.push(chunk)
 
             # Finalize message
-            assistant_message = streaming_widget.finalize(self.current_conversation.model)
-            self.current_conversation.add_message(assistant_message)
-
-            # Save conversation
-            self.storage.save_conversation(self.current_conversation)
-            self.refresh_conversation_list()
+            scheduler.flush()
+            self.log(
+                f"Stream read {reader.chunks} chunks at {reader.chunks_per_second:.1f}/s, "
+                f"rendered in {scheduler.frames_rendered} frames, "
+                f"finish reason {reader.finish_reason}"
+            )
+            for provider, stats in self.client.hedge_stats.items():
+                self.log(f"{provider} hedges: {stats.fired}/{stats.requests} fired, {stats.won} won")
+            if reader.cancelled and not streaming_widget.content_buffer:
+                # Stopped before anything arrived; nothing worth keeping
+                streaming_widget.remove()
+                return
+
+            metrics = MessageMetrics.from_stream(
+                reader.started_at,
+                reader.first_chunk_at,
+                reader.finished_at,
+                reader.gaps,
+                reader.chunks,
+                reader.usage.to_dict() if reader.usage else {},
+            )
+            assistant_message = streaming_widget.finalize(
+                conversation.model,
+                truncated=reader.cancelled,
+                metrics=metrics,
+                error=reader.error_message,
+            )
+            conversation.add_message(assistant_message)
+
+            # Save conversation; the sidebar updates once it is written
+            self.save_conversation(conversation)
+            self.conversation_cache.put(conversation)
+            if streaming_widget.chat_view is None and self.current_conversation is conversation:
+                # Opened again while the reply finished in the background
+                chat_view.load_messages(conversation.messages)
 
         except Exception as e:
-            # self.notify(f"Error: {str(e)}", severity="error")
-            pass
+            self.log(f"Generating a response failed: {e}")
+            if assistant_message is None:
+                # Keep what arrived, marked as failed
+                assistant_message = streaming_widget.finalize(conversation.model, error=str(e))
+                conversation.add_message(assistant_message)
+                self.save_conversation(conversation)
+                self.conversation_cache.put(conversation)
 
         finally:
-            # Re-enable input
-            input_box.set_enabled(True)
-            input_box.focus_input()
+            reader.cancel()
+            if self.active_stream is reader:
+                self.active_stream = None
+                self.active_widget = None
+                # Re-enable input
+                input_box.set_enabled(True)
+                input_box.focus_input()
+
+    def on_chat_view_cancel_generation(self, message: ChatView.CancelGeneration) -> None:
+        """Stop the response being generated, keeping what has arrived so far."""
+        self.stop_generation()
+
+    def stop_generation(self) -> None:
+        """Stop the response being generated, if any; it is saved to its conversation as truncated."""
+        if self.active_stream is None:
+            return
+        self.active_stream.cancel()
+        input_box = self.query_one(InputBox)
+        input_box.set_enabled(True)
+        input_box.focus_input()
+
+    def detach_generation(self) -> None:
+        """
+        Stop showing the response being generated, if any, e.g. when another conversation is opened.
+
+        The reply keeps streaming in the background and is saved to the
+        conversation it was asked in; only Esc or Ctrl+C stop it.
+        """
+        if self.active_stream is None:
+            return
+        self.active_widget.detach()
+        self.active_stream = None
+        self.active_widget = None
+        input_box = self.query_one(InputBox)
+        input_box.set_enabled(True)
 
     def on_sidebar_new_conversation(self, message: Sidebar.NewConversation) -> None:
         """Handle new conversation request."""
         self.action_new_conversation()
 
-    def on_sidebar_select_conversation(self, message: Sidebar.SelectConversation) -> None:
-        """Handle conversation selection."""
-        self.current_conversation = message.conversation
+    def open_conversation(self, conversation_id: str, message_index: int | None = None) -> None:
+        """
+        Show a conversation, scrolled to a message if one is given.
+
+        Recently opened conversations come from their cache and ones with
+        queued writes from the queued snapshot; others are loaded on a
+        worker thread, so the UI never waits on disk.
+        """
+        conversation = self.conversation_cache.get(conversation_id)
+        if conversation is None:
+            with self._unwritten_lock:
+                queued = conversation_id in self._unwritten
+                unwritten = self._unwritten.get(conversation_id)
+            if queued and unwritten is None:
+                # Queued for deletion
+                self.refresh_conversation_list()
+                return
+            if queued:
+                # Not written yet: open a copy of what is queued instead of the
+                # previous version on disk (the writer thread reads the snapshot)
+                conversation = replace(unwritten, messages=list(unwritten.messages))
+                self.conversation_cache.put(conversation)
+        if conversation is not None:
+            self.show_conversation(conversation, message_index)
+            return
+        self.run_worker(
+            partial(self._load_conversation, conversation_id, message_index),
+            thread=True, exclusive=True, group="open",
+        )
+
+    def _load_conversation(self, conversation_id: str, message_index: int | None) -> None:
+        """Worker thread: load a conversation from storage and show it, unless another was opened meanwhile."""
+        worker = get_current_worker()
+        try:
+            conversation = self.storage.load_conversation(conversation_id)
+        except Exception as e:
+            self.log(f"Loading conversation {conversation_id} failed: {e}")
+            return
+        if not worker.is_cancelled:
+            self.call_from_thread(self._show_loaded, conversation_id, conversation, message_index)
+
+    def _show_loaded(self, conversation_id: str, conversation: Conversation | None, message_index: int | None) -> None:
+        """Show a conversation loaded from storage."""
+        if conversation is None:
+            # Deleted by something else in the meantime
+            self.refresh_conversation_list()
+            return
+        # Opened (and maybe changed) here while it was loading
+        conversation = self.conversation_cache.get(conversation_id) or conversation
+        self.conversation_cache.put(conversation)
+        self.show_conversation(conversation, message_index)
+
+    def show_conversation(self, conversation: Conversation, message_index: int | None = None) -> None:
+        """Make a conversation the current one and display it."""
+        self.detach_generation()
+        self.current_conversation = conversation
         chat_view = self.query_one(ChatView)
         chat_view.load_messages(self.current_conversation.messages)
+        if message_index is not None:
+            chat_view.scroll_to_message(message_index)
 
         # Update sidebar model display
         sidebar = self.query_one(Sidebar)
         sidebar.update_model(self.current_conversation.model)
 
+    def on_sidebar_select_conversation(self, message: Sidebar.SelectConversation) -> None:
+        """Handle conversation selection."""
+        self.open_conversation(message.conversation.id)
+
+    async def action_search(self) -> None:
+        """Search all conversations and jump to the chosen message."""
+
+        def handle_search_result(result: SearchResult | None) -> None:
+            if result is not None:
+                self.open_conversation(result.conversation_id, result.message_index)
+
+        await self.push_screen(SearchScreen(self.storage.search, lambda: self.storage.search_pending), handle_search_result)
+
     async def on_sidebar_change_model(self, message: Sidebar.ChangeModel) -> None:
         """Handle model change request."""
         await self.action_change_model()
 
     def on_sidebar_delete_conversation(self, message: Sidebar.DeleteConversation) -> None:
         """Handle conversation deletion."""
-        # Delete from storage
-        self.storage.delete_conversation(message.conversation.id)
+        # Delete from storage; the list refreshes once it is done
+        self.delete_conversation(message.conversation.id)
 
         # If it's the current conversation, start a new one
         if self.current_conversation.id == message.conversation.id:
             self.action_new_conversation()
-
-        # Refresh the list
-        self.refresh_conversation_list()
         # self.notify(f"Deleted conversation: {message.conversation.title}", severity="warning")
 
     def on_sidebar_clear_all_conversations(self, message: Sidebar.ClearAllConversations) -> None:
         """Handle clearing all conversations."""
-        # Get all conversations
-        conversations = self.storage.list_conversations()
-
-        # Delete each one
-        for conv in conversations:
-            self.storage.delete_conversation(conv.id)
+        # Get all conversations on a worker thread; they are deleted once listed
+        self.run_worker(self._clear_all_conversations, thread=True, group="clear")
 
         # Start new conversation
         self.action_new_conversation()
 
-        # Refresh list
-        self.refresh_conversation_list()
-        # self.notify(f"Cleared {len(conversations)} conversations", severity="warning")
+    def _clear_all_conversations(self) -> None:
+        """Worker thread: list all conversations and delete each one; the list refreshes as they are done."""
+        try:
+            conversations = self.storage.list_conversations()
+        except Exception as e:
+            self.log(f"Listing conversations failed: {e}")
+            return
+
+        def delete_all() -> None:
+            for conv in conversations:
+                self.delete_conversation(conv.id)
+            # self.notify(f"Cleared {len(conversations)} conversations", severity="warning")
+
+        self.call_from_thread(delete_all)
 
     def action_new_conversation(self) -> None:
         """Create a new conversation."""
+        self.detach_generation()
         self.current_conversation = Conversation(model=self.current_conversation.model)
         chat_view = self.query_one(ChatView)
         chat_view.clear_messages()
@@ -588,7 +1182,7 @@ class CmdAITerminalApp(App):
                 sidebar.update_model(selected_model)
 
                 # Save the selected model as last used
-                self.config.update_last_model(selected_model)
+                self.config.update_last_model(selected_model, writer=self.writer)
 
                 # self.notify(f"Switched to model: {selected_model}", severity="information")
             else:
@@ -596,7 +1190,12 @@ class CmdAITerminalApp(App):
                 # self.notify("Model selection cancelled")
 
         await self.push_screen(
-            ModelSelectorScreen(self.available_models, self.current_conversation.model),
+            ModelSelectorScreen(
+                self.available_models,
+                self.current_conversation.model,
+                self.model_details,
+                self.client.unavailable_models(self.available_models),
+            ),
             handle_model_selection
         )
 
@@ -1,12 +1,34 @@
 """Chat view component with markdown rendering."""
 from textual.app import ComposeResult
+from textual.binding import Binding
 from textual.containers import VerticalScroll
+from textual.message import Message as TextualMessage
 from textual.widgets import Static
 from rich.markdown import Markdown
 from rich.syntax import Syntax
 from datetime import datetime
 
 from ..models.message import Message
+from ..models.metrics import MessageMetrics
+from .markdown_stream import IncrementalMarkdown
+
+
+def message_markdown(message: Message) -> Markdown:
+    """Render a finished message with its header and status notes."""
+    if message.role == "user":
+        prefix = "You"
+    else:
+        model_info = f" ({message.model})" if message.model else ""
+        prefix = f"cmdAI{model_info}"
+
+    content = f"**{prefix}**\n\n{message.content}"
+    if message.truncated:
+        content += "\n\n_[stopped]_"
+    if message.error:
+        content += f"\n\n[Error: {message.error}]"
+    if message.metrics:
+        content += f"\n\n_{message.metrics.summary()}_"
+    return Markdown(content)
 
 
 class MessageWidget(Static):
@@ -23,16 +45,10 @@ class MessageWidget(Static):
         if self.message.role == "user":
             self.add_class("user-message")
             self.remove_class("assistant-message")
-            prefix = "You"
         else:
             self.add_class("assistant-message")
             self.remove_class("user-message")
-            model_info = f" ({self.message.model})" if self.message.model else ""
-            prefix = f"cmdAI{model_info}"
-
-        # Create markdown content
-        content = f"**{prefix}**\n\n{self.message.content}"
-        self.update(Markdown(content))
+        self.update(message_markdown(self.message))
 
 
 class StreamingMessageWidget(Static):
@@ -40,33 +56,72 @@ class StreamingMessageWidget(Static):
 
     def __init__(self, chat_view: "ChatView"):
         super().__init__()
-        self.chat_view = chat_view
+        # None once detached from the view, see detach()
+        self.chat_view: "ChatView | None" = chat_view
         self.add_class("assistant-message")
-        self.content_buffer = ""
+        self.markdown = IncrementalMarkdown(header="**cmdAI**")
         self.update("**cmdAI**\n\n_Thinking..._")
 
+    @property
+    def content_buffer(self) -> str:
+        """The text streamed so far."""
+        return self.markdown.text
+
     def append_content(self, text: str) -> None:
         """Append text to the streaming message."""
-        self.content_buffer += text
-        self.update(Markdown(f"**cmdAI**\n\n{self.content_buffer}"))
+        self.markdown.append(text)
+        if self.chat_view is None:
+            # Still collected for the finished message, but no longer shown
+            return
+        self.update(self.markdown)
         # Only auto-scroll if user is already at the bottom
         self.chat_view.scroll_to_bottom_if_near()
 
-    def finalize(self, model: str | None = None) -> Message:
-        """Finalize the streaming message and return as Message object."""
-        model_info = f" ({model})" if model else ""
-        self.update(Markdown(f"**cmdAI{model_info}**\n\n{self.content_buffer}"))
-        return Message(
+    def detach(self) -> None:
+        """Stop showing the stream, e.g. when another conversation is opened; its text is still collected."""
+        self.chat_view = None
+
+    def finalize(
+        self,
+        model: str | None = None,
+        truncated: bool = False,
+        metrics: MessageMetrics | None = None,
+        error: str | None = None,
+    ) -> Message:
+        """
+        Finalize the streaming message and return as Message object.
+
+        The finished message is rendered from its full text, exactly as it
+        looks when the conversation is loaded again.
+        """
+        message = Message(
             role="assistant",
             content=self.content_buffer,
             timestamp=datetime.now(),
             model=model,
+            truncated=truncated,
+            metrics=metrics,
+            error=error,
         )
+        self.update(message_markdown(message))
+        return message
 
 
 class ChatView(VerticalScroll):
     """Main chat view with message display."""
 
+    BINDINGS = [
+        Binding("escape", "cancel_generation", "Stop", show=True),
+        Binding("ctrl+c", "cancel_generation", "Stop", show=False),
+    ]
+
+    class CancelGeneration(TextualMessage):
+        """Message to request stopping the response being generated."""
+
+    def action_cancel_generation(self) -> None:
+        """Action to stop the response being generated."""
+        self.post_message(self.CancelGeneration())
+
     def compose(self) -> ComposeResult:
         """Compose the chat view."""
         yield Static("Start a conversation by typing a message below.", id="welcome-message")
@@ -111,6 +166,18 @@ class ChatView(VerticalScroll):
         except Exception:
             self.mount(Static("Start a conversation by typing a message below.", id="welcome-message"))
 
+    def scroll_to_message(self, index: int) -> None:
+        """Scroll a loaded message into view and highlight it, e.g. a search hit."""
+        widgets = list(self.query(MessageWidget))
+        if not 0 <= index < len(widgets):
+            return
+        for widget in self.query(".search-hit"):
+            widget.remove_class("search-hit")
+        widget = widgets[index]
+        widget.add_class("search-hit")
+        # Wait for the freshly mounted messages to be laid out
+        self.call_after_refresh(self.scroll_to_widget, widget, animate=False, top=True)
+
     def load_messages(self, messages: list[Message]) -> None:
         """Load a list of messages into the view."""
         self.clear_messages()
@@ -0,0 +1,182 @@
+"""Incremental markdown rendering for streamed text."""
+import re
+
+from rich.console import Console, ConsoleOptions, RenderResult
+from rich.markdown import Markdown
+from rich.segment import Segment
+
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# A fence indented under a list item belongs to the item
+INDENTED_FENCE_RE = re.compile(r"^[ \t]+(`{3,}|~{3,})")
+LIST_ITEM_RE = re.compile(r"^ {0,3}(?:[-+*]|\d{1,9}[.)])(?:\s|$)")
+
+
+class RenderedBlock:
+    """A closed markdown block, parsed once with its rendered lines cached per width."""
+
+    def __init__(self, markup: str):
+        self.markdown = Markdown(markup)
+        self._width: int | None = None
+        self._lines: list[list[Segment]] = []
+
+    @staticmethod
+    def _is_blank(line: list[Segment]) -> bool:
+        """Check whether a rendered line is empty spacing (not e.g. code block padding)."""
+        return all(
+            not segment.text.strip() and not (segment.style and segment.style.bgcolor)
+            for segment in line
+        )
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        if self._width != options.max_width:
+            lines = console.render_lines(self.markdown, options, pad=False)
+            # Spacing between blocks is added by the document, not each block
+            while lines and self._is_blank(lines[0]):
+                lines.pop(0)
+            while lines and self._is_blank(lines[-1]):
+                lines.pop()
+            self._lines = lines
+            self._width = options.max_width
+        for line in self._lines:
+            yield from line
+            yield Segment.line()
+
+
+class IncrementalMarkdown:
+    """
+    Markdown document built up from streamed text.
+
+    Incoming text is split into top-level blocks (paragraphs, lists, fenced
+    code, ...). A block that can no longer change is parsed and rendered once
+    and then reused; only the trailing open block is re-parsed as text
+    arrives, so the cost of each chunk does not grow with the whole message.
+    """
+
+    def __init__(self, header: str = ""):
+        self.header = RenderedBlock(header) if header else None
+        self._chunks: list[str] = []
+        self._closed: list[RenderedBlock] = []
+        self._open_lines: list[str] = []
+        self._partial: list[str] = []
+        self._fence: str | None = None
+        # Whether the open fence is part of a list item rather than a block of its own
+        self._fence_in_list = False
+        self._blank_pending = False
+        self._text: str | None = ""
+
+    @property
+    def text(self) -> str:
+        """The complete text received so far."""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
+    def append(self, text: str) -> None:
+        """Add streamed text, closing any blocks it completes."""
+        if not text:
+            return
+        self._chunks.append(text)
+        self._text = None
+
+        if "\n" not in text:
+            self._partial.append(text)
+            return
+
+        lines = text.split("\n")
+        lines[0] = "".join(self._partial) + lines[0]
+        last = lines.pop()
+        self._partial = [last] if last else []
+        for line in lines:
+            self._feed_line(line)
+
+    def _feed_line(self, line: str) -> None:
+        """Process one complete line of text."""
+        stripped = line.strip()
+
+        if self._fence:
+            self._open_lines.append(line)
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._fence = None
+                if not self._fence_in_list:
+                    self._close_block()
+            return
+
+        fence = INDENTED_FENCE_RE.match(line)
+        if fence and self._in_list_item(line):
+            if self._blank_pending:
+                self._blank_pending = False
+                self._open_lines.append("")
+            self._fence = fence.group(1)
+            self._fence_in_list = True
+            self._open_lines.append(line)
+            return
+
+        fence = FENCE_RE.match(line)
+        if fence:
+            self._close_block()
+            self._fence = fence.group(1)
+            self._fence_in_list = False
+            self._open_lines.append(line)
+            return
+
+        if not stripped:
+            if self._open_lines:
+                self._blank_pending = True
+            return
+
+        if self._blank_pending:
+            self._blank_pending = False
+            if self._continues_block(line):
+                self._open_lines.append("")
+            else:
+                self._close_block()
+        self._open_lines.append(line)
+
+    def _in_list_item(self, line: str) -> bool:
+        """Check whether an indented line is content of the open list's last item."""
+        if not self._open_lines or not LIST_ITEM_RE.match(self._open_lines[0]):
+            return False
+        indent = len(line.expandtabs(4)) - len(line.expandtabs(4).lstrip())
+        for previous in reversed(self._open_lines):
+            item = LIST_ITEM_RE.match(previous)
+            if item:
+                return indent >= len(item.group(0).rstrip()) + 1
+        return False
+
+    def _continues_block(self, line: str) -> bool:
+        """Check whether a line after a blank line still belongs to the open block."""
+        if not LIST_ITEM_RE.match(self._open_lines[0]):
+            return False
+        # Loose list items and indented item content keep the list open
+        return bool(LIST_ITEM_RE.match(line)) or line.startswith(("  ", "\t"))
+
+    def _close_block(self) -> None:
+        """Freeze the open block into a rendered block."""
+        self._blank_pending = False
+        if self._open_lines:
+            self._closed.append(RenderedBlock("\n".join(self._open_lines)))
+            self._open_lines = []
+
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        blocks: list = [self.header] if self.header else []
+        blocks.extend(self._closed)
+
+        open_lines = list(self._open_lines)
+        partial = "".join(self._partial)
+        if partial:
+            if self._blank_pending and not self._continues_block(partial):
+                # A new block has started; don't glue it onto the previous one
+                if open_lines:
+                    blocks.append(RenderedBlock("\n".join(open_lines).strip("\n")))
+                open_lines = []
+            elif self._blank_pending:
+                open_lines.append("")
+            open_lines.append(partial)
+        open_markup = "\n".join(open_lines).strip("\n")
+        if open_markup:
+            blocks.append(RenderedBlock(open_markup))
+
+        for i, block in enumerate(blocks):
+            if i:
+                yield Segment.line()
+            yield block
@@ -0,0 +1,51 @@
+"""Frame-rate-capped rendering of streamed text."""
+import asyncio
+from typing import Callable
+
+
+class RenderScheduler:
+    """
+    Batches streamed text and hands it to a render callback at a capped frame rate.
+
+    Chunks can arrive far faster than the terminal can usefully repaint. They
+    are accumulated and flushed at most ``max_fps`` times per second; call
+    ``flush()`` when the stream ends to render whatever is still pending.
+    """
+
+    def __init__(self, render: Callable[[str], None], max_fps: float = 30):
+        """Initialize the scheduler. A max_fps of 0 renders every chunk immediately."""
+        self.render = render
+        self.interval = 1 / max_fps if max_fps > 0 else 0.0
+        self.chunks_received = 0
+        self.frames_rendered = 0
+        self._pending: list[str] = []
+        self._handle: asyncio.TimerHandle | None = None
+        self._last_frame = float("-inf")
+
+    def push(self, text: str) -> None:
+        """Queue a chunk of text for the next frame."""
+        self.chunks_received += 1
+        self._pending.append(text)
+        if self._handle is not None:
+            return
+
+        loop = asyncio.get_running_loop()
+        delay = self._last_frame + self.interval - loop.time()
+        if delay <= 0:
+            self.flush()
+        else:
+            self._handle = loop.call_later(delay, self.flush)
+
+    def flush(self) -> None:
+        """Render all pending text now."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._pending:
+            return
+
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._last_frame = asyncio.get_running_loop().time()
+        self.frames_rendered += 1
+        self.render(text)
@@ -5,13 +5,13 @@ from textual.widgets import Button, Label, ListView, ListItem, Static
 from textual.binding import Binding
 from textual.message import Message
 
-from ..models.conversation import Conversation
+from ..models.conversation_summary import ConversationSummary
 
 
 class ConversationListItem(ListItem):
     """A list item representing a conversation."""
 
-    def __init__(self, conversation: Conversation):
+    def __init__(self, conversation: ConversationSummary):
         super().__init__()
         self.conversation = conversation
 
@@ -32,7 +32,7 @@ class Sidebar(Container):
     class SelectConversation(Message):
         """Message when a conversation is selected."""
 
-        def __init__(self, conversation: Conversation):
+        def __init__(self, conversation: ConversationSummary):
             super().__init__()
             self.conversation = conversation
 
@@ -42,7 +42,7 @@ class Sidebar(Container):
     class DeleteConversation(Message):
         """Message to request conversation deletion."""
 
-        def __init__(self, conversation: Conversation):
+        def __init__(self, conversation: ConversationSummary):
             super().__init__()
             self.conversation = conversation
 
@@ -80,7 +80,7 @@ class Sidebar(Container):
         if isinstance(event.item, ConversationListItem):
             self.selected_conversation = event.item.conversation
 
-    def update_conversations(self, conversations: list[Conversation]) -> None:
+    def update_conversations(self, conversations: list[ConversationSummary]) -> None:
         """Update the conversation list."""
         list_view = self.query_one("#conversation-list", ListView)
         list_view.clear()
@@ -4,6 +4,9 @@ from pathlib import Path
 from typing import Any
 import yaml
 
+from .storage.atomic import atomic_write
+from .storage.writer import BackgroundWriter
+
 
 class Config:
     """Application configuration manager."""
@@ -65,6 +68,14 @@ class Config:
         """Get Ollama API base URL."""
         return self.get("api.ollama.base_url", "http://localhost:11434")
 
+    @property
+    def ollama_endpoints(self) -> list[str]:
+        """Get the Ollama servers to balance requests between (defaults to base_url)."""
+        endpoints = self.get("api.ollama.endpoints")
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        return [str(e) for e in endpoints or [] if e] or [self.ollama_base_url]
+
     @property
     def ollama_timeout(self) -> int:
         """Get Ollama API timeout."""
@@ -80,6 +91,59 @@ class Config:
         """Get OpenAI API timeout."""
         return self.get("api.openai.timeout", 60)
 
+    @property
+    def openai_http2(self) -> bool:
+        """Whether to negotiate HTTP/2 with the OpenAI endpoint."""
+        return bool(self.get("api.openai.http2", False))
+
+    def discovery_timeout(self, provider: str) -> float:
+        """Get the model discovery deadline for a provider, separate from the chat timeout."""
+        defaults = {"ollama": 3.0, "openai": 5.0}
+        return self.get(f"api.{provider}.discovery_timeout", defaults.get(provider, 5.0))
+
+    def connect_timeout(self, provider: str) -> float:
+        """Get the connection timeout for a provider."""
+        return self.get(f"api.{provider}.connect_timeout", 5.0)
+
+    def first_token_timeout(self, provider: str) -> float | None:
+        """Get the longest wait for a provider's first streamed token (0 = no limit)."""
+        defaults = {"ollama": 120.0, "openai": 60.0}
+        return self.get(f"api.{provider}.first_token_timeout", defaults.get(provider, 60.0)) or None
+
+    @property
+    def retry_settings(self) -> dict[str, Any]:
+        """Get retry/backoff settings for provider requests."""
+        return {
+            "max_retries": self.get("api.retry.max_retries", 2),
+            "backoff_base": self.get("api.retry.backoff_base", 0.5),
+            "backoff_max": self.get("api.retry.backoff_max", 8.0),
+        }
+
+    @property
+    def breaker_settings(self) -> dict[str, Any]:
+        """Get circuit breaker settings for unreachable providers."""
+        return {
+            "failure_threshold": self.get("api.circuit_breaker.failure_threshold", 3),
+            "reset_timeout": self.get("api.circuit_breaker.reset_timeout", 30.0),
+        }
+
+    @property
+    def hedge_settings(self) -> dict[str, Any]:
+        """Get settings for hedging slow streams on a second endpoint."""
+        return {
+            "hedging": self.get("api.hedging.enabled", False),
+            "hedge_delay": self.get("api.hedging.delay"),
+            "hedge_percentile": self.get("api.hedging.percentile", 0.95),
+        }
+
+    def pool_limits(self, provider: str) -> dict[str, Any]:
+        """Get HTTP connection pool limits for a provider ("ollama" or "openai")."""
+        return {
+            "max_connections": self.get(f"api.{provider}.max_connections", 10),
+            "max_keepalive_connections": self.get(f"api.{provider}.max_keepalive_connections", 5),
+            "keepalive_expiry": self.get(f"api.{provider}.keepalive_expiry", 30.0),
+        }
+
     @property
     def has_openai_key(self) -> bool:
         """Check if OpenAI API key is configured."""
@@ -92,6 +156,54 @@ class Config:
         path = self.get("storage.conversations_dir", "~/.cmdai-terminal/conversations")
         return Path(os.path.expanduser(path))
 
+    @property
+    def storage_backend(self) -> str:
+        """Get the conversation storage backend ("json" or "sqlite")."""
+        return str(self.get("storage.backend", "json")).lower()
+
+    @property
+    def database_path(self) -> Path:
+        """Get the SQLite database path used by the sqlite storage backend."""
+        path = self.get("storage.database", "~/.cmdai-terminal/conversations.db")
+        return Path(os.path.expanduser(path))
+
+    @property
+    def storage_fsync(self) -> bool:
+        """Whether every storage write is flushed to disk before it counts as done."""
+        return bool(self.get("storage.fsync", False))
+
+    @property
+    def cold_after_days(self) -> float | None:
+        """Get after how many days untouched conversations are packed into compressed cold storage (None = never)."""
+        return self.get("storage.cold_after_days") or None
+
+    @property
+    def blob_threshold(self) -> int | None:
+        """Get the message length (characters) from which bodies are stored once by content hash (None = never)."""
+        kb = self.get("storage.blob_threshold_kb", 16)
+        return int(kb * 1024) if kb else None
+
+    @property
+    def conversation_cache_size(self) -> int:
+        """Get how many opened conversations are kept in memory."""
+        return self.get("storage.cache.conversations", 8)
+
+    @property
+    def conversation_cache_bytes(self) -> int:
+        """Get the memory budget (bytes of message content) for opened conversations."""
+        return int(self.get("storage.cache.memory_mb", 32) * 1024 * 1024)
+
+    @property
+    def model_cache_path(self) -> Path:
+        """Get model catalog cache file path."""
+        path = self.get("storage.model_cache", "~/.cmdai-terminal/models.json")
+        return Path(os.path.expanduser(path))
+
+    @property
+    def model_cache_ttl(self) -> float:
+        """Get how long (seconds) a cached model catalog is served before refreshing."""
+        return self.get("storage.model_cache_ttl", 3600)
+
     @property
     def default_model(self) -> str:
         """Get default model."""
@@ -102,6 +214,11 @@ class Config:
         """Get sidebar width."""
         return self.get("ui.sidebar_width", 35)
 
+    @property
+    def max_fps(self) -> float:
+        """Get the maximum repaint rate while streaming (0 = every chunk)."""
+        return self.get("ui.max_fps", 30)
+
     def set(self, key: str, value: Any) -> None:
         """Set configuration value using dot notation."""
         keys = key.split(".")
@@ -116,18 +233,33 @@ class Config:
         # Set the value
         data[keys[-1]] = value
 
+    def dump(self) -> str:
+        """Render the configuration as YAML."""
+        return yaml.safe_dump(self.data, default_flow_style=False, sort_keys=False)
+
+    def write(self, text: str) -> None:
+        """Atomically replace the config file with already rendered YAML."""
+        atomic_write(self.config_path, text, fsync=self.storage_fsync)
+
     def save(self) -> None:
         """Save configuration to file."""
-        # Create directory if it doesn't exist
-        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        self.write(self.dump())
 
-        with open(self.config_path, "w") as f:
-            yaml.safe_dump(self.data, f, default_flow_style=False, sort_keys=False)
+    def update_last_model(self, model: str, writer: BackgroundWriter | None = None) -> None:
+        """
+        Update the last used model and save config.
 
-    def update_last_model(self, model: str) -> None:
-        """Update the last used model and save config."""
+        Args:
+            model: Model name
+            writer: Save on this background writer instead of blocking; the
+                config is rendered now, so later changes don't leak into it
+        """
         self.set("last_model", model)
-        self.save()
+        if writer is None:
+            self.save()
+            return
+        text = self.dump()
+        writer.submit(("config", str(self.config_path)), lambda: self.write(text))
 
     @property
     def last_model(self) -> str | None:
@@ -4,10 +4,11 @@ from datetime import datetime
 from typing import List
 import uuid
 
-from .message import Message
+from .lazy_messages import LazyMessages
+from .message import Message, intern_str
 
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     """Represents a conversation with messages."""
 
@@ -27,25 +28,41 @@ class Conversation:
         if len(self.messages) == 1 and message.role == "user" and self.title == "New Conversation":
             self.title = message.content[:50] + ("..." if len(message.content) > 50 else "")
 
-    def to_dict(self) -> dict:
-        """Convert conversation to dictionary for serialization."""
+    def to_header_dict(self) -> dict:
+        """Convert everything but the messages to a dictionary."""
         return {
             "id": self.id,
             "title": self.title,
-            "messages": [msg.to_dict() for msg in self.messages],
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
             "model": self.model,
         }
 
+    def to_dict(self) -> dict:
+        """Convert conversation to dictionary for serialization."""
+        return {
+            **self.to_header_dict(),
+            "messages": [msg.to_dict() for msg in self.messages],
+        }
+
     @classmethod
-    def from_dict(cls, data: dict) -> "Conversation":
-        """Create conversation from dictionary."""
+    def from_dict(cls, data: dict, lazy: bool = False) -> "Conversation":
+        """
+        Create conversation from dictionary.
+
+        Args:
+            data: Dictionary in the format of ``to_dict``
+            lazy: Decode only the header now and the messages on first
+                access (see ``LazyMessages``)
+        """
         return cls(
             id=data["id"],
             title=data["title"],
-            messages=[Message.from_dict(msg) for msg in data["messages"]],
+            messages=(
+                LazyMessages(data["messages"]) if lazy
+                else [Message.from_dict(msg) for msg in data["messages"]]
+            ),
             created_at=datetime.fromisoformat(data["created_at"]),
             updated_at=datetime.fromisoformat(data["updated_at"]),
-            model=data.get("model", "llama2"),
+            model=intern_str(data.get("model", "llama2")),
         )
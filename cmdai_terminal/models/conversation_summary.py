@@ -0,0 +1,56 @@
+"""Conversation metadata data model."""
+from dataclasses import dataclass
+from datetime import datetime
+
+from .conversation import Conversation
+
+
+@dataclass
+class ConversationSummary:
+    """Metadata of a stored conversation, without its messages."""
+
+    id: str
+    title: str
+    model: str
+    created_at: datetime
+    updated_at: datetime
+    message_count: int = 0
+    size: int = 0
+
+    @classmethod
+    def from_conversation(cls, conversation: Conversation, size: int = 0) -> "ConversationSummary":
+        """Summarize a conversation. size is the number of bytes it takes on disk."""
+        return cls(
+            id=conversation.id,
+            title=conversation.title,
+            model=conversation.model,
+            created_at=conversation.created_at,
+            updated_at=conversation.updated_at,
+            message_count=len(conversation.messages),
+            size=size,
+        )
+
+    def to_dict(self) -> dict:
+        """Convert summary to dictionary for serialization."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "model": self.model,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "message_count": self.message_count,
+            "size": self.size,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationSummary":
+        """Create summary from dictionary."""
+        return cls(
+            id=data["id"],
+            title=data["title"],
+            model=data.get("model", "llama2"),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            message_count=data.get("message_count", 0),
+            size=data.get("size", 0),
+        )
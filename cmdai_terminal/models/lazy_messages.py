@@ -0,0 +1,87 @@
+"""Message list that decodes stored records on first use."""
+from collections.abc import MutableSequence
+from typing import Iterable, Iterator, List
+
+from .message import Message
+
+
+class LazyMessages(MutableSequence):
+    """
+    A list of messages that keeps their stored dictionaries until first use.
+
+    Loading a conversation only decodes its header; building a ``Message``
+    per record (and parsing its timestamp) is deferred until the messages
+    are actually read. ``len()`` works without decoding, so summaries and
+    counts never pay for message bodies. Any other operation decodes all
+    messages once, after which this behaves like a plain list.
+
+    This wraps a list instead of subclassing it: code that reads a list
+    through its C internals (``[] + messages``, ``copy``, ``pickle``)
+    would see an undecoded list as empty or lose its records.
+    """
+
+    __slots__ = ("_records", "_messages")
+
+    def __init__(self, records: List[dict]):
+        """Wrap the stored message dictionaries (in the format of ``Message.to_dict``)."""
+        self._records: List[dict] | None = records
+        self._messages: List[Message] = []
+
+    @property
+    def decoded(self) -> bool:
+        """Whether the messages have been decoded."""
+        return self._records is None
+
+    def _decoded(self) -> List[Message]:
+        """Decode all records into messages, once, and return them."""
+        if self._records is not None:
+            records, self._records = self._records, None
+            self._messages = [Message.from_dict(record) for record in records]
+        return self._messages
+
+    def iter_records(self) -> Iterator[dict]:
+        """Iterate the messages as dictionaries, without decoding them if they aren't yet."""
+        if self._records is not None:
+            yield from self._records
+        else:
+            for message in self._messages:
+                yield message.to_dict()
+
+    def __len__(self) -> int:
+        if self._records is not None:
+            return len(self._records)
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        return self._decoded()[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._decoded()[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._decoded()[index]
+
+    def insert(self, index: int, value: Message) -> None:
+        self._decoded().insert(index, value)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._decoded())
+
+    def extend(self, values: Iterable[Message]) -> None:
+        self._decoded().extend(values)
+
+    def __add__(self, other: List[Message]) -> List[Message]:
+        return self._decoded() + list(other)
+
+    def __radd__(self, other: List[Message]) -> List[Message]:
+        return list(other) + self._decoded()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyMessages):
+            other = other._decoded()
+        if not isinstance(other, list):
+            return NotImplemented
+        return self._decoded() == other
+
+    def __repr__(self) -> str:
+        return repr(self._decoded())
@@ -1,17 +1,63 @@
 """Message data model."""
-from dataclasses import dataclass
+import sys
 from datetime import datetime
 from typing import Literal
 
+from .metrics import MessageMetrics
+
+
+def intern_str(value: str | None) -> str | None:
+    """Intern a short, frequently repeated string (role or model name) so all copies share one object."""
+    return sys.intern(value) if value is not None else None
+
 
-@dataclass
 class Message:
-    """Represents a single message in a conversation."""
+    """
+    Represents a single message in a conversation.
+
+    Messages are the bulk of what is kept in memory, so they use
+    ``__slots__``, share interned role and model strings, and store their
+    timestamp as epoch seconds; ``timestamp`` converts to a ``datetime``
+    when it is read.
+    """
+
+    __slots__ = ("role", "content", "epoch", "model", "truncated", "metrics", "error")
+
+    def __init__(
+        self,
+        role: Literal["user", "assistant", "system"],
+        content: str,
+        timestamp: datetime | float,
+        model: str | None = None,
+        truncated: bool = False,
+        metrics: MessageMetrics | None = None,
+        error: str | None = None,
+    ):
+        self.role = intern_str(role)
+        self.content = content
+        self.epoch = timestamp if isinstance(timestamp, (int, float)) else timestamp.timestamp()
+        self.model = intern_str(model)
+        self.truncated = truncated
+        self.metrics = metrics
+        self.error = error
+
+    @property
+    def timestamp(self) -> datetime:
+        """Get the time the message was created (local time)."""
+        return datetime.fromtimestamp(self.epoch)
+
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self.epoch = value.timestamp()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Message):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
 
-    role: Literal["user", "assistant", "system"]
-    content: str
-    timestamp: datetime
-    model: str | None = None
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Message({fields})"
 
     def to_dict(self) -> dict:
         """Convert message to dictionary for serialization."""
@@ -20,6 +66,9 @@ class Message:
             "content": self.content,
             "timestamp": self.timestamp.isoformat(),
             "model": self.model,
+            "truncated": self.truncated,
+            "metrics": self.metrics.to_dict() if self.metrics else None,
+            "error": self.error,
         }
 
     @classmethod
@@ -30,4 +79,7 @@ class Message:
             content=data["content"],
             timestamp=datetime.fromisoformat(data["timestamp"]),
             model=data.get("model"),
+            truncated=data.get("truncated", False),
+            metrics=MessageMetrics.from_dict(data["metrics"]) if data.get("metrics") else None,
+            error=data.get("error"),
         )
@@ -0,0 +1,98 @@
+"""Streaming performance metrics data model."""
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List
+
+
+def percentile(values: List[float], q: float) -> float | None:
+    """Get the q-th percentile (0-1) of a list of values, nearest-rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass(slots=True)
+class MessageMetrics:
+    """Timing and token usage of a streamed assistant message. Times are in seconds."""
+
+    ttft: float | None = None
+    duration: float | None = None
+    itl_p50: float | None = None
+    itl_p90: float | None = None
+    itl_p99: float | None = None
+    chunks: int = 0
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    tokens_per_second: float | None = None
+    endpoint: str | None = None
+
+    @classmethod
+    def from_stream(
+        cls,
+        started_at: float | None,
+        first_chunk_at: float | None,
+        finished_at: float | None,
+        gaps: List[float],
+        chunks: int,
+        usage: Dict[str, Any],
+    ) -> "MessageMetrics":
+        """
+        Build metrics from stream timings and the usage reported by the provider.
+
+        Args:
+            started_at: When the request was sent
+            first_chunk_at: When the first chunk arrived
+            finished_at: When the stream ended
+            gaps: Times between consecutive chunks (inter-token latency)
+            chunks: Number of chunks received
+            usage: Token counts from the provider ('prompt_tokens',
+                'completion_tokens', optionally 'eval_duration' and 'endpoint')
+        """
+        completion_tokens = usage.get("completion_tokens")
+        tokens_per_second = None
+        # Prefer the server's own generation time, which excludes network and queueing
+        generation_time = usage.get("eval_duration")
+        if not generation_time and first_chunk_at is not None and finished_at is not None:
+            generation_time = finished_at - first_chunk_at
+        if completion_tokens and generation_time:
+            tokens_per_second = completion_tokens / generation_time
+
+        return cls(
+            ttft=first_chunk_at - started_at if first_chunk_at is not None and started_at is not None else None,
+            duration=finished_at - started_at if finished_at is not None and started_at is not None else None,
+            itl_p50=percentile(gaps, 0.5),
+            itl_p90=percentile(gaps, 0.9),
+            itl_p99=percentile(gaps, 0.99),
+            chunks=chunks,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=completion_tokens,
+            tokens_per_second=tokens_per_second,
+            endpoint=usage.get("endpoint"),
+        )
+
+    def summary(self) -> str:
+        """Compact one-line summary for display under a message."""
+        parts = []
+        if self.ttft is not None:
+            parts.append(f"TTFT {self.ttft:.2f}s")
+        if self.tokens_per_second:
+            parts.append(f"{self.tokens_per_second:.1f} tok/s")
+        if self.completion_tokens is not None:
+            parts.append(f"{self.completion_tokens} tokens")
+        elif self.chunks:
+            parts.append(f"{self.chunks} chunks")
+        if self.itl_p90 is not None:
+            parts.append(f"ITL p50/p90 {self.itl_p50 * 1000:.0f}/{self.itl_p90 * 1000:.0f}ms")
+        if self.duration is not None:
+            parts.append(f"{self.duration:.1f}s")
+        return " · ".join(parts)
+
+    def to_dict(self) -> dict:
+        """Convert metrics to dictionary for serialization."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MessageMetrics":
+        """Create metrics from dictionary, ignoring unknown keys."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
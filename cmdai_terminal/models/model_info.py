@@ -0,0 +1,54 @@
+"""Model catalog entry data model."""
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ModelInfo:
+    """Describes a model offered by a provider."""
+
+    name: str
+    provider: str
+    size: int | None = None
+    family: str | None = None
+    parameter_size: str | None = None
+    quantization: str | None = None
+    endpoints: list[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        """Short human-readable summary of the model metadata."""
+        parts = [p for p in (self.family, self.parameter_size, self.quantization) if p]
+        if self.size:
+            size = float(self.size)
+            for unit in ("B", "KB", "MB", "GB", "TB"):
+                if size < 1024 or unit == "TB":
+                    break
+                size /= 1024
+            parts.append(f"{size:.1f} {unit}")
+        if len(self.endpoints) > 1:
+            parts.append(f"{len(self.endpoints)} hosts")
+        return " · ".join(parts)
+
+    def to_dict(self) -> dict:
+        """Convert model info to dictionary for serialization."""
+        return {
+            "name": self.name,
+            "provider": self.provider,
+            "size": self.size,
+            "family": self.family,
+            "parameter_size": self.parameter_size,
+            "quantization": self.quantization,
+            "endpoints": self.endpoints,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelInfo":
+        """Create model info from dictionary."""
+        return cls(
+            name=data["name"],
+            provider=data["provider"],
+            size=data.get("size"),
+            family=data.get("family"),
+            parameter_size=data.get("parameter_size"),
+            quantization=data.get("quantization"),
+            endpoints=list(data.get("endpoints") or []),
+        )
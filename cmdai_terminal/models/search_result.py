@@ -0,0 +1,14 @@
+"""Search result data model."""
+from dataclasses import dataclass
+
+
+@dataclass
+class SearchResult:
+    """A message that matched a search query."""
+
+    conversation_id: str
+    title: str
+    message_index: int
+    role: str
+    snippet: str
+    score: float = 0.0
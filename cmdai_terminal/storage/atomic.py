@@ -0,0 +1,47 @@
+"""Crash-safe file writes."""
+import os
+import tempfile
+from pathlib import Path
+
+
+def fsync_dir(path: Path) -> None:
+    """Flush a directory entry change (e.g. a rename) to disk, where the platform supports it."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: Path, data: str | bytes, fsync: bool = False) -> None:
+    """
+    Replace a file's content atomically via a temporary file and rename.
+
+    Readers see either the old or the new content, never a partial write.
+    With ``fsync`` the data and the rename are also flushed to disk before
+    returning, so they survive a power loss, at the cost of a slower write.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temporary file, so concurrent writers of the same file
+    # (threads or processes) never write into or rename each other's
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with open(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_dir(path.parent)
@@ -0,0 +1,74 @@
+"""Selection of the conversation storage backend."""
+from itertools import islice
+from pathlib import Path
+
+from .history import ConversationStorage
+from .sqlite_storage import SQLiteConversationStorage
+
+BACKENDS = ("json", "sqlite")
+
+
+def migrate_directory(
+    source: ConversationStorage,
+    target: SQLiteConversationStorage,
+    batch_size: int = 200,
+) -> int:
+    """
+    Copy every conversation of a JSON storage directory into a SQLite database.
+
+    Conversations are streamed: only one batch is held in memory and each
+    batch is written in one transaction. Already migrated conversations are
+    brought up to date, so the migration can safely be re-run.
+
+    Returns:
+        The number of conversations copied
+    """
+    conversations = source.iter_conversations()
+    count = 0
+    while batch := list(islice(conversations, batch_size)):
+        count += target.save_conversations(batch)
+    return count
+
+
+def open_storage(
+    backend: str,
+    conversations_dir: Path,
+    database_path: Path,
+    fsync: bool = False,
+    cold_after_days: float | None = None,
+    blob_threshold: int | None = 16 * 1024,
+) -> ConversationStorage | SQLiteConversationStorage:
+    """
+    Open the configured conversation storage.
+
+    The first time the SQLite backend is opened, conversations from the JSON
+    directory are migrated into it once. ``fsync`` makes every save durable
+    against power loss before it returns. ``cold_after_days`` sets when the
+    JSON backend packs untouched conversations (see ``archive_cold``), and
+    ``blob_threshold`` from what length it stores message bodies once by
+    content hash.
+
+    Raises:
+        ValueError: For an unknown backend name
+    """
+    if backend == "json":
+        return ConversationStorage(
+            conversations_dir,
+            fsync=fsync,
+            cold_after_days=cold_after_days,
+            blob_threshold=blob_threshold,
+        )
+    if backend != "sqlite":
+        raise ValueError(f"Unknown storage backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+    storage = SQLiteConversationStorage(database_path, fsync=fsync)
+    if storage.get_meta("migrated_from") is None:
+        if conversations_dir.is_dir():
+            # Read it as it is; resharding is left to the JSON backend
+            source = ConversationStorage(conversations_dir, migrate_layout=False)
+            try:
+                migrate_directory(source, storage)
+            finally:
+                source.close()
+        storage.set_meta("migrated_from", str(conversations_dir))
+    return storage
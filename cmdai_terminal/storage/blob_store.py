@@ -0,0 +1,271 @@
+"""Content-addressed store for large message bodies."""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from ..models.message import Message
+from .atomic import atomic_write
+
+
+class BlobStore:
+    """
+    Stores large message bodies once, by SHA-256, and counts their references.
+
+    Message bodies of at least ``threshold`` characters are written to
+    ``<directory>/<first 2 hex digits>/<hash>`` and conversations reference
+    them by hash, so a log file pasted into many conversations is stored
+    once. ``refs.json`` records which blobs each conversation references;
+    a blob's reference count is the number of conversations referencing
+    it, and it is deleted when that drops to zero.
+
+    References are recorded before the conversation that uses them is
+    written, so a crash can only leave a blob referenced too long, never
+    a conversation pointing at a deleted blob. ``collect_garbage`` removes
+    blobs left without any reference, e.g. after such a crash.
+
+    Several processes may share the store. Before the reference table is
+    changed or garbage is collected, ``reload()`` takes over what another
+    process wrote to ``refs.json``, so neither overwrites the other's
+    references or deletes blobs only the other one uses. A blob is
+    deleted only if the table still leaves it unreferenced after being
+    reloaded, and ``store`` writes a blob again if another process deleted
+    it before the new reference was recorded.
+    """
+
+    VERSION = 1
+    # Decoded blobs kept in memory, so a body pasted into several messages is read once
+    CACHE_SIZE = 32
+
+    def __init__(self, directory: Path, threshold: int = 16 * 1024, fsync: bool = False):
+        """
+        Initialize the store and load its reference table.
+
+        Args:
+            directory: Directory holding the blobs and refs.json
+            threshold: Minimum body length (characters) stored as a blob
+            fsync: Flush blobs and the reference table to disk before returning
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.fsync = fsync
+        self.refs_path = directory / "refs.json"
+        # conversation id -> hashes of the blobs it references
+        self.owners: Dict[str, List[str]] = {}
+        self.refcounts: Dict[str, int] = {}
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        # (mtime_ns, size) of refs.json when this store last read or wrote it
+        self._file_stat: Tuple[int, int] | None = None
+        self._load()
+
+    def _stat_file(self) -> Tuple[int, int] | None:
+        """Get refs.json's (mtime_ns, size), or None if it doesn't exist."""
+        try:
+            stat = os.stat(self.refs_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        """Load the reference table, ignoring a missing or corrupted file."""
+        self._file_stat = self._stat_file()
+        try:
+            with open(self.refs_path) as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.owners = {key: list(hashes) for key, hashes in data["owners"].items()}
+            else:
+                self.owners = {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            self.owners = {}
+        self.refcounts = {}
+        for hashes in self.owners.values():
+            for digest in hashes:
+                self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+
+    def reload(self) -> bool:
+        """
+        Take over the reference table if another process wrote it since this store last read or wrote it.
+
+        Every change made here is saved right away, so the file's table
+        replaces the one in memory.
+
+        Returns:
+            Whether the file had changed
+        """
+        file_stat = self._stat_file()
+        if file_stat == self._file_stat:
+            return False
+        self._load()
+        return True
+
+    def _save(self) -> None:
+        """Write the reference table atomically."""
+        atomic_write(self.refs_path, json.dumps({
+            "version": self.VERSION,
+            "owners": self.owners,
+        }), fsync=self.fsync)
+        self._file_stat = self._stat_file()
+
+    def _path(self, digest: str) -> Path:
+        """Get the file of a blob."""
+        return self.directory / digest[:2] / digest
+
+    def _write(self, content: str) -> str:
+        """Write a blob unless it already exists, returning its hash."""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        try:
+            # Renew an existing blob, so another process's garbage
+            # collection keeps it until the reference is recorded
+            os.utime(path)
+        except OSError:
+            atomic_write(path, data, fsync=self.fsync)
+        return digest
+
+    def store(
+        self,
+        conversation_id: str,
+        messages: Sequence[Message],
+        start: int = 0,
+        replace: bool = False,
+    ) -> Dict[int, str]:
+        """
+        Write the large bodies among a conversation's messages and record the references.
+
+        Args:
+            conversation_id: Conversation the messages belong to
+            messages: All of the conversation's messages
+            start: First message to store; earlier ones were stored before
+            replace: The conversation is being rewritten from ``start`` = 0,
+                so references it no longer has are released
+
+        Returns:
+            Hash of each stored body, by message index
+        """
+        stored = {}
+        contents = {}
+        for position in range(start, len(messages)):
+            content = messages[position].content
+            if self.threshold and len(content) >= self.threshold:
+                stored[position] = self._write(content)
+                contents[stored[position]] = content
+
+        self.reload()
+        old = set(self.owners.get(conversation_id, ()))
+        new = set(stored.values()) if replace else old | set(stored.values())
+        if new != old:
+            for digest in new - old:
+                self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+            if new:
+                self.owners[conversation_id] = sorted(new)
+            else:
+                self.owners.pop(conversation_id, None)
+            self._save()
+            self._release(old - new)
+            for digest in new - old:
+                path = self._path(digest)
+                if not path.exists():
+                    # Another process released its last reference between
+                    # our write and our reference being recorded
+                    atomic_write(path, contents[digest].encode("utf-8"), fsync=self.fsync)
+        return stored
+
+    def get(self, digest: str) -> str | None:
+        """Read a blob, or return None if it is missing."""
+        content = self._cache.get(digest)
+        if content is not None:
+            self._cache.move_to_end(digest)
+            return content
+        try:
+            content = self._path(digest).read_bytes().decode("utf-8")
+        except OSError:
+            return None
+        self._cache[digest] = content
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return content
+
+    def release(self, conversation_id: str) -> None:
+        """Drop a deleted conversation's references, deleting blobs nothing references anymore."""
+        self.reload()
+        hashes = self.owners.pop(conversation_id, None)
+        if hashes:
+            self._save()
+            self._release(set(hashes))
+
+    def _release(self, hashes: set) -> None:
+        """Decrement reference counts and delete unreferenced blobs."""
+        for digest in hashes:
+            count = self.refcounts.get(digest, 0) - 1
+            if count > 0:
+                self.refcounts[digest] = count
+            else:
+                self.refcounts.pop(digest, None)
+        # Another process may have referenced one of them since our table
+        # was saved; its reference is in the file
+        self.reload()
+        for digest in hashes:
+            if digest not in self.refcounts:
+                self._cache.pop(digest, None)
+                self._path(digest).unlink(missing_ok=True)
+
+    def find_garbage(self, grace: float = 3600) -> List[Path]:
+        """
+        List blob files that look unreferenced and are older than ``grace`` seconds.
+
+        Only the directory is read and reference counts are looked up one
+        at a time, so this may run without the lock that serializes the
+        store's other calls; ``delete_garbage`` confirms each candidate.
+        """
+        if not self.directory.is_dir():
+            return []
+        cutoff = time.time() - grace
+        found = []
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as blobs:
+                    for blob in blobs:
+                        if blob.name in self.refcounts or blob.stat().st_mtime > cutoff:
+                            continue
+                        found.append(Path(blob.path))
+        return found
+
+    def delete_garbage(self, paths: Sequence[Path], grace: float = 3600) -> int:
+        """
+        Delete blobs found by ``find_garbage`` that are still unreferenced and old.
+
+        Returns:
+            The number of blobs deleted
+        """
+        self.reload()
+        cutoff = time.time() - grace
+        deleted = 0
+        for path in paths:
+            try:
+                if path.name in self.refcounts or path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+            deleted += 1
+        return deleted
+
+    def collect_garbage(self, grace: float = 3600) -> int:
+        """
+        Delete blob files that no conversation references.
+
+        Args:
+            grace: Keep unreferenced blobs younger than this (seconds),
+                which another process may be about to reference
+
+        Returns:
+            The number of blobs deleted
+        """
+        return self.delete_garbage(self.find_garbage(grace), grace)
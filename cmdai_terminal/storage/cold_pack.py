@@ -0,0 +1,305 @@
+"""Compressed pack file for conversations that are no longer touched."""
+import json
+import mmap
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from .atomic import atomic_write, fsync_dir
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    """Compress data with "zstd" or "gzip" (zlib stream)."""
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == "gzip":
+        return zlib.compress(data, 6)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """
+    Decompress data written by ``compress``.
+
+    Raises:
+        ValueError: For an unknown codec, or zstd data without zstandard installed
+    """
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd-compressed data needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+class ColdPack:
+    """
+    Append-only pack of compressed blobs, addressed through an offset index.
+
+    Each conversation is stored as one compressed blob appended to the pack
+    file; a small JSON index maps its id to ``(offset, length, codec)``.
+    Reading maps the pack with mmap, so loading a conversation costs one
+    slice and one decompress. Blobs are compressed with zstd when the
+    zstandard package is installed, with zlib otherwise; each entry records
+    its codec, so packs written with either remain readable.
+
+    Replaced or removed blobs stay in the file as garbage until more than
+    half of it is garbage, at which point the live blobs are copied into a
+    new pack file (the next generation, e.g. 'conversations.cold.1.pack').
+    The index switches to it in one atomic write, so a crash at any point
+    leaves a consistent pack and index.
+
+    Several processes may share the pack. Before the index is changed or
+    written, ``reload()`` takes over what another process wrote to it,
+    keeping the changes made here since the last save, and keys missing
+    from the index are looked up again in a freshly read one. Blobs
+    appended but not yet saved when another process compacts the pack are
+    dropped from the index, so callers must check that a key is in the
+    pack after ``save_index`` before deleting its source.
+    """
+
+    VERSION = 1
+    # Don't bother compacting packs with less garbage than this (bytes)
+    MIN_COMPACT_GARBAGE = 1024 * 1024
+
+    def __init__(self, path: Path, index_path: Path, fsync: bool = False):
+        """
+        Initialize the pack and load its index.
+
+        Args:
+            path: Pack file name; the generation number is inserted before
+                its suffix
+            index_path: Offset index file
+            fsync: Flush appended blobs and the index to disk before returning
+        """
+        self.base_path = path
+        self.index_path = index_path
+        self.fsync = fsync
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self.entries: Dict[str, dict] = {}
+        self.garbage = 0
+        self.generation = 0
+        self._map: mmap.mmap | None = None
+        self._file = None
+        # (mtime_ns, size) of the index file when this pack last read or wrote it
+        self._file_stat: Tuple[int, int] | None = None
+        # key -> entry put (None: removed) since the index was last saved
+        self._changed: Dict[str, dict | None] = {}
+        # Garbage added since the index was last saved (bytes)
+        self._new_garbage = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Load the offset index, ignoring a missing or corrupted file."""
+        self._file_stat = self._stat_file()
+        self.entries, self.garbage, self.generation = self._read_file()
+
+    def _stat_file(self) -> Tuple[int, int] | None:
+        """Get the index file's (mtime_ns, size), or None if it doesn't exist."""
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> Tuple[Dict[str, dict], int, int]:
+        """Read (entries, garbage, generation) from the index file; empty for a missing or corrupted one."""
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                return dict(data["entries"]), data.get("garbage", 0), data.get("generation", 0)
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return {}, 0, 0
+
+    def reload(self) -> bool:
+        """
+        Take over the index another process wrote since this pack last read or wrote it.
+
+        Entries put or removed here since the last save are kept, except
+        blobs appended to a pack generation that was compacted meanwhile.
+
+        Returns:
+            Whether the file had changed
+        """
+        file_stat = self._stat_file()
+        if file_stat is None or file_stat == self._file_stat:
+            return False
+        entries, garbage, generation = self._read_file()
+        self._file_stat = file_stat
+        if generation != self.generation:
+            # Compacted elsewhere: what was appended here went into the old file
+            self._changed = {key: entry for key, entry in self._changed.items() if entry is None}
+            self._new_garbage = 0
+            self.close()
+        for key, entry in self._changed.items():
+            if entry is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = entry
+        self.entries = entries
+        self.garbage = garbage + self._new_garbage
+        self.generation = generation
+        return True
+
+    def save_index(self) -> None:
+        """Write the offset index atomically, first taking over what another process wrote to it."""
+        self.reload()
+        self._write_index()
+
+    def _write_index(self) -> None:
+        """Write the offset index as it is in memory."""
+        atomic_write(self.index_path, json.dumps({
+            "version": self.VERSION,
+            "generation": self.generation,
+            "entries": self.entries,
+            "garbage": self.garbage,
+        }), fsync=self.fsync)
+        self._file_stat = self._stat_file()
+        self._changed.clear()
+        self._new_garbage = 0
+
+    def _pack_path(self, generation: int) -> Path:
+        """Get the pack file of a generation."""
+        return self.base_path.with_suffix(f".{generation}{self.base_path.suffix}")
+
+    @property
+    def path(self) -> Path:
+        """Get the current pack file."""
+        return self._pack_path(self.generation)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.entries))
+
+    def close(self) -> None:
+        """Unmap the pack file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _view(self, end: int) -> mmap.mmap:
+        """Get a read-only map of the pack covering at least ``end`` bytes, remapping after appends."""
+        if self._map is None or len(self._map) < end:
+            self.close()
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def get(self, key: str) -> bytes | None:
+        """Read and decompress a blob, or return None if it isn't packed."""
+        if key not in self.entries and not self.reload():
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        try:
+            return self._read(entry)
+        except OSError:
+            # The pack file is gone: another process compacted it
+            if not self.reload() or key not in self.entries:
+                raise
+            return self._read(self.entries[key])
+
+    def _read(self, entry: dict) -> bytes:
+        """Read and decompress the blob of an index entry."""
+        offset, length = entry["offset"], entry["length"]
+        view = self._view(offset + length)
+        return decompress(view[offset:offset + length], entry["codec"])
+
+    def put(self, key: str, data: bytes, save: bool = True, **meta) -> None:
+        """
+        Compress and append a blob, replacing any previous one under the same key.
+
+        Extra keyword arguments are stored with the entry (e.g. the
+        modification time of the file the blob came from). With
+        ``save=False`` the index is only written by the next ``save_index``,
+        which lets a batch of blobs share one index write.
+        """
+        blob = compress(data, self.codec)
+        # Append to the generation that is current now
+        self.reload()
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(blob)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        previous = self.entries.get(key)
+        if previous is not None:
+            self.garbage += previous["length"]
+            self._new_garbage += previous["length"]
+        self.entries[key] = {"offset": offset, "length": len(blob), "codec": self.codec, **meta}
+        self._changed[key] = self.entries[key]
+        if save:
+            self.save_index()
+
+    def remove(self, key: str) -> bool:
+        """Drop a blob from the index; its bytes are reclaimed by the next compaction."""
+        self.reload()
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.garbage += entry["length"]
+        self._new_garbage += entry["length"]
+        self._changed[key] = None
+        if self.garbage > self.MIN_COMPACT_GARBAGE and self.garbage * 2 > self._size() and self.compact():
+            return True
+        self.save_index()
+        return True
+
+    def _size(self) -> int:
+        """Get the size of the pack file."""
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    def compact(self) -> bool:
+        """
+        Copy the live blobs into a new generation of the pack and drop the old one.
+
+        Returns:
+            False if another process changed the index while the blobs were
+            copied; the pack is left as it was, to be compacted another time
+        """
+        self.reload()
+        old_path = self.path
+        new_path = self._pack_path(self.generation + 1)
+        entries = {}
+        with open(new_path, "wb") as f:
+            for key, entry in self.entries.items():
+                view = self._view(entry["offset"] + entry["length"])
+                entries[key] = {**entry, "offset": f.tell()}
+                f.write(view[entry["offset"]:entry["offset"] + entry["length"]])
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if self.reload():
+            new_path.unlink()
+            return False
+        self.close()
+        if self.fsync:
+            fsync_dir(new_path.parent)
+        self.entries = entries
+        self.garbage = 0
+        self.generation += 1
+        self._write_index()
+        old_path.unlink(missing_ok=True)
+        return True
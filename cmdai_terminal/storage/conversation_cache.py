@@ -0,0 +1,82 @@
+"""In-memory cache of recently opened conversations."""
+from collections import OrderedDict
+
+from ..models.conversation import Conversation
+
+
+class ConversationCache:
+    """
+    Least-recently-used cache of opened conversations.
+
+    The sidebar only holds metadata; full conversations are loaded from
+    storage when selected and kept here so switching back and forth does
+    not re-read them. The cache is bounded both by the number of
+    conversations and by an approximate memory budget (the characters of
+    message content they hold). The most recently used conversation is
+    always kept, even if it alone exceeds the budget.
+    """
+
+    def __init__(self, max_conversations: int = 8, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_conversations: Maximum number of conversations kept
+            max_bytes: Approximate memory budget for message content
+        """
+        self.max_conversations = max(1, max_conversations)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[Conversation, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._entries
+
+    @staticmethod
+    def size_of(conversation: Conversation) -> int:
+        """Approximate the memory a conversation's messages take."""
+        return sum(len(message.content) for message in conversation.messages)
+
+    def get(self, conversation_id: str) -> Conversation | None:
+        """Get a cached conversation and mark it as most recently used."""
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(conversation_id)
+        return entry[0]
+
+    def put(self, conversation: Conversation) -> None:
+        """
+        Add or refresh a conversation as most recently used, evicting the least recently used ones over the limits.
+
+        Call again after the conversation changed so its size is re-counted.
+        """
+        self.pop(conversation.id)
+        size = self.size_of(conversation)
+        self._entries[conversation.id] = (conversation, size)
+        self.bytes += size
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_conversations or self.bytes > self.max_bytes
+        ):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def pop(self, conversation_id: str) -> Conversation | None:
+        """Remove a conversation from the cache."""
+        entry = self._entries.pop(conversation_id, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def clear(self) -> None:
+        """Remove every conversation."""
+        self._entries.clear()
+        self.bytes = 0
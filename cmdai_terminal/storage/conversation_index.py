@@ -0,0 +1,318 @@
+"""Metadata index of stored conversations."""
+import json
+import os
+from pathlib import Path
+from typing import Callable, Container, Dict, Iterable, List, Set, Tuple
+
+from ..models.conversation_summary import ConversationSummary
+from .atomic import atomic_write
+
+
+class ConversationIndex:
+    """
+    Metadata of every conversation in a sharded storage directory, kept in one file.
+
+    Conversation files live in subdirectories (shards) of the storage
+    directory. Listing conversations reads this index instead of parsing
+    every conversation file. Saves and deletes update it incrementally.
+    Changes made by something else are detected from the directory mtimes:
+    ``refresh()`` lists only the shards whose mtime no longer matches the
+    recorded one, and re-reads only the files there that are new or whose
+    mtime or size changed. A missing, corrupted or outdated index file is
+    rebuilt the same way.
+
+    Appending to a log changes no directory mtime, so appends by another
+    process are picked up from the index file instead: when it was
+    rewritten by someone else, ``reload()`` takes over its entries, keeping
+    the ones changed here since the last save. ``save()`` does the same
+    first, so two processes sharing the index don't overwrite each other's
+    entries with stale ones.
+
+    The file records whether it was written by a process that closed the
+    index (``clean``). An index loaded from a file that wasn't, e.g. after a
+    crash with changes not yet saved, lists every shard again on its first
+    ``refresh()``.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, storage_dir: Path):
+        """Initialize the index and load it from disk if present."""
+        self.path = path
+        self.storage_dir = storage_dir
+        # id -> {"summary": dict, "mtime_ns": int, "file": path relative to storage_dir}
+        self.entries: Dict[str, dict] = {}
+        # shard name ("" for the storage directory itself) -> mtime_ns
+        self.dir_mtimes: Dict[str, int] | None = None
+        self._summaries: List[ConversationSummary] | None = None
+        # (mtime_ns, size) of the index file when this process last read or wrote it
+        self._file_stat: Tuple[int, int] | None = None
+        # Conversations put or removed here since the index was last saved
+        self._changed: Set[str] = set()
+        self._load()
+
+    def _load(self) -> None:
+        """Load the index file, ignoring a missing, corrupted or outdated one."""
+        self._file_stat = self._stat_file()
+        self.entries, self.dir_mtimes = self._read_file()
+
+    def _stat_file(self) -> Tuple[int, int] | None:
+        """Get the index file's (mtime_ns, size), or None if it doesn't exist."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> Tuple[Dict[str, dict], Dict[str, int] | None]:
+        """Read the entries and shard mtimes from the index file; empty for a missing, corrupted or outdated one."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION:
+                return {}, None
+            # Indexes of the flat layout have no shard mtimes, and the ones of a
+            # process that didn't close the index may be ahead of its entries:
+            # every shard is listed once, but files whose mtime and size match
+            # aren't re-read
+            dir_mtimes = data.get("dir_mtimes") if data.get("clean") else None
+            return dict(data["conversations"]), dir_mtimes
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}, None
+
+    def reload(self) -> bool:
+        """
+        Take over entries another process wrote to the index file since this one last read or wrote it.
+
+        Entries changed here since the last save are kept. Shards whose
+        recorded mtime differs between the two are listed again by the next
+        ``refresh()``.
+
+        Returns:
+            Whether the file had changed
+        """
+        file_stat = self._stat_file()
+        if file_stat is None or file_stat == self._file_stat:
+            return False
+        entries, dir_mtimes = self._read_file()
+        self._file_stat = file_stat
+        for conversation_id in self._changed:
+            if conversation_id in self.entries:
+                entries[conversation_id] = self.entries[conversation_id]
+            else:
+                entries.pop(conversation_id, None)
+        self.entries = entries
+        if self.dir_mtimes is not None and dir_mtimes is not None:
+            self.dir_mtimes = {
+                name: mtime_ns for name, mtime_ns in self.dir_mtimes.items()
+                if dir_mtimes.get(name) == mtime_ns
+            }
+        self._summaries = None
+        return True
+
+    def _current_dir_mtimes(self) -> Dict[str, int]:
+        """
+        Get the mtimes of the storage directory and its shards, which change when files are added or removed.
+
+        The storage directory is only listed when its own mtime changed,
+        i.e. when a shard may have been added or removed.
+        """
+        try:
+            root_mtime_ns = os.stat(self.storage_dir).st_mtime_ns
+        except OSError:
+            return {}
+        if self.dir_mtimes is not None and self.dir_mtimes.get("") == root_mtime_ns:
+            names = [name for name in self.dir_mtimes if name]
+        else:
+            with os.scandir(self.storage_dir) as it:
+                names = [dir_entry.name for dir_entry in it if dir_entry.is_dir()]
+        mtimes = {"": root_mtime_ns}
+        for name in names:
+            try:
+                mtimes[name] = os.stat(self.storage_dir / name).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    @property
+    def stale(self) -> bool:
+        """Whether any shard changed since the index was last brought up to date."""
+        return self.dir_mtimes is None or self.dir_mtimes != self._current_dir_mtimes()
+
+    def refresh(
+        self,
+        read: Callable[[Path], ConversationSummary | None],
+        suffixes: Tuple[str, ...] = (".json",),
+        keep: Container[str] = (),
+        full: bool = False,
+    ) -> bool:
+        """
+        Bring the index up to date with the directory.
+
+        Args:
+            read: Summarizes a conversation file, returning None if it is
+                unreadable
+            suffixes: File suffixes of conversation files. When a
+                conversation has files with several suffixes, the one listed
+                first is used.
+            keep: Conversations stored outside the directory, whose entries
+                are kept even though they have no file in it
+            full: Also check every indexed file in unchanged shards, which
+                catches files changed in place (one stat per conversation)
+
+        Returns:
+            Whether any entry changed
+        """
+        dir_mtimes = self._current_dir_mtimes()
+        by_shard: Dict[str, List[str]] = {}
+        for conversation_id, entry in self.entries.items():
+            if "file" in entry:
+                by_shard.setdefault(entry["file"].partition("/")[0], []).append(conversation_id)
+
+        changed = False
+        for shard in set(dir_mtimes) | set(by_shard):
+            if not shard:
+                continue
+            if self.dir_mtimes is None or shard not in dir_mtimes or dir_mtimes[shard] != self.dir_mtimes.get(shard):
+                files = self._scan(shard, suffixes)
+            elif full:
+                files = {}
+                for conversation_id in by_shard.get(shard, ()):
+                    file = self.entries[conversation_id]["file"]
+                    try:
+                        files[conversation_id] = (file, os.stat(self.storage_dir / file))
+                    except OSError:
+                        continue
+            else:
+                continue
+            changed |= self._update(files, by_shard.get(shard, ()), read, keep)
+
+        for conversation_id in list(self.entries):
+            if "file" not in self.entries[conversation_id] and conversation_id not in keep:
+                # Not found in any shard
+                del self.entries[conversation_id]
+                self._changed.add(conversation_id)
+                changed = True
+
+        self.dir_mtimes = dir_mtimes
+        if changed:
+            self._summaries = None
+        return changed
+
+    def _scan(self, shard: str, suffixes: Tuple[str, ...]) -> Dict[str, Tuple[str, os.stat_result]]:
+        """List the conversation files of a shard as id -> (file, stat)."""
+        files: Dict[str, Tuple[str, os.stat_result]] = {}
+        try:
+            it = os.scandir(self.storage_dir / shard)
+        except OSError:
+            return files
+        with it:
+            for dir_entry in it:
+                conversation_id, dot, suffix = dir_entry.name.rpartition(".")
+                suffix = dot + suffix
+                if suffix not in suffixes or not dir_entry.is_file():
+                    continue
+                current = files.get(conversation_id)
+                if current is None or suffixes.index(suffix) < suffixes.index(
+                    "." + current[0].rpartition(".")[2]
+                ):
+                    files[conversation_id] = (f"{shard}/{dir_entry.name}", dir_entry.stat())
+        return files
+
+    def _update(
+        self,
+        files: Dict[str, Tuple[str, os.stat_result]],
+        known: Iterable[str],
+        read: Callable[[Path], ConversationSummary | None],
+        keep: Container[str],
+    ) -> bool:
+        """Update the entries of one shard from its files; ``known`` are the ids indexed in it."""
+        changed = False
+        for conversation_id, (file, stat) in files.items():
+            entry = self.entries.get(conversation_id)
+            if (
+                entry is not None
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+                and entry.get("summary", {}).get("size") == stat.st_size
+            ):
+                entry["file"] = file
+                continue
+            summary = read(self.storage_dir / file)
+            self._changed.add(conversation_id)
+            if summary is None:
+                # Skip corrupted files
+                changed |= self.entries.pop(conversation_id, None) is not None
+                continue
+            summary.size = stat.st_size
+            self.entries[conversation_id] = {
+                "summary": summary.to_dict(),
+                "mtime_ns": stat.st_mtime_ns,
+                "file": file,
+            }
+            changed = True
+
+        for conversation_id in known:
+            if conversation_id not in files and conversation_id not in keep:
+                if self.entries.pop(conversation_id, None) is not None:
+                    self._changed.add(conversation_id)
+                    changed = True
+        return changed
+
+    def put(self, summary: ConversationSummary, mtime_ns: int, file: str) -> None:
+        """Record a conversation that was just written to ``file`` (relative to the storage directory)."""
+        self.entries[summary.id] = {"summary": summary.to_dict(), "mtime_ns": mtime_ns, "file": file}
+        self._changed.add(summary.id)
+        self._summaries = None
+
+    def remove(self, conversation_id: str) -> None:
+        """Forget a deleted conversation."""
+        self.entries.pop(conversation_id, None)
+        self._changed.add(conversation_id)
+        self._summaries = None
+
+    def mark_current(self, shards: Iterable[str]) -> None:
+        """Record that the index reflects the given shards (and the storage directory) as they are now."""
+        if self.dir_mtimes is None:
+            return
+        for shard in ("", *shards):
+            try:
+                self.dir_mtimes[shard] = os.stat(self.storage_dir / shard).st_mtime_ns
+            except OSError:
+                self.dir_mtimes.pop(shard, None)
+
+    def summaries(self) -> List[ConversationSummary]:
+        """Get all conversation summaries, most recently updated first."""
+        if self._summaries is None:
+            summaries = []
+            for entry in self.entries.values():
+                try:
+                    summaries.append(ConversationSummary.from_dict(entry["summary"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            summaries.sort(key=lambda s: s.updated_at, reverse=True)
+            self._summaries = summaries
+        return list(self._summaries)
+
+    @property
+    def dirty(self) -> bool:
+        """Whether entries changed since the index was last saved."""
+        return bool(self._changed)
+
+    def save(self, fsync: bool = False, clean: bool = False) -> None:
+        """
+        Write the index to disk atomically, first taking over what another process wrote to it.
+
+        Args:
+            fsync: Flush the file to disk before returning
+            clean: This is the last write before the index is closed; until
+                then, changes may be held in memory
+        """
+        self.reload()
+        atomic_write(self.path, json.dumps({
+            "version": self.VERSION,
+            "clean": clean,
+            "dir_mtimes": self.dir_mtimes,
+            "conversations": self.entries,
+        }), fsync=fsync)
+        self._file_stat = self._stat_file()
+        self._changed.clear()
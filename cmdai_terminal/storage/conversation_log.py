@@ -0,0 +1,181 @@
+"""Append-only JSON Lines format for a single conversation."""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+from ..models.conversation import Conversation
+from ..models.message import Message
+from .atomic import atomic_write
+
+# Record types, stored under "type" in each line
+HEADER = "conversation"
+MESSAGE = "message"
+# How every message line written by this module starts
+MESSAGE_PREFIX = json.dumps({"type": MESSAGE})[:-1]
+# Message key holding the hash of a body kept in the blob store instead of "content"
+CONTENT_BLOB = "content_blob"
+
+
+def _message_line(message: Message, blob: str | None) -> str:
+    """Render one message line, referencing its body by hash if it is in the blob store."""
+    record = {"type": MESSAGE, **message.to_dict()}
+    if blob is not None:
+        record["content"] = ""
+        record[CONTENT_BLOB] = blob
+    return json.dumps(record) + "\n"
+
+
+def write_log(
+    path: Path,
+    conversation: Conversation,
+    fsync: bool = False,
+    blobs: Dict[int, str] | None = None,
+) -> None:
+    """
+    Write a conversation as a compact log: one header line, then one line per message.
+
+    The file is replaced atomically, so readers see either the old or the
+    new version, never a partial one. With ``fsync`` the write is flushed to
+    disk before returning. See ``format_log`` for ``blobs``.
+    """
+    atomic_write(path, format_log(conversation, blobs), fsync=fsync)
+
+
+def format_log(conversation: Conversation, blobs: Dict[int, str] | None = None) -> str:
+    """
+    Render a conversation as a compact log: one header line, then one line per message.
+
+    Args:
+        conversation: Conversation to render
+        blobs: Blob store hashes of message bodies that are referenced
+            instead of written inline, by message index
+    """
+    blobs = blobs or {}
+    lines = [json.dumps({"type": HEADER, **conversation.to_header_dict()}) + "\n"]
+    lines.extend(
+        _message_line(message, blobs.get(i))
+        for i, message in enumerate(conversation.messages)
+    )
+    return "".join(lines)
+
+
+def append_log(
+    path: Path,
+    conversation: Conversation,
+    start: int,
+    fsync: bool = False,
+    blobs: Dict[int, str] | None = None,
+) -> None:
+    """
+    Append the messages from index ``start`` on, followed by the current header.
+
+    The header line comes last so that a title or model change is recorded
+    in the same write; the last header in the file wins when reading. With
+    ``fsync`` the appended lines are flushed to disk before returning. See
+    ``format_log`` for ``blobs``.
+    """
+    blobs = blobs or {}
+    lines = [
+        _message_line(conversation.messages[i], blobs.get(i))
+        for i in range(start, len(conversation.messages))
+    ]
+    lines.append(json.dumps({"type": HEADER, **conversation.to_header_dict()}) + "\n")
+    with open(path, "a") as f:
+        f.write("".join(lines))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_log(path: Path) -> Tuple[dict, int, bool]:
+    """
+    Read a conversation log into the dictionary format of ``Conversation.from_dict``.
+
+    See ``parse_log``.
+    """
+    with open(path) as f:
+        return parse_log(f.read(), path)
+
+
+def parse_log(text: str, source: Path | str = "log") -> Tuple[dict, int, bool]:
+    """
+    Parse the content of a conversation log into the dictionary format of ``Conversation.from_dict``.
+
+    A truncated last line (e.g. from a crash during an append) is ignored.
+    Messages whose body is in the blob store keep their ``CONTENT_BLOB``
+    hash; the caller resolves it.
+
+    Returns:
+        Tuple of (data, header_records, complete). header_records is the
+        number of header lines in the file, i.e. how much compaction would
+        save. complete is False if a truncated last line was skipped; the
+        file must then be rewritten before anything is appended to it.
+
+    Raises:
+        ValueError: If the file holds no header
+    """
+    header = None
+    header_records = 0
+    complete = True
+    messages = []
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            if i >= len(lines) - 2:
+                complete = False
+                break
+            raise
+        if record.pop("type", None) == HEADER:
+            header = record
+            header_records += 1
+        else:
+            messages.append(record)
+    if header is None:
+        raise ValueError(f"No conversation header in {source}")
+    if lines[-1]:
+        # No newline at the end: the last write did not finish
+        complete = False
+    return {**header, "messages": messages}, header_records, complete
+
+
+def read_log_header(path: Path) -> Tuple[dict, int]:
+    """
+    Read only the header of a conversation log and count its messages.
+
+    Message lines are recognized by their prefix and not decoded, which
+    makes this much cheaper than ``read_log`` when only the metadata is
+    needed. A truncated last line is ignored, as in ``read_log``.
+
+    Returns:
+        Tuple of (header, message_count)
+
+    Raises:
+        ValueError: If the file holds no header
+    """
+    header = None
+    message_count = 0
+    with open(path) as f:
+        lines = f.read().split("\n")
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        if i >= len(lines) - 2 or not line.startswith(MESSAGE_PREFIX):
+            # The last line may be truncated, other lines may come from another writer
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if i >= len(lines) - 2:
+                    break
+                raise
+            if record.pop("type", None) == HEADER:
+                header = record
+                continue
+        message_count += 1
+    if header is None:
+        raise ValueError(f"No conversation header in {path}")
+    return header, message_count
@@ -1,55 +1,534 @@
 """Conversation history storage."""
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, Tuple
 
 from ..models.conversation import Conversation
+from ..models.conversation_summary import ConversationSummary
+from ..models.search_result import SearchResult
+from .atomic import atomic_write, fsync_dir
+from .blob_store import BlobStore
+from .cold_pack import ColdPack
+from .conversation_index import ConversationIndex
+from .conversation_log import (
+    CONTENT_BLOB,
+    append_log,
+    format_log,
+    parse_log,
+    read_log,
+    read_log_header,
+    write_log,
+)
+from .search_index import SearchIndex, make_snippet, tokenize
 
 
 class ConversationStorage:
-    """Manages conversation persistence."""
+    """
+    Manages conversation persistence.
 
-    def __init__(self, storage_dir: Path):
-        """Initialize storage manager."""
+    Each conversation is an append-only JSON Lines log: saving appends
+    only the messages added since the last save plus an updated header
+    line. The log is compacted (rewritten atomically with a single header)
+    once ``compact_every`` header lines have piled up, or whenever the
+    conversation no longer matches what was appended (e.g. it was loaded
+    before this process started). Legacy ``<id[:2]>/<id>.json`` files are
+    read transparently and converted on their next save.
+
+    Files are sharded by the first two characters of their id
+    (``<id[:2]>/<id>.jsonl``), so no directory grows past a few hundred
+    files and every file's path is computed from its id. Listing reads the
+    metadata index, which only lists shards whose mtime changed. A
+    directory in the old flat layout is migrated when it is first opened.
+
+    Full-text search uses an inverted index next to the directory. It is
+    loaded on the first search, updated as conversations are saved, and
+    re-syncs conversations that were changed by something else. The index
+    has its own lock, and each search re-indexes for at most
+    ``SEARCH_SYNC_BUDGET`` seconds, so building it (re-)indexes a large
+    history over several searches while other storage calls carry on;
+    ``search_pending`` tells how much is left.
+
+    Conversations untouched for ``cold_after_days`` can be moved into a
+    compressed pack file next to the directory by ``archive_cold``. They
+    stay listed and searchable, load with one mmap slice and decompress,
+    and move back to the directory the next time they are saved.
+
+    Message bodies of at least ``blob_threshold`` characters are stored
+    once by content hash in a blob store next to the directory (see
+    ``BlobStore``) and referenced from the logs, so a file pasted into many
+    conversations takes its space once.
+
+    All methods may be called from any thread; a lock serializes them.
+    """
+
+    SUFFIXES = (".jsonl", ".json")
+    # Searches re-check every file for outside changes at most this often (seconds)
+    RESCAN_INTERVAL = 2.0
+    # Seconds each search spends re-indexing before searching what is indexed so far
+    SEARCH_SYNC_BUDGET = 0.3
+    # Conversations kept in memory to cut result snippets from while typing
+    SNIPPET_CACHE_SIZE = 64
+    # Conversations moved into the cold pack per index write
+    ARCHIVE_BATCH = 100
+    # The metadata index is written at most this often (seconds); close() writes the rest
+    INDEX_SAVE_INTERVAL = 5.0
+    # Written into the storage directory once it uses the sharded layout
+    LAYOUT_MARKER = ".sharded"
+
+    def __init__(
+        self,
+        storage_dir: Path,
+        index_path: Path | None = None,
+        compact_every: int = 32,
+        fsync: bool = False,
+        search_path: Path | None = None,
+        cold_after_days: float | None = None,
+        blob_threshold: int | None = 16 * 1024,
+        migrate_layout: bool = True,
+    ):
+        """
+        Initialize storage manager.
+
+        Args:
+            storage_dir: Directory holding one file per conversation, in
+                shards
+            index_path: Metadata index file (default: next to the directory,
+                e.g. 'conversations.index.json'). It is kept outside the
+                directory so that writing it does not look like a change to
+                the conversations.
+            compact_every: Number of appended header lines after which a
+                conversation log is compacted
+            fsync: Flush every write to disk before returning, so saved
+                conversations survive a power loss (slower)
+            search_path: Search index file (default: next to the directory,
+                e.g. 'conversations.search.json')
+            cold_after_days: Age (days since last change) after which
+                ``archive_cold`` packs a conversation; None disables it
+            blob_threshold: Minimum length (characters) of message bodies
+                kept in the blob store; None stores every body inline
+            migrate_layout: Move files of the flat layout into shards. Off
+                for a directory that is only read, e.g. to migrate it to
+                another backend; ``iter_conversations`` still reads them.
+        """
         self.storage_dir = storage_dir
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        if migrate_layout:
+            self._migrate_layout()
+        self.index = ConversationIndex(
+            index_path or storage_dir.with_name(f"{storage_dir.name}.index.json"),
+            storage_dir,
+        )
+        self._index_saved_at: float | None = None
+        # id -> (messages in the log, header lines in the log), for logs
+        # whose content is known to match what this process wrote or read
+        self._logged: Dict[str, Tuple[int, int]] = {}
+        self.search_path = search_path or storage_dir.with_name(f"{storage_dir.name}.search.json")
+        self._search_index: SearchIndex | None = None
+        # Guards the search index and snippet cache; never waited for while holding _lock
+        self._search_lock = threading.Lock()
+        self._search_pending: int | None = None
+        self._scanned_at: float | None = None
+        # id -> (mtime_ns, conversation), most recently used last
+        self._snippet_sources: OrderedDict[str, Tuple[int, Conversation]] = OrderedDict()
+        self.cold_after_days = cold_after_days
+        self.cold = ColdPack(
+            storage_dir.with_name(f"{storage_dir.name}.cold.pack"),
+            storage_dir.with_name(f"{storage_dir.name}.cold.index.json"),
+            fsync=fsync,
+        )
+        self.blobs = BlobStore(
+            storage_dir.with_name(f"{storage_dir.name}.blobs"),
+            threshold=blob_threshold or 0,
+            fsync=fsync,
+        )
+
+    def close(self) -> None:
+        """Write the indexes if they changed since they were loaded, and unmap the cold pack."""
+        with self._search_lock, self._lock:
+            if self.index.dirty or self._index_saved_at is not None:
+                self.index.save(fsync=self.fsync, clean=True)
+                self._index_saved_at = None
+            if self._search_index is not None:
+                self._search_index.save()
+            self.cold.close()
+
+    def _migrate_layout(self) -> None:
+        """
+        Move conversation files of the flat layout into their shards.
+
+        Files are renamed one by one, which keeps their mtimes, so the
+        metadata index doesn't re-read them. The marker is written last:
+        an interrupted migration resumes the next time.
+        """
+        marker = self.storage_dir / self.LAYOUT_MARKER
+        if marker.exists():
+            return
+        names = self._flat_names()
+        shards = set()
+        for name in names:
+            shard = self._shard(os.path.splitext(name)[0])
+            if shard not in shards:
+                (self.storage_dir / shard).mkdir(exist_ok=True)
+                shards.add(shard)
+            os.replace(self.storage_dir / name, self.storage_dir / shard / name)
+        if self.fsync:
+            for shard in shards:
+                fsync_dir(self.storage_dir / shard)
+        atomic_write(marker, "", fsync=self.fsync)
+
+    def _flat_names(self) -> List[str]:
+        """List the conversation files at the top of the directory, i.e. of the flat layout."""
+        with os.scandir(self.storage_dir) as it:
+            return [
+                dir_entry.name for dir_entry in it
+                if os.path.splitext(dir_entry.name)[1] in self.SUFFIXES and dir_entry.is_file()
+            ]
+
+    @staticmethod
+    def _shard(conversation_id: str) -> str:
+        """Get the name of the shard directory holding a conversation."""
+        return conversation_id[:2].lower() or "_"
+
+    def _path(self, conversation_id: str) -> Path:
+        """Get the log file of a conversation."""
+        return self.storage_dir / self._shard(conversation_id) / f"{conversation_id}.jsonl"
+
+    def _legacy_path(self, conversation_id: str) -> Path:
+        """Get the pre-log single JSON file of a conversation."""
+        return self.storage_dir / self._shard(conversation_id) / f"{conversation_id}.json"
+
+    def _file(self, file_path: Path) -> str:
+        """Get a conversation file's path relative to the storage directory, as recorded in the index."""
+        return f"{file_path.parent.name}/{file_path.name}"
 
     def save_conversation(self, conversation: Conversation) -> None:
-        """Save a conversation to disk."""
-        file_path = self.storage_dir / f"{conversation.id}.json"
-        with open(file_path, "w") as f:
-            json.dump(conversation.to_dict(), f, indent=2)
+        """Save a conversation to disk, appending what changed since the last save."""
+        with self._lock:
+            file_path = self._path(conversation.id)
+            logged = self._logged.get(conversation.id)
+            if (
+                logged is not None
+                and logged[0] <= len(conversation.messages)
+                and logged[1] < self.compact_every
+                and file_path.exists()
+            ):
+                # References are recorded before the log points at the blobs
+                blobs = self.blobs.store(conversation.id, conversation.messages, logged[0])
+                append_log(file_path, conversation, logged[0], fsync=self.fsync, blobs=blobs)
+                self._logged[conversation.id] = (len(conversation.messages), logged[1] + 1)
+            else:
+                blobs = self.blobs.store(conversation.id, conversation.messages, replace=True)
+                write_log(file_path, conversation, fsync=self.fsync, blobs=blobs)
+                self._legacy_path(conversation.id).unlink(missing_ok=True)
+                self._logged[conversation.id] = (len(conversation.messages), 1)
+
+            stat = file_path.stat()
+            self.index.put(
+                ConversationSummary.from_conversation(conversation, stat.st_size),
+                stat.st_mtime_ns,
+                self._file(file_path),
+            )
+            self.index.mark_current([file_path.parent.name])
+            self._save_index()
+            if self._search_lock.acquire(blocking=False):
+                # While a search holds the index, the next search re-indexes this from its mtime instead
+                try:
+                    if self._search_index is not None:
+                        self._search_index.update(conversation, stat.st_mtime_ns)
+                finally:
+                    self._search_lock.release()
+            # Touched again: if it was packed (maybe by another process),
+            # it lives in the directory from now on
+            self.cold.remove(conversation.id)
+
+    def _read(self, file_path: Path) -> Conversation:
+        """Read a conversation log or legacy JSON file; messages are decoded on first access."""
+        if file_path.suffix == ".jsonl":
+            data, header_records, complete = read_log(file_path)
+            self._resolve_blobs(data)
+            conversation = Conversation.from_dict(data, lazy=True)
+            if complete:
+                self._logged[conversation.id] = (len(conversation.messages), header_records)
+            else:
+                self._logged.pop(conversation.id, None)
+            return conversation
+
+        with open(file_path) as f:
+            data = json.load(f)
+        return Conversation.from_dict(data, lazy=True)
 
     def load_conversation(self, conversation_id: str) -> Conversation | None:
         """Load a conversation from disk."""
-        file_path = self.storage_dir / f"{conversation_id}.json"
-        if not file_path.exists():
+        with self._lock:
+            for file_path in (self._path(conversation_id), self._legacy_path(conversation_id)):
+                if file_path.exists():
+                    return self._read(file_path)
+            return self._read_cold(conversation_id)
+
+    def _read_cold(self, conversation_id: str) -> Conversation | None:
+        """Load a conversation from the cold pack, or return None if it isn't there."""
+        data = self.cold.get(conversation_id)
+        if data is None:
             return None
+        conversation_data, _, _ = parse_log(data.decode("utf-8"), self.cold.path)
+        self._resolve_blobs(conversation_data)
+        return Conversation.from_dict(conversation_data, lazy=True)
 
-        with open(file_path) as f:
-            data = json.load(f)
-        return Conversation.from_dict(data)
+    def _resolve_blobs(self, data: dict) -> None:
+        """Fill in the bodies of parsed messages that reference the blob store."""
+        for record in data["messages"]:
+            digest = record.pop(CONTENT_BLOB, None)
+            if digest is None:
+                continue
+            content = self.blobs.get(digest)
+            if content is None:
+                record["error"] = f"Message content is missing from the blob store ({digest[:12]})"
+            else:
+                record["content"] = content
+
+    def _read_summary(self, file_path: Path) -> ConversationSummary | None:
+        """Summarize a conversation file, or return None if it can't be read."""
+        try:
+            if file_path.suffix == ".jsonl":
+                header, message_count = read_log_header(file_path)
+                return ConversationSummary.from_dict({**header, "message_count": message_count})
+            return ConversationSummary.from_conversation(self._read(file_path))
+        except Exception:
+            return None
+
+    def _save_index(self) -> None:
+        """
+        Write the metadata index, at most every ``INDEX_SAVE_INTERVAL`` seconds.
+
+        Rewriting the whole index on every save would cost time in the
+        number of conversations per message. Changes made in between are
+        written by a later save or by ``close()``; after a crash, the next
+        start notices the index wasn't closed and re-checks the files.
+        """
+        now = time.monotonic()
+        if self._index_saved_at is not None and now - self._index_saved_at < self.INDEX_SAVE_INTERVAL:
+            return
+        self.index.save(fsync=self.fsync)
+        self._index_saved_at = now
+
+    def _refresh_index(self, full: bool = False) -> None:
+        """Bring the metadata index up to date with changes made by something else."""
+        self.index.reload()
+        # Conversations another process packed have no file but stay listed
+        self.cold.reload()
+        if full or self.index.stale:
+            if self.index.refresh(self._read_summary, self.SUFFIXES, keep=self.cold, full=full):
+                self._save_index()
+
+    def list_conversations(self, limit: int | None = None, offset: int = 0) -> List[ConversationSummary]:
+        """
+        List saved conversations, most recently updated first, optionally one page at a time.
+
+        Only the metadata index is read; it is brought up to date first if
+        the directory was changed by something else.
+        """
+        with self._lock:
+            self._refresh_index()
+            summaries = self.index.summaries()
+        return summaries[offset:None if limit is None else offset + limit]
+
+    def iter_conversations(self) -> Iterator[Conversation]:
+        """
+        Load every stored conversation, one at a time, skipping unreadable ones.
 
-    def list_conversations(self) -> List[Conversation]:
-        """List all saved conversations."""
-        conversations = []
-        for file_path in self.storage_dir.glob("*.json"):
+        Files of the flat layout, left in place when the storage was opened
+        without ``migrate_layout``, are read where they are.
+        """
+        with self._lock:
+            self._refresh_index()
+            conversation_ids = list(dict.fromkeys([*self.index.entries, *self.cold]))
+            flat: Dict[str, str] = {}
+            for name in self._flat_names():
+                conversation_id, suffix = os.path.splitext(name)
+                # A log takes precedence over a legacy file of the same conversation
+                if conversation_id not in flat or suffix == self.SUFFIXES[0]:
+                    flat[conversation_id] = name
+        indexed = set(conversation_ids)
+        for conversation_id, name in flat.items():
+            if conversation_id in indexed:
+                continue
             try:
-                with open(file_path) as f:
-                    data = json.load(f)
-                conversations.append(Conversation.from_dict(data))
+                with self._lock:
+                    conversation = self._read(self.storage_dir / name)
             except Exception:
-                # Skip corrupted files
                 continue
-
-        # Sort by updated_at, most recent first
-        conversations.sort(key=lambda c: c.updated_at, reverse=True)
-        return conversations
+            yield conversation
+        for conversation_id in conversation_ids:
+            try:
+                conversation = self.load_conversation(conversation_id)
+            except Exception:
+                continue
+            if conversation is not None:
+                yield conversation
 
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation."""
-        file_path = self.storage_dir / f"{conversation_id}.json"
-        if file_path.exists():
-            file_path.unlink()
-            return True
-        return False
+        with self._lock:
+            deleted = False
+            for file_path in (self._path(conversation_id), self._legacy_path(conversation_id)):
+                if file_path.exists():
+                    file_path.unlink()
+                    deleted = True
+            if self.cold.remove(conversation_id):
+                deleted = True
+            self.blobs.release(conversation_id)
+            self._logged.pop(conversation_id, None)
+            if self._search_lock.acquire(blocking=False):
+                try:
+                    if self._search_index is not None:
+                        self._search_index.remove(conversation_id)
+                finally:
+                    self._search_lock.release()
+            if deleted:
+                self.index.remove(conversation_id)
+                self.index.mark_current([self._shard(conversation_id)])
+                self._save_index()
+            return deleted
+
+    def archive_cold(self, now: float | None = None) -> int:
+        """
+        Move conversations untouched for ``cold_after_days`` into the cold pack.
+
+        Conversations are moved in small batches, each under the lock, so
+        other storage calls are only held up briefly. A batch's hot files
+        are deleted only after the pack index recording them is written.
+
+        Returns:
+            The number of conversations packed
+        """
+        if self.cold_after_days is None:
+            return 0
+        cutoff_ns = int(((now or time.time()) - self.cold_after_days * 86400) * 1e9)
+        with self._lock:
+            candidates = [
+                conversation_id for conversation_id, entry in self.index.entries.items()
+                if entry.get("mtime_ns", cutoff_ns) < cutoff_ns and conversation_id not in self.cold
+            ]
+
+        packed = 0
+        for start in range(0, len(candidates), self.ARCHIVE_BATCH):
+            with self._lock:
+                moved = []
+                for conversation_id in candidates[start:start + self.ARCHIVE_BATCH]:
+                    file_path = self._path(conversation_id)
+                    if not file_path.exists():
+                        file_path = self._legacy_path(conversation_id)
+                        if not file_path.exists():
+                            continue
+                    stat = file_path.stat()
+                    if stat.st_mtime_ns >= cutoff_ns:
+                        continue
+                    if file_path.suffix == ".jsonl":
+                        data = file_path.read_bytes()
+                    else:
+                        data = format_log(self._read(file_path)).encode("utf-8")
+                    self.cold.put(conversation_id, data, save=False, mtime_ns=stat.st_mtime_ns)
+                    moved.append((conversation_id, file_path))
+                if not moved:
+                    continue
+                self.cold.save_index()
+                # Unless another process compacted the pack before they were recorded
+                moved = [item for item in moved if item[0] in self.cold]
+                for conversation_id, file_path in moved:
+                    file_path.unlink()
+                    self._logged.pop(conversation_id, None)
+                self.index.mark_current({file_path.parent.name for _, file_path in moved})
+                self._save_index()
+                packed += len(moved)
+        return packed
+
+    def collect_garbage(self) -> int:
+        """
+        Delete blobs that no conversation references, e.g. left behind by a crash.
+
+        The blob directory is scanned without the lock, which is only taken
+        to confirm and delete what the scan found.
+
+        Returns:
+            The number of blobs deleted
+        """
+        garbage = self.blobs.find_garbage()
+        if not garbage:
+            return 0
+        with self._lock:
+            return self.blobs.delete_garbage(garbage)
+
+    def search(self, query: str, limit: int = 50) -> List[SearchResult]:
+        """
+        Search message contents, best matches first.
+
+        Args:
+            query: Free text; every word must occur in the message, the last
+                one may be a prefix (so results update while typing)
+            limit: Maximum number of results
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._scanned_at is None or now - self._scanned_at > self.RESCAN_INTERVAL:
+                # Also catches files changed in place, which the directory mtimes miss
+                self._refresh_index(full=True)
+                self._scanned_at = now
+            else:
+                self._refresh_index()
+            mtimes = {conversation_id: entry["mtime_ns"] for conversation_id, entry in self.index.entries.items()}
+
+        # Only the search index is locked from here on; loading conversations
+        # to index them or cut snippets takes the storage lock one at a time
+        with self._search_lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.search_path)
+            self._search_pending = self._search_index.sync(
+                mtimes, self.load_conversation, deadline=time.monotonic() + self.SEARCH_SYNC_BUDGET,
+            )
+            # Appends to the index's change log, keeping a partly built index
+            # across restarts; the compacted snapshot is written once it is done
+            self._search_index.save(snapshot=not self._search_pending)
+
+            terms = tokenize(query)
+            results = []
+            for score, conversation_id, position, role in self._search_index.search(query, limit):
+                conversation = self._snippet_source(conversation_id, mtimes[conversation_id])
+                if conversation is None or position >= len(conversation.messages):
+                    continue
+                results.append(SearchResult(
+                    conversation_id=conversation_id,
+                    title=conversation.title,
+                    message_index=position,
+                    role=role,
+                    snippet=make_snippet(conversation.messages[position].content, terms),
+                    score=score,
+                ))
+            return results
+
+    @property
+    def search_pending(self) -> int:
+        """Get the number of conversations the last search had yet to index (its results may miss them)."""
+        return self._search_pending or 0
+
+    def _snippet_source(self, conversation_id: str, mtime_ns: int) -> Conversation | None:
+        """Load a conversation to cut search snippets from, reusing recently loaded ones that are unchanged."""
+        cached = self._snippet_sources.get(conversation_id)
+        if cached is not None and cached[0] == mtime_ns:
+            self._snippet_sources.move_to_end(conversation_id)
+            return cached[1]
+        conversation = self.load_conversation(conversation_id)
+        if conversation is None:
+            self._snippet_sources.pop(conversation_id, None)
+            return None
+        self._snippet_sources[conversation_id] = (mtime_ns, conversation)
+        self._snippet_sources.move_to_end(conversation_id)
+        while len(self._snippet_sources) > self.SNIPPET_CACHE_SIZE:
+            self._snippet_sources.popitem(last=False)
+        return conversation
@@ -0,0 +1,99 @@
+"""Persistent model catalog cache."""
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from ..models.model_info import ModelInfo
+from .atomic import atomic_write
+from .writer import BackgroundWriter
+
+
+class ModelCatalogCache:
+    """
+    On-disk cache of each source's model catalog.
+
+    A source is one provider endpoint, keyed by provider name and URL
+    (e.g. ``ollama@http://localhost:11434``), as listed by
+    ``UnifiedClient.sources``.
+
+    Entries are served immediately on startup (stale-while-revalidate) and
+    refreshed in the background once they are older than ``ttl`` seconds.
+    """
+
+    def __init__(self, path: Path, ttl: float = 3600):
+        """Initialize the cache and load any existing entries."""
+        self.path = path
+        self.ttl = ttl
+        self.entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        """Load cache entries from disk, ignoring a missing or corrupted file."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return dict(data.get("sources", {}))
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def models(self, sources: List[str]) -> List[ModelInfo]:
+        """Get cached models for the given sources, in source order."""
+        models = []
+        for source in sources:
+            for item in self.entries.get(source, {}).get("models", []):
+                try:
+                    models.append(ModelInfo.from_dict(item))
+                except (KeyError, TypeError):
+                    continue
+        return models
+
+    def validators(self) -> Dict[str, Dict[str, str]]:
+        """Get the ETag/Last-Modified validators recorded for each source."""
+        return {
+            source: entry.get("validators", {})
+            for source, entry in self.entries.items()
+        }
+
+    def stale_sources(self, sources: List[str]) -> List[str]:
+        """Get the sources whose cached catalog is missing or past its TTL."""
+        now = time.time()
+        return [
+            source for source in sources
+            if now - self.entries.get(source, {}).get("fetched_at", 0) >= self.ttl
+        ]
+
+    def update(
+        self,
+        source: str,
+        models: List[ModelInfo] | None,
+        validators: Dict[str, str],
+    ) -> None:
+        """
+        Record a fresh catalog for a source.
+
+        Passing None for models keeps the cached list (the server reported it
+        unchanged) and only renews its timestamp.
+        """
+        entry = self.entries.setdefault(source, {"models": []})
+        if models is not None:
+            entry["models"] = [m.to_dict() for m in models]
+        entry["validators"] = validators
+        entry["fetched_at"] = time.time()
+
+    def dump(self) -> str:
+        """Render the cache as JSON."""
+        return json.dumps({"sources": self.entries})
+
+    def save(self, writer: BackgroundWriter | None = None) -> None:
+        """
+        Write the cache to disk atomically.
+
+        Args:
+            writer: Save on this background writer instead of blocking; the
+                cache is rendered now, so later updates don't leak into it
+        """
+        text = self.dump()
+        if writer is None:
+            atomic_write(self.path, text)
+            return
+        writer.submit(("model-cache", str(self.path)), lambda: atomic_write(self.path, text))
@@ -0,0 +1,440 @@
+"""Inverted index for full-text search over JSON conversation storage."""
+import base64
+import heapq
+import json
+import math
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from ..models.conversation import Conversation
+from ..models.lazy_messages import LazyMessages
+from .atomic import atomic_write
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# A prefix only matches its most frequent completions, up to this many
+# postings in total, so one or two typed letters don't turn into a union
+# over most of the index
+MAX_PREFIX_POSTINGS = 50000
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms."""
+    return WORD_RE.findall(text.casefold())
+
+
+def make_snippet(content: str, terms: List[str], width: int = 80) -> str:
+    """Cut a single-line excerpt of a message around the first occurrence of any term."""
+    text = " ".join(content.split())
+    folded = text.casefold()
+    positions = [i for i in (folded.find(term) for term in terms) if i >= 0]
+    start = max(0, min(positions, default=0) - width // 4)
+    if start > 0:
+        # Don't cut a word in half
+        start = text.rfind(" ", 0, start) + 1
+    snippet = text[start:start + width]
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(text) else "")
+
+
+class SearchIndex:
+    """
+    Inverted index of message content, kept in a snapshot file and a change log.
+
+    Every message is a document. Postings are compact arrays of
+    ``(document, term frequency)`` pairs, so 100k+ messages fit in a few
+    tens of megabytes. Conversations are indexed incrementally: saving only
+    adds the new messages, and a conversation whose file modification time
+    no longer matches (i.e. it was edited by something else) is re-indexed
+    as a whole by ``sync``. Removed documents are tombstoned and dropped
+    when the index is compacted.
+
+    ``save`` appends the changes since the last save to a log next to the
+    snapshot (e.g. 'conversations.search.3.log' for snapshot generation 3),
+    which loading replays. Only once the log has grown to ``LOG_RATIO``
+    times the snapshot is a new, compacted snapshot written, so the cost of
+    saving doesn't grow with the size of the index.
+
+    Results are ranked by BM25. Every query word must occur in a message;
+    the last one may be a prefix, so results update while typing.
+    """
+
+    VERSION = 2
+    # Write a new snapshot instead of appending once the log is this large relative to it
+    LOG_RATIO = 0.5
+
+    def __init__(self, path: Path):
+        """Initialize the index and load it from disk, starting empty if it is missing or unreadable."""
+        self.path = path
+        # id -> {"mtime_ns": ..., "docs": [document ids in message order]}
+        self.conversations: Dict[str, dict] = {}
+        # document id -> (conversation id, message position, role, length), or None once removed
+        self.docs: List[Tuple[str, int, str, int] | None] = []
+        # document id -> length in terms, for ranking without a tuple lookup
+        self.lengths = array("I")
+        self.postings: Dict[str, array] = {}
+        self.live_docs = 0
+        self.total_length = 0
+        self.generation = 0
+        # Changes not saved yet, as log records
+        self._pending: List[dict] = []
+        # The log can't be appended to (e.g. it ends in a partial line): write a snapshot
+        self._rewrite = False
+        self._snapshot_size = 0
+        self._log_size = 0
+        self._terms: List[str] | None = None
+        self._load()
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the index changed since it was last saved."""
+        return bool(self._pending) or self._rewrite
+
+    def _log_path(self, generation: int) -> Path:
+        """Get the change log that belongs to a snapshot generation."""
+        return self.path.with_suffix(f".{generation}.log")
+
+    def _load(self) -> None:
+        """Load the snapshot from disk and replay its change log."""
+        try:
+            with open(self.path) as f:
+                text = f.read()
+        except FileNotFoundError:
+            # Nothing but the log of an index that is still being built
+            self._replay_log()
+            return
+        except OSError:
+            return
+        try:
+            data = json.loads(text)
+            if data.get("version") != self.VERSION or data.get("byteorder") != sys.byteorder:
+                return
+            docs = [tuple(doc) if doc else None for doc in data["docs"]]
+            postings = {}
+            for term, encoded in data["postings"].items():
+                postings[term] = array("I")
+                postings[term].frombytes(base64.b64decode(encoded))
+            conversations = data["conversations"]
+            generation = data["generation"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        self.docs = docs
+        self.lengths = array("I", (doc[3] if doc else 0 for doc in docs))
+        self.postings = postings
+        self.conversations = conversations
+        self.live_docs = sum(1 for doc in docs if doc)
+        self.total_length = sum(doc[3] for doc in docs if doc)
+        self.generation = generation
+        self._snapshot_size = len(text)
+        self._replay_log()
+
+    def _replay_log(self) -> None:
+        """Apply the changes logged since the snapshot was written."""
+        try:
+            with open(self._log_path(self.generation)) as f:
+                text = f.read()
+        except OSError:
+            return
+        self._log_size = len(text)
+        lines = text.split("\n")
+        for line in lines:
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A save was interrupted; nothing can be appended after it
+                self._rewrite = True
+                break
+            self._apply(record)
+        if lines[-1]:
+            self._rewrite = True
+
+    def save(self, snapshot: bool = True) -> None:
+        """
+        Write the changes since the last save.
+
+        They are appended to the change log, or, once the log has grown
+        large relative to the snapshot, written as a new compacted snapshot.
+
+        Args:
+            snapshot: Allow writing a snapshot; pass False while many
+                changes are still to come, e.g. during a first build
+        """
+        if not self.dirty:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in self._pending)
+        if self._rewrite or (
+            snapshot and self._log_size + len(lines) > self._snapshot_size * self.LOG_RATIO
+        ):
+            self._write_snapshot()
+        else:
+            with open(self._log_path(self.generation), "a") as f:
+                f.write(lines)
+            self._log_size += len(lines)
+        self._pending = []
+        self._rewrite = False
+
+    def _write_snapshot(self) -> None:
+        """Compact the index and write it as the next snapshot generation, replacing the old snapshot and log."""
+        self.compact()
+        old_log = self._log_path(self.generation)
+        self.generation += 1
+        # Left over from an older index that was discarded
+        self._log_path(self.generation).unlink(missing_ok=True)
+        text = json.dumps({
+            "version": self.VERSION,
+            "byteorder": sys.byteorder,
+            "generation": self.generation,
+            "conversations": self.conversations,
+            "docs": self.docs,
+            "postings": {
+                term: base64.b64encode(postings.tobytes()).decode("ascii")
+                for term, postings in self.postings.items()
+            },
+        })
+        atomic_write(self.path, text)
+        old_log.unlink(missing_ok=True)
+        self._snapshot_size = len(text)
+        self._log_size = 0
+
+    def compact(self) -> None:
+        """Renumber documents to drop removed ones and their postings."""
+        if self.live_docs == len(self.docs):
+            return
+        renumber = {}
+        docs = []
+        for doc_id, doc in enumerate(self.docs):
+            if doc:
+                renumber[doc_id] = len(docs)
+                docs.append(doc)
+        postings = {}
+        for term, entries in self.postings.items():
+            kept = array("I")
+            it = iter(entries)
+            for doc_id, tf in zip(it, it):
+                if doc_id in renumber:
+                    kept.append(renumber[doc_id])
+                    kept.append(tf)
+            if kept:
+                postings[term] = kept
+        for entry in self.conversations.values():
+            entry["docs"] = [renumber[doc_id] for doc_id in entry["docs"]]
+        self.docs = docs
+        self.lengths = array("I", (doc[3] for doc in docs))
+        self.postings = postings
+        self._terms = None
+
+    def _add(self, conversation_id: str, position: int, role: str, counts: Dict[str, int]) -> int:
+        """Index one message, given its term frequencies, as a new document."""
+        doc_id = len(self.docs)
+        length = sum(counts.values())
+        for term, tf in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array("I")
+                self._terms = None
+            postings.append(doc_id)
+            postings.append(tf)
+        self.docs.append((conversation_id, position, role, length))
+        self.lengths.append(length)
+        self.live_docs += 1
+        self.total_length += length
+        return doc_id
+
+    def _apply(self, record: dict) -> None:
+        """Apply one change, as recorded in the log."""
+        conversation_id = record["id"]
+        if record["op"] == "remove":
+            self._remove(conversation_id)
+            return
+        entry = self.conversations.get(conversation_id)
+        if entry is None or record["reset"]:
+            self._remove(conversation_id)
+            entry = self.conversations[conversation_id] = {"mtime_ns": record["mtime_ns"], "docs": []}
+        for position, (role, counts) in enumerate(record["docs"], len(entry["docs"])):
+            entry["docs"].append(self._add(conversation_id, position, role, counts))
+        entry["mtime_ns"] = record["mtime_ns"]
+
+    def _record(self, record: dict) -> None:
+        """Apply a change and keep it for the next save."""
+        self._apply(record)
+        self._pending.append(record)
+
+    def update(self, conversation: Conversation, mtime_ns: int, reindex: bool = False) -> None:
+        """
+        Index the messages of a conversation that are not indexed yet.
+
+        Messages are assumed to be append-only; if the conversation has
+        fewer messages than indexed, or with ``reindex``, it is re-indexed
+        as a whole.
+        """
+        entry = self.conversations.get(conversation.id)
+        reset = reindex or entry is None or len(entry["docs"]) > len(conversation.messages)
+        start = 0 if reset else len(entry["docs"])
+        messages = conversation.messages
+        if isinstance(messages, LazyMessages) and not messages.decoded:
+            # Index straight from the stored records instead of decoding every message
+            new_messages = ((r["role"], r["content"]) for r in islice(messages.iter_records(), start, None))
+        else:
+            new_messages = ((m.role, m.content) for m in messages[start:])
+        docs = []
+        for role, content in new_messages:
+            counts: Dict[str, int] = {}
+            for term in tokenize(content):
+                counts[term] = counts.get(term, 0) + 1
+            docs.append((role, counts))
+        self._record({"op": "add", "id": conversation.id, "mtime_ns": mtime_ns, "reset": reset, "docs": docs})
+
+    def remove(self, conversation_id: str) -> None:
+        """Drop a conversation's messages from the index."""
+        if conversation_id in self.conversations:
+            self._record({"op": "remove", "id": conversation_id})
+
+    def _remove(self, conversation_id: str) -> None:
+        """Tombstone a conversation's documents."""
+        entry = self.conversations.pop(conversation_id, None)
+        if entry is None:
+            return
+        for doc_id in entry["docs"]:
+            doc = self.docs[doc_id]
+            if doc:
+                self.docs[doc_id] = None
+                self.live_docs -= 1
+                self.total_length -= doc[3]
+
+    def sync(
+        self,
+        mtimes: Dict[str, int],
+        load: Callable[[str], Conversation | None],
+        deadline: float | None = None,
+    ) -> int:
+        """
+        Bring the index in line with the stored conversations.
+
+        Args:
+            mtimes: Modification time (ns) of every stored conversation, by id
+            load: Loads a conversation, or returns None if it is gone
+            deadline: Stop re-indexing at this ``time.monotonic()``; the
+                index can be searched meanwhile and the next call continues
+
+        Returns:
+            The number of conversations still to be re-indexed
+        """
+        for conversation_id in [c for c in self.conversations if c not in mtimes]:
+            self.remove(conversation_id)
+        outdated = [
+            conversation_id for conversation_id, mtime_ns in mtimes.items()
+            if self.conversations.get(conversation_id, {}).get("mtime_ns") != mtime_ns
+        ]
+        for done, conversation_id in enumerate(outdated):
+            if deadline is not None and time.monotonic() >= deadline:
+                return len(outdated) - done
+            try:
+                conversation = load(conversation_id)
+            except Exception:
+                conversation = None
+            if conversation is not None:
+                # Changed by something else, possibly in place
+                self.update(conversation, mtimes[conversation_id], reindex=True)
+            else:
+                # Unreadable: index it as empty rather than retrying on every search
+                self._record({
+                    "op": "add", "id": conversation_id, "mtime_ns": mtimes[conversation_id],
+                    "reset": True, "docs": [],
+                })
+        return 0
+
+    def _matches(self, word: str, prefix: bool) -> Dict[int, int]:
+        """Get the live documents containing a term (or any term with the prefix) and its frequency in each."""
+        if prefix:
+            if self._terms is None:
+                self._terms = sorted(self.postings)
+            start = bisect_left(self._terms, word)
+            terms = []
+            for term in self._terms[start:]:
+                if not term.startswith(word):
+                    break
+                terms.append(term)
+            terms.sort(key=lambda t: (t != word, -len(self.postings[t])))
+            budget = MAX_PREFIX_POSTINGS * 2
+            for i, term in enumerate(terms):
+                budget -= len(self.postings[term])
+                if budget < 0:
+                    del terms[max(i, 1):]
+                    break
+        else:
+            terms = [word] if word in self.postings else []
+
+        if len(terms) == 1 and self.live_docs == len(self.docs):
+            # Common case: nothing to merge or filter
+            it = iter(self.postings[terms[0]])
+            return dict(zip(it, it))
+        docs = self.docs
+        matches: Dict[int, int] = {}
+        for term in terms:
+            it = iter(self.postings[term])
+            for doc_id, tf in zip(it, it):
+                if docs[doc_id]:
+                    matches[doc_id] = matches.get(doc_id, 0) + tf
+        return matches
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[float, str, int, str]]:
+        """
+        Find the messages best matching a query.
+
+        Returns:
+            (score, conversation id, message position, role) tuples, best first
+        """
+        words = tokenize(query)
+        if not words or not self.live_docs:
+            return []
+        # Rarest term first, so the candidate set starts small
+        matches = sorted(
+            (self._matches(word, prefix=i == len(words) - 1) for i, word in enumerate(words)),
+            key=len,
+        )
+        candidates = matches[0].keys()
+        for other in matches[1:]:
+            candidates = candidates & other.keys()
+            if not candidates:
+                return []
+
+        # BM25: tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+        average_length = self.total_length / self.live_docs or 1.0
+        norm_base = K1 * (1 - B)
+        norm_scale = K1 * B / average_length
+        lengths = self.lengths
+        idfs = [
+            math.log(1 + (self.live_docs - len(m) + 0.5) / (len(m) + 0.5)) * (K1 + 1)
+            for m in matches
+        ]
+        if len(matches) == 1:
+            idf = idfs[0]
+            scored = [
+                (idf * tf / (tf + norm_base + norm_scale * lengths[doc_id]), doc_id)
+                for doc_id, tf in matches[0].items()
+            ]
+        else:
+            scored = []
+            for doc_id in candidates:
+                norm = norm_base + norm_scale * lengths[doc_id]
+                score = 0.0
+                for idf, m in zip(idfs, matches):
+                    tf = m[doc_id]
+                    score += idf * tf / (tf + norm)
+                scored.append((score, doc_id))
+
+        results = []
+        for score, doc_id in heapq.nlargest(limit, scored):
+            conversation_id, position, role, _ = self.docs[doc_id]
+            results.append((score, conversation_id, position, role))
+        return results
@@ -0,0 +1,313 @@
+"""SQLite conversation storage with full-text search."""
+import json
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from ..models.conversation import Conversation
+from ..models.conversation_summary import ConversationSummary
+from ..models.lazy_messages import LazyMessages
+from ..models.message import Message
+from ..models.search_result import SearchResult
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    model TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS conversations_updated_at ON conversations (updated_at DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    model TEXT,
+    extra TEXT,
+    UNIQUE (conversation_id, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (
+    content, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses them
+UPSERT_CONVERSATION = """
+INSERT INTO conversations (id, title, model, created_at, updated_at, message_count, size)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title,
+    model = excluded.model,
+    updated_at = excluded.updated_at,
+    message_count = excluded.message_count,
+    size = excluded.size
+"""
+INSERT_MESSAGE = """
+INSERT INTO messages (conversation_id, position, role, content, timestamp, model, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+STORED_COUNTS = "SELECT message_count, size FROM conversations WHERE id = ?"
+COUNT_MESSAGES = """
+SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM messages
+WHERE conversation_id = ?
+"""
+TRIM_MESSAGES = "DELETE FROM messages WHERE conversation_id = ? AND position >= ?"
+SELECT_CONVERSATION = "SELECT id, title, model, created_at, updated_at FROM conversations WHERE id = ?"
+SELECT_MESSAGES = """
+SELECT role, content, timestamp, model, extra FROM messages
+WHERE conversation_id = ? ORDER BY position
+"""
+LIST_CONVERSATIONS = """
+SELECT id, title, model, created_at, updated_at, message_count, size FROM conversations
+ORDER BY updated_at DESC LIMIT ? OFFSET ?
+"""
+DELETE_CONVERSATION = "DELETE FROM conversations WHERE id = ?"
+SEARCH = """
+SELECT m.conversation_id, c.title, m.position, m.role,
+       snippet(messages_fts, 0, '', '', '…', 16), bm25(messages_fts)
+FROM messages_fts
+JOIN messages m ON m.id = messages_fts.rowid
+JOIN conversations c ON c.id = m.conversation_id
+WHERE messages_fts MATCH ?
+ORDER BY bm25(messages_fts)
+LIMIT ?
+"""
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SQLiteConversationStorage:
+    """
+    Conversation storage in a single SQLite database.
+
+    Offers the same operations as ``ConversationStorage`` plus paging and
+    full-text search. The database runs in WAL mode with a busy timeout, so
+    several cmdAI instances can read and write it at the same time. Saving
+    inserts only the messages that are not stored yet; messages are assumed
+    to be append-only, like in the JSON Lines storage.
+
+    The connection may be used from any thread; a lock serializes access.
+    """
+
+    def __init__(self, path: Path, timeout: float = 5.0, fsync: bool = False):
+        """
+        Open (and if needed create) the database.
+
+        Args:
+            path: Database file
+            timeout: Seconds to wait for another process's write lock
+            fsync: Sync every commit to disk (synchronous=FULL) instead of
+                only at WAL checkpoints, so the last commits survive a power
+                loss (slower)
+        """
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute(f"PRAGMA synchronous = {'FULL' if fsync else 'NORMAL'}")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self.conn.close()
+
+    def get_meta(self, key: str) -> str | None:
+        """Read a value from the database's key/value metadata table."""
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Write a value to the database's key/value metadata table."""
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    @staticmethod
+    def _message_row(conversation_id: str, position: int, message: Message) -> tuple:
+        """Convert a message into a row of the messages table."""
+        data = message.to_dict()
+        extra = {
+            key: value for key, value in data.items()
+            if key not in ("role", "content", "timestamp", "model") and value
+        }
+        return (
+            conversation_id,
+            position,
+            data["role"],
+            data["content"],
+            data["timestamp"],
+            data["model"],
+            json.dumps(extra) if extra else None,
+        )
+
+    def save_conversation(self, conversation: Conversation) -> None:
+        """Save a conversation, inserting only messages that are not stored yet."""
+        self.save_conversations([conversation])
+
+    def save_conversations(self, conversations: Iterable[Conversation]) -> int:
+        """
+        Save several conversations in a single transaction.
+
+        Returns:
+            The number of conversations saved
+        """
+        count = 0
+        with self._transaction():
+            for conversation in conversations:
+                self._save(conversation)
+                count += 1
+        return count
+
+    def _save(self, conversation: Conversation) -> None:
+        """Write one conversation inside an open transaction."""
+        header = conversation.to_header_dict()
+        stored, size = self.conn.execute(STORED_COUNTS, (conversation.id,)).fetchone() or (0, 0)
+        if stored > len(conversation.messages):
+            self.conn.execute(TRIM_MESSAGES, (conversation.id, len(conversation.messages)))
+            stored, size = self.conn.execute(COUNT_MESSAGES, (conversation.id,)).fetchone()
+        new_messages = conversation.messages[stored:]
+        size += sum(len(m.content.encode()) for m in new_messages)
+
+        self.conn.execute(UPSERT_CONVERSATION, (
+            header["id"],
+            header["title"],
+            header["model"],
+            header["created_at"],
+            header["updated_at"],
+            len(conversation.messages),
+            size,
+        ))
+        self.conn.executemany(INSERT_MESSAGE, (
+            self._message_row(conversation.id, stored + i, message)
+            for i, message in enumerate(new_messages)
+        ))
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in an immediate transaction, so concurrent writers wait instead of failing."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def load_conversation(self, conversation_id: str) -> Conversation | None:
+        """Load a conversation with all its messages, which are decoded on first access."""
+        with self._lock:
+            row = self.conn.execute(SELECT_CONVERSATION, (conversation_id,)).fetchone()
+            if row is None:
+                return None
+            rows = self.conn.execute(SELECT_MESSAGES, (conversation_id,)).fetchall()
+        records = []
+        for role, content, timestamp, model, extra in rows:
+            data = {"role": role, "content": content, "timestamp": timestamp, "model": model}
+            if extra:
+                data.update(json.loads(extra))
+            records.append(data)
+        return Conversation(
+            id=row[0],
+            title=row[1],
+            messages=LazyMessages(records),
+            created_at=datetime.fromisoformat(row[3]),
+            updated_at=datetime.fromisoformat(row[4]),
+            model=row[2] or "llama2",
+        )
+
+    def list_conversations(self, limit: int | None = None, offset: int = 0) -> List[ConversationSummary]:
+        """List saved conversations, most recently updated first, optionally one page at a time."""
+        with self._lock:
+            rows = self.conn.execute(LIST_CONVERSATIONS, (-1 if limit is None else limit, offset)).fetchall()
+        return [
+            ConversationSummary(
+                id=row[0],
+                title=row[1],
+                model=row[2] or "llama2",
+                created_at=datetime.fromisoformat(row[3]),
+                updated_at=datetime.fromisoformat(row[4]),
+                message_count=row[5],
+                size=row[6],
+            )
+            for row in rows
+        ]
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        """Delete a conversation and its messages."""
+        with self._transaction():
+            cursor = self.conn.execute(DELETE_CONVERSATION, (conversation_id,))
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _match_query(query: str) -> str | None:
+        """Turn free text into an FTS5 query: all words must match, the last one as a prefix."""
+        words = WORD_RE.findall(query)
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    @property
+    def search_pending(self) -> int:
+        """Get the number of conversations not searchable yet; the full-text index is always up to date."""
+        return 0
+
+    def search(self, query: str, limit: int = 50) -> List[SearchResult]:
+        """
+        Search message contents, best matches first.
+
+        Args:
+            query: Free text; every word must occur in the message, the last
+                one may be a prefix (so results update while typing)
+            limit: Maximum number of results
+        """
+        match = self._match_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self.conn.execute(SEARCH, (match, limit)).fetchall()
+        return [
+            SearchResult(
+                conversation_id=row[0],
+                title=row[1],
+                message_index=row[2],
+                role=row[3],
+                snippet=row[4],
+                score=-row[5],
+            )
+            for row in rows
+        ]
+
@@ -0,0 +1,94 @@
+"""Background thread for storage writes."""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class BackgroundWriter:
+    """
+    Runs storage writes on a background thread so the UI never waits on disk.
+
+    Jobs are submitted under a key. A job whose key already has a job
+    waiting replaces it, so repeated saves of the same conversation collapse
+    into the latest one. Jobs for different keys run in submission order.
+    Failed jobs are counted and the last error is kept; they never stop the
+    writer.
+    """
+
+    def __init__(self, name: str = "storage-writer"):
+        """Initialize the writer; its thread starts with the first job."""
+        self.name = name
+        self.written = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.last_error: Exception | None = None
+        self._pending: OrderedDict[Hashable, Callable[[], None]] = OrderedDict()
+        self._running: Hashable | None = None
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, key: Hashable, job: Callable[[], None]) -> None:
+        """
+        Queue a write, replacing any queued write with the same key.
+
+        The job must not depend on state the caller keeps changing, i.e. it
+        should capture a snapshot of what it writes.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Writer is closed")
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until every queued write has finished.
+
+        Returns:
+            False if the timeout expired first
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and self._running is None, timeout
+            )
+
+    def close(self, timeout: float | None = None) -> bool:
+        """
+        Finish all queued writes and stop the thread.
+
+        Returns:
+            False if the timeout expired before the writes finished
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self) -> None:
+        """Writer thread: run queued jobs until closed and drained."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                key, job = self._pending.popitem(last=False)
+                self._running = key
+            try:
+                job()
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                self.last_error = e
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
@@ -0,0 +1,78 @@
+"""Shared fixtures: provider clients talk to httpx.MockTransport handlers instead of the network, storages to temporary directories."""
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from cmdai_terminal.models.conversation import Conversation
+from cmdai_terminal.models.message import Message
+from cmdai_terminal.storage.history import ConversationStorage
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def ndjson(*chunks: dict) -> bytes:
+    """Encode Ollama stream chunks as NDJSON."""
+    return b"".join(json.dumps(chunk).encode() + b"\n" for chunk in chunks)
+
+
+def ollama_reply(*texts: str) -> bytes:
+    """An Ollama chat stream answering with the given pieces of text."""
+    return ndjson(
+        *({"message": {"role": "assistant", "content": text}, "done": False} for text in texts),
+        {"message": {"role": "assistant", "content": ""}, "done": True,
+         "done_reason": "stop", "prompt_eval_count": 3, "eval_count": len(texts)},
+    )
+
+
+@pytest.fixture
+def use_transport():
+    """Route a provider client's requests to a handler: ``use_transport(client, handler)``."""
+    def install(client, handler) -> None:
+        # Same base URL, headers and timeouts as the client's own, no sockets
+        http = client.http
+        client._http = httpx.AsyncClient(
+            base_url=http.base_url,
+            headers=http.headers,
+            timeout=http.timeout,
+            transport=httpx.MockTransport(handler),
+        )
+    return install
+
+
+def make_conversation(turns: int = 2, content: str = "message", **kwargs) -> Conversation:
+    """A conversation alternating user and assistant messages."""
+    conversation = Conversation(model="llama2", **kwargs)
+    for i in range(turns):
+        conversation.add_message(Message(
+            role="user" if i % 2 == 0 else "assistant",
+            content=f"{content} {i}",
+            timestamp=START + timedelta(seconds=i),
+            model=None if i % 2 == 0 else "llama2",
+        ))
+    return conversation
+
+
+def assert_same(loaded: Conversation, conversation: Conversation) -> None:
+    assert loaded.to_dict() == conversation.to_dict()
+
+
+@pytest.fixture
+def storage_dir(tmp_path):
+    return tmp_path / "conversations"
+
+
+@pytest.fixture
+def open_json(storage_dir):
+    """Open storages on the same directory, closing them all at the end."""
+    opened = []
+
+    def open_one(**kwargs) -> ConversationStorage:
+        storage = ConversationStorage(storage_dir, **kwargs)
+        opened.append(storage)
+        return storage
+
+    yield open_one
+    for storage in opened:
+        storage.close()
@@ -0,0 +1,218 @@
+"""Switching conversations while a reply streams."""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from cmdai_terminal.api.events import ContentDelta
+from cmdai_terminal.app import CmdAITerminalApp
+from cmdai_terminal.components.chat_view import ChatView, MessageWidget
+from cmdai_terminal.components.input_box import InputBox
+from cmdai_terminal.components.sidebar import Sidebar
+from cmdai_terminal.models.conversation_summary import ConversationSummary
+from conftest import make_conversation, ollama_reply
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, use_transport):
+    """The app with its own home directory and an Ollama server that finishes replies when told to."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    app = CmdAITerminalApp()
+    app.response_closed = []
+    app.finish_reply = asyncio.Event()
+
+    def handler(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama2"}]})
+        first, *rest = ollama_reply("Once upon a time", " there was").splitlines(keepends=True)
+
+        async def body():
+            try:
+                yield first
+                # Keeps generating until finish_reply is set or the client hangs up
+                await app.finish_reply.wait()
+                for line in rest:
+                    yield line
+            finally:
+                app.response_closed.append(request.url.path)
+        return httpx.Response(200, content=body())
+
+    use_transport(app.client.ollama_client, handler)
+    return app
+
+
+async def start_reply(app, pilot, text: str) -> None:
+    """Send a message and wait until the first chunk of the reply has arrived."""
+    app.post_message(InputBox.SendMessage(text))
+    for _ in range(100):
+        await pilot.pause(0.02)
+        if app.active_stream is not None and app.active_stream.chunks:
+            return
+    raise AssertionError("no reply started streaming")
+
+
+async def wait_for_writes(app, pilot) -> None:
+    await asyncio.to_thread(app.writer.flush)
+    await pilot.pause()
+
+
+def test_new_conversation_mid_stream_keeps_reply_in_its_conversation(app, monkeypatch):
+    async def main():
+        async with app.run_test() as pilot:
+            await start_reply(app, pilot, "Tell me a story")
+            asked_in = app.current_conversation
+
+            app.action_new_conversation()
+            await pilot.pause(0.1)
+            scrolled = []
+            monkeypatch.setattr(ChatView, "scroll_to_bottom_if_near", lambda view: scrolled.append(view))
+
+            # The reply finishes in the background
+            app.finish_reply.set()
+            await app.workers.wait_for_complete()
+            await wait_for_writes(app, pilot)
+
+            # The new conversation is untouched
+            assert app.current_conversation is not asked_in
+            assert app.current_conversation.messages == []
+            assert not app.query_one(ChatView).query("MessageWidget, StreamingMessageWidget")
+            assert scrolled == []
+            assert app.active_stream is None
+            assert not app.query_one(InputBox).query_one("Input").disabled
+
+            # The whole reply went to the conversation it was asked in
+            saved = app.storage.load_conversation(asked_in.id)
+            assert [m.role for m in saved.messages] == ["user", "assistant"]
+            assert saved.messages[1].content == "Once upon a time there was"
+            assert not saved.messages[1].truncated
+            assert len(app.response_closed) == 1
+
+    asyncio.run(main())
+
+
+def test_selecting_another_conversation_mid_stream(app):
+    async def main():
+        async with app.run_test() as pilot:
+            await start_reply(app, pilot, "First question")
+            # Stopping hangs up on the server
+            await pilot.press("escape")
+            await pilot.pause(0.1)
+            await wait_for_writes(app, pilot)
+            assert len(app.response_closed) == 1
+            first = app.current_conversation
+
+            app.action_new_conversation()
+            await start_reply(app, pilot, "Second question")
+            second = app.current_conversation
+            [summary] = [s for s in app.storage.list_conversations() if s.id == first.id]
+
+            app.post_message(Sidebar.SelectConversation(summary))
+            await pilot.pause(0.1)
+            await wait_for_writes(app, pilot)
+
+            assert app.current_conversation.id == first.id
+            assert len(app.current_conversation.messages) == 2
+            assert len(app.query_one(ChatView).query(MessageWidget)) == 2
+            assert app.query_one(ChatView).query(MessageWidget)[1].message.truncated
+
+            # The second reply is saved with its own question only once it finishes
+            app.finish_reply.set()
+            await app.workers.wait_for_complete()
+            await wait_for_writes(app, pilot)
+            saved = app.storage.load_conversation(second.id)
+            assert [m.content for m in saved.messages] == ["Second question", "Once upon a time there was"]
+            assert not saved.messages[1].truncated
+            assert len(app.query_one(ChatView).query(MessageWidget)) == 2
+
+    asyncio.run(main())
+
+
+def test_failed_reply_keeps_its_text_with_the_error(app):
+    async def chat_stream(model, messages):
+        yield ContentDelta("Once upon")
+        raise RuntimeError("renderer crashed")
+
+    app.client.chat_stream = chat_stream
+
+    async def main():
+        async with app.run_test() as pilot:
+            app.post_message(InputBox.SendMessage("Tell me a story"))
+            await pilot.pause(0.1)
+            await app.workers.wait_for_complete()
+            await wait_for_writes(app, pilot)
+
+            [_, reply] = app.storage.load_conversation(app.current_conversation.id).messages
+            assert reply.content == "Once upon"
+            assert reply.error == "renderer crashed"
+            assert app.current_conversation.messages[1].error == "renderer crashed"
+            assert not app.query_one(InputBox).query_one("Input").disabled
+
+    asyncio.run(main())
+
+
+def test_models_of_an_endpoint_down_at_startup_appear_once_it_answers(tmp_path, monkeypatch, use_transport):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    app = CmdAITerminalApp()
+    up = False
+
+    def handler(request):
+        if not up:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"models": [{"name": "mistral"}]})
+
+    use_transport(app.client.ollama_client, handler)
+
+    async def main():
+        nonlocal up
+        async with app.run_test() as pilot:
+            await app.workers.wait_for_complete()
+            assert app.undiscovered_sources == set(app.client.sources)
+            assert "mistral" not in app.available_models
+
+            up = True
+            await app.probe_providers()
+            await wait_for_writes(app, pilot)
+            assert app.available_models == ["mistral"]
+            assert not app.undiscovered_sources
+            assert [m.name for m in app.model_cache.models(app.client.sources)] == ["mistral"]
+
+    asyncio.run(main())
+
+
+def test_opening_a_conversation_does_not_wait_for_busy_storage(app):
+    stored = make_conversation(2)
+    app.storage.save_conversation(stored)
+    release = threading.Event()
+    held = threading.Event()
+
+    def hold_storage():
+        # Like a long save or archive batch on the writer thread
+        with app.storage._lock:
+            held.set()
+            release.wait(5)
+
+    async def main():
+        async with app.run_test() as pilot:
+            holder = threading.Thread(target=hold_storage)
+            holder.start()
+            held.wait(5)
+            try:
+                app.post_message(Sidebar.SelectConversation(ConversationSummary.from_conversation(stored)))
+                app.refresh_conversation_list()
+                await pilot.pause(0.1)
+                # The UI keeps running while the load waits for the storage
+                assert app.current_conversation.id != stored.id
+                await pilot.press("ctrl+n")
+            finally:
+                release.set()
+                holder.join()
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+
+            assert app.current_conversation.id == stored.id
+            assert len(app.query_one(ChatView).query(MessageWidget)) == 2
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""Crash-safe file writes."""
+import threading
+
+import pytest
+
+from cmdai_terminal.storage.atomic import atomic_write
+
+
+def test_replaces_the_content(tmp_path):
+    path = tmp_path / "sub" / "config.yaml"
+    atomic_write(path, "first")
+    atomic_write(path, b"second", fsync=True)
+    assert path.read_text() == "second"
+    assert [p.name for p in path.parent.iterdir()] == ["config.yaml"]
+
+
+def test_concurrent_writers_do_not_collide(tmp_path):
+    path = tmp_path / "index.json"
+    errors = []
+
+    def write(text: str) -> None:
+        try:
+            for _ in range(50):
+                atomic_write(path, text * 1000)
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=write, args=(text,)) for text in "abcd"]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert errors == []
+    content = path.read_text()
+    assert content in {text * 1000 for text in "abcd"}
+    assert [p.name for p in tmp_path.iterdir()] == ["index.json"]
+
+
+def test_failed_write_leaves_the_file_and_no_temporary(tmp_path):
+    path = tmp_path / "config.yaml"
+    atomic_write(path, "kept")
+    with pytest.raises(TypeError):
+        atomic_write(path, 42)
+    assert path.read_text() == "kept"
+    assert [p.name for p in tmp_path.iterdir()] == ["config.yaml"]
@@ -0,0 +1,126 @@
+"""Storing large message bodies once in the blob store."""
+import os
+import time
+
+from cmdai_terminal.storage.history import ConversationStorage
+from conftest import assert_same, make_conversation
+
+
+def age(path, seconds: float) -> None:
+    """Make a file look as if it was last written this long ago."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def blob_files(storage: ConversationStorage) -> list:
+    return [p for p in storage.blobs.directory.rglob("*") if p.is_file() and p.name != "refs.json"]
+
+
+def test_large_bodies_are_stored_once(open_json):
+    storage = open_json(blob_threshold=100)
+    pasted = "x" * 1000
+    first = make_conversation(2, content=pasted)
+    second = make_conversation(2, content=pasted)
+    for conversation in (first, second):
+        storage.save_conversation(conversation)
+
+    blobs = blob_files(storage)
+    assert len(blobs) == 2
+    assert all(storage.blobs.refcounts[p.name] == 2 for p in blobs)
+    assert pasted not in storage._path(first.id).read_text()
+    assert_same(open_json(blob_threshold=100).load_conversation(first.id), first)
+
+    # Blobs go once the last conversation referencing them does
+    storage.delete_conversation(first.id)
+    assert all(p.exists() for p in blobs)
+    assert_same(open_json(blob_threshold=100).load_conversation(second.id), second)
+    storage.delete_conversation(second.id)
+    assert not any(p.exists() for p in blobs)
+
+
+def test_garbage_collection_keeps_referenced_blobs(open_json):
+    storage = open_json(blob_threshold=100)
+    conversation = make_conversation(1, content="y" * 200)
+    storage.save_conversation(conversation)
+    orphan = storage.blobs.directory / "00" / ("0" * 64)
+    orphan.parent.mkdir(parents=True, exist_ok=True)
+    orphan.write_text("left behind by a crash")
+    age(orphan, 7200)
+
+    assert storage.collect_garbage() == 1
+    assert not orphan.exists()
+    assert_same(open_json(blob_threshold=100).load_conversation(conversation.id), conversation)
+
+
+def test_instances_sharing_the_store_keep_each_others_references(open_json):
+    first = open_json(blob_threshold=100)
+    second = open_json(blob_threshold=100)
+    theirs = make_conversation(1, content="b" * 500)
+    second.save_conversation(theirs)
+    ours = make_conversation(1, content="a" * 500)
+    first.save_conversation(ours)
+    for path in blob_files(first):
+        age(path, 7200)
+
+    # A restart's garbage collection sees the references of both
+    assert open_json(blob_threshold=100).collect_garbage() == 0
+    assert_same(open_json(blob_threshold=100).load_conversation(theirs.id), theirs)
+
+
+def test_delete_keeps_a_body_another_instance_still_references(open_json):
+    first = open_json(blob_threshold=100)
+    second = open_json(blob_threshold=100)
+    pasted = "s" * 500
+    theirs = make_conversation(1, content=pasted)
+    second.save_conversation(theirs)
+    ours = make_conversation(1, content=pasted)
+    first.save_conversation(ours)
+
+    first.delete_conversation(ours.id)
+    assert len(blob_files(first)) == 1
+    assert_same(open_json(blob_threshold=100).load_conversation(theirs.id), theirs)
+    second.delete_conversation(theirs.id)
+    assert blob_files(second) == []
+
+
+def test_save_rewrites_a_body_another_instance_deleted_meanwhile(open_json, monkeypatch):
+    first = open_json(blob_threshold=100)
+    second = open_json(blob_threshold=100)
+    pasted = "r" * 500
+    ours = make_conversation(1, content=pasted)
+    first.save_conversation(ours)
+    theirs = make_conversation(1, content=pasted)
+    write = second.blobs._write
+
+    def write_then_lose_the_race(content):
+        digest = write(content)
+        # The other instance drops the last reference before ours is recorded
+        first.delete_conversation(ours.id)
+        assert blob_files(first) == []
+        return digest
+
+    monkeypatch.setattr(second.blobs, "_write", write_then_lose_the_race)
+    second.save_conversation(theirs)
+    assert len(blob_files(second)) == 1
+    assert_same(open_json(blob_threshold=100).load_conversation(theirs.id), theirs)
+
+
+def test_delete_keeps_a_body_referenced_after_the_table_was_saved(open_json, monkeypatch):
+    first = open_json(blob_threshold=100)
+    second = open_json(blob_threshold=100)
+    pasted = "t" * 500
+    ours = make_conversation(1, content=pasted)
+    first.save_conversation(ours)
+    theirs = make_conversation(1, content=pasted)
+    save = first.blobs._save
+
+    def save_then_lose_the_race():
+        save()
+        monkeypatch.setattr(first.blobs, "_save", save)
+        # The other instance references the body before ours is deleted
+        second.save_conversation(theirs)
+
+    monkeypatch.setattr(first.blobs, "_save", save_then_lose_the_race)
+    first.delete_conversation(ours.id)
+    assert len(blob_files(second)) == 1
+    assert_same(open_json(blob_threshold=100).load_conversation(theirs.id), theirs)
@@ -0,0 +1,40 @@
+"""Cancelling a streamed chat response."""
+import asyncio
+
+import httpx
+
+from cmdai_terminal.api.ollama import OllamaClient
+from cmdai_terminal.api.stream_reader import StreamReader
+from conftest import ollama_reply
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_cancel_closes_the_response(use_transport):
+    async def main():
+        response_closed = asyncio.Event()
+
+        async def body():
+            try:
+                yield ollama_reply("partial").split(b"\n")[0] + b"\n"
+                # The model keeps generating until the client goes away
+                await asyncio.sleep(60)
+            finally:
+                response_closed.set()
+
+        client = OllamaClient("http://ollama")
+        use_transport(client, lambda request: httpx.Response(200, content=body()))
+        try:
+            reader = StreamReader(client.chat_stream("llama2", MESSAGES)).start()
+            received = await anext(reader)
+            reader.cancel()
+            rest = [text async for text in reader]
+            await asyncio.wait_for(response_closed.wait(), 1)
+            return received, rest, reader
+        finally:
+            await client.aclose()
+
+    received, rest, reader = asyncio.run(main())
+    assert received == "partial"
+    assert rest == []
+    assert reader.cancelled
@@ -0,0 +1,215 @@
+"""Circuit breakers and failover between provider endpoints."""
+import asyncio
+
+import httpx
+
+from cmdai_terminal.api.circuit_breaker import CircuitBreaker
+from cmdai_terminal.api.events import ContentDelta, StreamError, Usage
+from cmdai_terminal.api.retry import RetryPolicy
+from cmdai_terminal.api.unified_client import UnifiedClient
+from conftest import ollama_reply
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_after_threshold():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed probe re-opens it for another reset_timeout
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_breaker_release_frees_the_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def make_client(**kwargs) -> UnifiedClient:
+    return UnifiedClient(
+        ollama_base_url="http://gpu-1",
+        ollama_timeout=5,
+        ollama_endpoints=["http://gpu-1", "http://gpu-2"],
+        retry_policy=RetryPolicy(max_retries=0),
+        breaker_failure_threshold=2,
+        breaker_reset_timeout=10,
+        **kwargs,
+    )
+
+
+def test_stream_fails_over_to_healthy_endpoint(use_transport):
+    calls = {"http://gpu-1": 0, "http://gpu-2": 0}
+
+    def down(request):
+        calls["http://gpu-1"] += 1
+        raise httpx.ConnectError("refused", request=request)
+
+    def up(request):
+        calls["http://gpu-2"] += 1
+        return httpx.Response(200, content=ollama_reply("hello"))
+
+    async def main():
+        client = make_client()
+        first, second = client.endpoints
+        use_transport(first.client, down)
+        use_transport(second.client, up)
+        try:
+            runs = []
+            for _ in range(3):
+                runs.append([event async for event in client.chat_stream("llama2", MESSAGES)])
+            return client, runs
+        finally:
+            await client.aclose()
+
+    client, runs = asyncio.run(main())
+    for events in runs:
+        assert [e.text for e in events if isinstance(e, ContentDelta)] == ["hello"]
+        usage = [e for e in events if isinstance(e, Usage)]
+        assert usage[0].endpoint == "http://gpu-2"
+    # Two failures open gpu-1's breaker, after which it is skipped
+    assert calls["http://gpu-1"] == 2
+    assert client.endpoints[0].breaker.state == CircuitBreaker.OPEN
+    assert client.unavailable_endpoints == [client.endpoints[0]]
+    assert all(e.in_flight == 0 for e in client.endpoints)
+
+
+def test_stream_reports_error_when_every_endpoint_is_down(use_transport):
+    def down(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def main():
+        client = make_client()
+        for endpoint in client.endpoints:
+            use_transport(endpoint.client, down)
+        try:
+            failed = [event async for event in client.chat_stream("llama2", MESSAGES)]
+            failed_again = [event async for event in client.chat_stream("llama2", MESSAGES)]
+            # Both breakers are open now: fail fast without a request
+            unavailable = [event async for event in client.chat_stream("llama2", MESSAGES)]
+            return client, failed, failed_again, unavailable
+        finally:
+            await client.aclose()
+
+    client, failed, failed_again, unavailable = asyncio.run(main())
+    assert isinstance(failed[-1], StreamError) and "connect" in failed[-1].message.lower()
+    assert isinstance(failed_again[-1], StreamError)
+    assert isinstance(unavailable[-1], StreamError) and "unavailable" in unavailable[-1].message
+    assert client.unavailable_models(["llama2"]) == ["llama2"]
+
+
+def test_unknown_model_does_not_open_the_breaker(use_transport):
+    def not_found(request):
+        return httpx.Response(404, json={"error": "model not found"})
+
+    async def main():
+        client = make_client()
+        for endpoint in client.endpoints:
+            use_transport(endpoint.client, not_found)
+        try:
+            for _ in range(3):
+                [event async for event in client.chat_stream("missing", MESSAGES)]
+            return client
+        finally:
+            await client.aclose()
+
+    client = asyncio.run(main())
+    assert all(e.breaker.state == CircuitBreaker.CLOSED for e in client.endpoints)
+
+
+def test_probe_closes_recovered_breaker(use_transport):
+    clock = FakeClock()
+    healthy = False
+
+    def handler(request):
+        if not healthy:
+            raise httpx.ConnectError("refused", request=request)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama2"}]})
+        return httpx.Response(200, content=ollama_reply("back"))
+
+    async def main():
+        nonlocal healthy
+        client = make_client()
+        endpoint = client.endpoints[0]
+        endpoint.breaker.clock = clock
+        use_transport(endpoint.client, handler)
+        try:
+            endpoint.breaker.record_failure()
+            endpoint.breaker.record_failure()
+            # Still open: nothing is due for a probe
+            assert [catalog async for catalog in client.probe()] == []
+            clock.now = 10
+            healthy = True
+            return client, [catalog async for catalog in client.probe()]
+        finally:
+            await client.aclose()
+
+    client, recovered = asyncio.run(main())
+    [(source, models, _)] = recovered
+    assert source == "ollama@http://gpu-1"
+    assert [m.name for m in models] == ["llama2"]
+    assert client.endpoints[0].breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_retries_failed_discovery_below_the_threshold(use_transport):
+    healthy = False
+
+    def handler(request):
+        if not healthy:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"models": [{"name": "mistral"}]})
+
+    async def main():
+        nonlocal healthy
+        client = make_client()
+        endpoint = client.endpoints[0]
+        use_transport(endpoint.client, handler)
+        try:
+            discovered = [c async for c in client.iter_model_catalogs(sources=[endpoint.key])]
+            # One failure leaves the breaker closed: only an explicit retry probes it
+            assert endpoint.breaker.state == CircuitBreaker.CLOSED
+            assert [c async for c in client.probe()] == []
+            healthy = True
+            return discovered, [c async for c in client.probe(retry=[endpoint.key])]
+        finally:
+            await client.aclose()
+
+    discovered, retried = asyncio.run(main())
+    assert discovered == []
+    [(source, models, _)] = retried
+    assert source == "ollama@http://gpu-1"
+    assert [m.name for m in models] == ["mistral"]
@@ -0,0 +1,119 @@
+"""Packing untouched conversations into the compressed cold tier."""
+import os
+import time
+
+from cmdai_terminal.models.conversation import Conversation
+from cmdai_terminal.models.message import Message
+from cmdai_terminal.storage.cold_pack import ColdPack
+from cmdai_terminal.storage.history import ConversationStorage
+from conftest import START, assert_same, make_conversation
+
+
+def make_cold(storage: ConversationStorage, conversation: Conversation) -> None:
+    """Make a saved conversation look untouched for two days."""
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(storage._path(conversation.id), (two_days_ago, two_days_ago))
+    # Files changed in place are only noticed by a full re-check
+    storage._refresh_index(full=True)
+
+
+def test_cold_archive_round_trip(open_json):
+    storage = open_json(cold_after_days=1)
+    old = make_conversation(2)
+    fresh = make_conversation(2)
+    for conversation in (old, fresh):
+        storage.save_conversation(conversation)
+    path = storage._path(old.id)
+    make_cold(storage, old)
+
+    assert storage.archive_cold() == 1
+    assert not path.exists()
+    assert old.id in storage.cold
+    assert_same(storage.load_conversation(old.id), old)
+    storage.close()
+
+    reopened = open_json(cold_after_days=1)
+    assert {s.id for s in reopened.list_conversations()} == {old.id, fresh.id}
+    assert_same(reopened.load_conversation(old.id), old)
+
+    # Saving it again moves it back into the directory
+    reloaded = reopened.load_conversation(old.id)
+    reloaded.add_message(Message("user", "back again", START))
+    reopened.save_conversation(reloaded)
+    assert path.exists()
+    assert old.id not in reopened.cold
+    assert_same(open_json().load_conversation(old.id), reloaded)
+
+
+def test_instances_sharing_the_pack_keep_each_others_conversations(open_json):
+    first = open_json(cold_after_days=1)
+    x, y = make_conversation(2), make_conversation(2)
+    for conversation in (x, y):
+        first.save_conversation(conversation)
+    make_cold(first, x)
+    assert first.archive_cold() == 1
+
+    second = open_json(cold_after_days=1)
+    make_cold(second, y)
+    assert second.archive_cold() == 1
+    # Packed by the other instance: loaded from a freshly read index
+    assert_same(first.load_conversation(y.id), y)
+
+    # Continuing x moves it out of the pack without dropping y from it
+    x.add_message(Message("user", "continued", START))
+    first.save_conversation(x)
+    first.close()
+    reopened = open_json(cold_after_days=1)
+    assert_same(reopened.load_conversation(y.id), y)
+    assert_same(reopened.load_conversation(x.id), x)
+    assert {s.id for s in reopened.list_conversations()} == {x.id, y.id}
+
+    # Deleting what the other instance packed sticks
+    assert second.delete_conversation(x.id)
+    assert first.delete_conversation(y.id)
+    assert open_json(cold_after_days=1).list_conversations() == []
+
+
+def test_pack_compaction(tmp_path):
+    path, index_path = tmp_path / "cold.pack", tmp_path / "cold.index.json"
+    pack = ColdPack(path, index_path)
+    try:
+        pack.put("kept", b"kept conversation")
+        pack.put("dropped", os.urandom(1000))
+        pack.remove("dropped")
+        pack.compact()
+        assert pack.generation == 1
+        assert not pack._pack_path(0).exists()
+        assert pack.get("kept") == b"kept conversation"
+        assert "dropped" not in pack
+    finally:
+        pack.close()
+
+    reopened = ColdPack(path, index_path)
+    try:
+        assert reopened.generation == 1
+        assert reopened.get("kept") == b"kept conversation"
+    finally:
+        reopened.close()
+
+
+def test_pack_compacted_by_another_process(tmp_path):
+    path, index_path = tmp_path / "cold.pack", tmp_path / "cold.index.json"
+    first, second = ColdPack(path, index_path), ColdPack(path, index_path)
+    try:
+        first.put("kept", b"kept conversation")
+        first.put("dropped", os.urandom(1000))
+        assert second.get("kept") == b"kept conversation"
+
+        second.remove("dropped")
+        assert second.compact()
+        assert second.generation == 1
+        assert not first._pack_path(0).exists()
+
+        # The old generation is gone: the new index is read and used
+        assert first.get("kept") == b"kept conversation"
+        assert first.generation == 1
+        assert "dropped" not in first
+    finally:
+        first.close()
+        second.close()
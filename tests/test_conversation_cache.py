@@ -0,0 +1,58 @@
+"""The LRU cache of opened conversations."""
+from cmdai_terminal.storage.conversation_cache import ConversationCache
+from conftest import make_conversation
+
+
+def test_least_recently_used_is_evicted():
+    cache = ConversationCache(max_conversations=2)
+    first, second, third = (make_conversation(2) for _ in range(3))
+    cache.put(first)
+    cache.put(second)
+    assert cache.get(first.id) is first
+    cache.put(third)
+    assert first.id in cache and third.id in cache
+    assert second.id not in cache
+    assert cache.get(second.id) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memory_budget():
+    # Each conversation holds 2 * len("message 0") characters
+    size = ConversationCache.size_of(make_conversation(2))
+    cache = ConversationCache(max_conversations=10, max_bytes=2 * size)
+    conversations = [make_conversation(2) for _ in range(3)]
+    for conversation in conversations:
+        cache.put(conversation)
+    assert len(cache) == 2
+    assert cache.bytes == 2 * size
+    assert conversations[0].id not in cache
+
+    # The most recent conversation stays even when it alone is over budget
+    large = make_conversation(2, content="x" * 10 * size)
+    cache.put(large)
+    assert len(cache) == 1 and cache.get(large.id) is large
+    assert cache.bytes == ConversationCache.size_of(large)
+
+
+def test_put_again_recounts_the_size():
+    cache = ConversationCache()
+    conversation = make_conversation(2)
+    cache.put(conversation)
+    before = cache.bytes
+    conversation.messages[0].content += "more"
+    cache.put(conversation)
+    assert cache.bytes == before + 4
+    assert len(cache) == 1
+
+
+def test_pop_and_clear():
+    cache = ConversationCache()
+    conversation = make_conversation(2)
+    cache.put(conversation)
+    assert cache.pop(conversation.id) is conversation
+    assert cache.pop(conversation.id) is None
+    assert cache.bytes == 0
+
+    cache.put(conversation)
+    cache.clear()
+    assert len(cache) == 0 and cache.bytes == 0
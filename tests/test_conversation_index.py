@@ -0,0 +1,36 @@
+"""Listing conversations from the metadata index."""
+import json
+
+from cmdai_terminal.storage.history import ConversationStorage
+from conftest import make_conversation
+
+
+def test_index_is_rebuilt_when_missing(open_json):
+    storage = open_json()
+    conversations = [make_conversation(2) for _ in range(3)]
+    for conversation in conversations:
+        storage.save_conversation(conversation)
+    storage.close()
+    storage.index.path.unlink()
+
+    assert {s.id for s in open_json().list_conversations()} == {c.id for c in conversations}
+
+
+def test_index_writes_are_batched(open_json, monkeypatch):
+    monkeypatch.setattr(ConversationStorage, "INDEX_SAVE_INTERVAL", 3600)
+    storage = open_json()
+    conversations = [make_conversation(2) for _ in range(3)]
+    for conversation in conversations:
+        storage.save_conversation(conversation)
+
+    data = json.loads(storage.index.path.read_text())
+    assert list(data["conversations"]) == [conversations[0].id]
+    assert not data["clean"]
+
+    # An index that wasn't closed is checked against the files
+    assert {s.id for s in open_json().list_conversations()} == {c.id for c in conversations}
+
+    storage.close()
+    data = json.loads(storage.index.path.read_text())
+    assert set(data["conversations"]) == {c.id for c in conversations}
+    assert data["clean"]
@@ -0,0 +1,68 @@
+"""Append-only JSON Lines conversation logs."""
+import json
+
+from cmdai_terminal.models.message import Message
+from conftest import START, assert_same, make_conversation
+
+
+def test_saves_append_to_the_log(open_json):
+    storage = open_json(compact_every=3)
+    conversation = make_conversation(2)
+    storage.save_conversation(conversation)
+    path = storage._path(conversation.id)
+
+    conversation.add_message(Message("user", "more", START))
+    storage.save_conversation(conversation)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2 + 1 + 2
+    assert_same(open_json().load_conversation(conversation.id), conversation)
+
+    # Too many header lines: the log is rewritten with a single one
+    for i in range(2):
+        conversation.add_message(Message("user", f"again {i}", START))
+        storage.save_conversation(conversation)
+    assert len(path.read_text().splitlines()) == 1 + len(conversation.messages)
+    assert_same(open_json().load_conversation(conversation.id), conversation)
+
+
+def test_truncated_log_is_read_up_to_the_last_complete_line(open_json):
+    storage = open_json()
+    conversation = make_conversation(2)
+    storage.save_conversation(conversation)
+    path = storage._path(conversation.id)
+    with open(path, "a") as f:
+        f.write('{"type": "message", "role": "user", "cont')
+
+    loaded = open_json().load_conversation(conversation.id)
+    assert_same(loaded, conversation)
+
+
+def test_legacy_json_file_is_replaced_by_a_log_on_save(open_json):
+    storage = open_json()
+    conversation = make_conversation(2)
+    legacy = storage._legacy_path(conversation.id)
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps(conversation.to_dict()))
+    assert_same(storage.load_conversation(conversation.id), conversation)
+
+    conversation.add_message(Message("user", "more", START))
+    storage.save_conversation(conversation)
+    assert not legacy.exists()
+    assert_same(open_json().load_conversation(conversation.id), conversation)
+
+
+def test_list_picks_up_changes_from_another_instance(open_json):
+    first = open_json()
+    second = open_json()
+    conversation = make_conversation(2)
+    first.save_conversation(conversation)
+    assert [s.message_count for s in second.list_conversations()] == [2]
+
+    # An append changes no directory mtime; the shared index tells
+    conversation.add_message(Message("user", "appended", START))
+    first.save_conversation(conversation)
+    first.close()
+    assert [s.message_count for s in second.list_conversations()] == [3]
+
+    assert second.delete_conversation(conversation.id)
+    assert open_json().list_conversations() == []
@@ -0,0 +1,91 @@
+"""Discovering models from all endpoints concurrently."""
+import asyncio
+
+import httpx
+
+from cmdai_terminal.api.unified_client import UnifiedClient
+
+
+def make_client(**kwargs) -> UnifiedClient:
+    return UnifiedClient(
+        ollama_base_url="http://fast",
+        ollama_timeout=60,
+        ollama_endpoints=["http://fast", "http://slow"],
+        ollama_discovery_timeout=0.3,
+        **kwargs,
+    )
+
+
+def catalog(*names: str):
+    async def handler(request):
+        return httpx.Response(200, json={"models": [{"name": name} for name in names]})
+    return handler
+
+
+def delayed(seconds: float, handler):
+    async def wait_then_answer(request):
+        await asyncio.sleep(seconds)
+        return await handler(request)
+    return wait_then_answer
+
+
+def test_models_arrive_as_each_endpoint_answers(use_transport):
+    async def main():
+        client = make_client()
+        fast, slow = client.endpoints
+        use_transport(fast.client, catalog("llama2"))
+        use_transport(slow.client, delayed(0.1, catalog("mistral")))
+        try:
+            return [(provider, models) async for provider, models in client.iter_models()]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == [("ollama", ["llama2"]), ("ollama", ["mistral"])]
+
+
+def test_endpoint_past_its_deadline_is_skipped(use_transport):
+    async def main():
+        client = make_client()
+        fast, slow = client.endpoints
+        use_transport(fast.client, catalog("llama2"))
+        use_transport(slow.client, delayed(5, catalog("mistral")))
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            return await client.get_models(), loop.time() - started
+        finally:
+            await client.aclose()
+
+    models, elapsed = asyncio.run(main())
+    assert models == ["llama2"]
+    assert elapsed < 1
+
+
+def test_get_models_falls_back_when_nothing_answers(use_transport):
+    def down(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def main():
+        client = make_client()
+        for endpoint in client.endpoints:
+            use_transport(endpoint.client, down)
+        try:
+            return await client.get_models()
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == ["llama2"]
+
+
+def test_get_models_merges_the_endpoints_of_a_provider(use_transport):
+    async def main():
+        client = make_client()
+        fast, slow = client.endpoints
+        use_transport(fast.client, catalog("llama2", "mistral"))
+        use_transport(slow.client, delayed(0.1, catalog("mistral", "phi3")))
+        try:
+            return await client.get_models()
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == ["llama2", "mistral", "phi3"]
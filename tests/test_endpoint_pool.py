@@ -0,0 +1,56 @@
+"""Least-outstanding routing across the endpoints of a provider."""
+from cmdai_terminal.api.circuit_breaker import CircuitBreaker
+from cmdai_terminal.api.endpoint_pool import Endpoint, EndpointPool
+from cmdai_terminal.api.ollama import OllamaClient
+
+
+def make_pool(*urls: str) -> EndpointPool:
+    return EndpointPool([
+        Endpoint("ollama", OllamaClient(url), CircuitBreaker(failure_threshold=1))
+        for url in urls
+    ])
+
+
+def test_requests_go_to_the_least_busy_endpoint():
+    pool = make_pool("http://a", "http://b")
+    a, b = pool.endpoints
+    first = pool.acquire("llama2")
+    second = pool.acquire("llama2")
+    assert {first, second} == {a, b}
+    assert a.in_flight == b.in_flight == 1
+
+    pool.release(b)
+    assert pool.acquire("llama2") is b
+    assert b.in_flight == 1
+
+
+def test_ties_go_to_the_endpoint_that_served_the_model_last():
+    pool = make_pool("http://a", "http://b")
+    a, b = pool.endpoints
+    b.last_model = "llama2"
+    endpoint = pool.acquire("llama2")
+    assert endpoint is b
+    pool.release(endpoint)
+    assert pool.acquire("mistral") is a
+
+
+def test_only_endpoints_with_the_model_are_used():
+    pool = make_pool("http://a", "http://b")
+    a, b = pool.endpoints
+    b.models = {"llama2"}
+    b.in_flight = 5
+    assert pool.hosts("llama2") == [b]
+    assert pool.acquire("llama2") is b
+    # Nobody is known to have it: try everyone
+    assert pool.hosts("mistral") == [a, b]
+
+
+def test_unhealthy_and_excluded_endpoints_are_skipped():
+    pool = make_pool("http://a", "http://b")
+    a, b = pool.endpoints
+    a.breaker.record_failure()
+    assert pool.acquire("llama2") is b
+    assert pool.acquire("llama2", exclude=[b]) is None
+    assert pool.model_available("llama2")
+    b.breaker.record_failure()
+    assert not pool.model_available("llama2")
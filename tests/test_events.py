@@ -0,0 +1,78 @@
+"""Typed stream events and how each provider's chunks map to them."""
+import json
+
+from cmdai_terminal.api.events import HEARTBEAT, ContentDelta, Finish, Heartbeat, StreamError, Usage
+from cmdai_terminal.api.ollama import OllamaClient
+from cmdai_terminal.api.openai_client import OpenAIClient
+from cmdai_terminal.api.stream_parsers import SSEEvent
+
+
+def test_usage_to_dict():
+    usage = Usage(3, 40, {"eval_duration": 0.5}, endpoint="http://gpu-1")
+    assert usage.to_dict() == {
+        "prompt_tokens": 3, "completion_tokens": 40, "endpoint": "http://gpu-1", "eval_duration": 0.5,
+    }
+    assert Usage().to_dict() == {"prompt_tokens": None, "completion_tokens": None, "endpoint": None}
+
+
+def test_repr():
+    assert repr(ContentDelta("hi")) == "ContentDelta('hi')"
+    assert repr(Usage(3, 40)) == "Usage(prompt_tokens=3, completion_tokens=40)"
+    assert repr(Finish("length")) == "Finish('length')"
+    assert repr(StreamError("boom")) == "StreamError('boom')"
+    assert repr(HEARTBEAT) == "Heartbeat()"
+
+
+def test_events_have_no_instance_dict():
+    for event in (ContentDelta("hi"), Usage(), Finish(), StreamError("boom"), Heartbeat()):
+        assert not hasattr(event, "__dict__")
+
+
+def ollama_events(chunk: dict) -> list:
+    return list(OllamaClient._events(chunk))
+
+
+def test_ollama_chunks():
+    [delta] = ollama_events({"message": {"role": "assistant", "content": "Hel"}, "done": False})
+    assert isinstance(delta, ContentDelta) and delta.text == "Hel"
+    assert ollama_events({"message": {"role": "assistant", "content": ""}, "done": False}) == [HEARTBEAT]
+
+    usage, finish = ollama_events({
+        "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "length",
+        "prompt_eval_count": 3, "eval_count": 40, "eval_duration": 500_000_000,
+    })
+    assert (usage.prompt_tokens, usage.completion_tokens) == (3, 40)
+    assert usage.durations == {"eval_duration": 0.5}
+    assert finish.reason == "length"
+    [_, finish] = ollama_events({"done": True})
+    assert finish.reason == "stop"
+
+
+def test_ollama_error_chunk():
+    [error] = ollama_events({"error": "model runner has unexpectedly stopped"})
+    assert isinstance(error, StreamError)
+    assert error.message == "model runner has unexpectedly stopped"
+
+
+def openai_events(data) -> list:
+    raw = data if isinstance(data, bytes) else json.dumps(data).encode()
+    return list(OpenAIClient._events(SSEEvent("message", raw, "")))
+
+
+def test_openai_chunks():
+    delta, finish = openai_events({"choices": [{"delta": {"content": "Hi"}, "finish_reason": "stop"}]})
+    assert isinstance(delta, ContentDelta) and delta.text == "Hi"
+    assert isinstance(finish, Finish) and finish.reason == "stop"
+    assert openai_events({"choices": [{"delta": {"role": "assistant"}, "finish_reason": None}]}) == []
+
+    [usage] = openai_events({"choices": [], "usage": {"prompt_tokens": 4, "completion_tokens": 2}})
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.durations) == (4, 2, {})
+    assert openai_events(b"[DONE]") == []
+    assert openai_events(b'{"choices": [{"delta": {"cont') == []
+
+
+def test_openai_error_chunk():
+    [error] = openai_events({"error": {"message": "The server had an error", "type": "server_error"}})
+    assert isinstance(error, StreamError) and error.message == "The server had an error"
+    [error] = openai_events({"error": "overloaded"})
+    assert error.message == "overloaded"
@@ -0,0 +1,109 @@
+"""Hedged streams: a slow first token is raced against a second endpoint."""
+import asyncio
+
+import httpx
+
+from cmdai_terminal.api.events import ContentDelta, Usage
+from cmdai_terminal.api.hedging import HedgePolicy
+from cmdai_terminal.api.retry import RetryPolicy
+from cmdai_terminal.api.unified_client import UnifiedClient
+from conftest import ollama_reply
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def make_client(hedge_delay: float) -> UnifiedClient:
+    return UnifiedClient(
+        ollama_base_url="http://gpu-1",
+        ollama_timeout=5,
+        ollama_endpoints=["http://gpu-1", "http://gpu-2"],
+        retry_policy=RetryPolicy(max_retries=0),
+        hedging=True,
+        hedge_delay=hedge_delay,
+    )
+
+
+def test_threshold_is_learned_from_recent_samples():
+    policy = HedgePolicy(percentile=0.9, window=10, min_samples=10, min_delay=0.1)
+    for _ in range(9):
+        policy.record(1.0)
+    assert policy.threshold is None
+    policy.record(3.0)
+    assert policy.threshold == 3.0
+    # Old samples fall out of the window
+    for _ in range(10):
+        policy.record(0.5)
+    assert policy.threshold == 0.5
+    # Fast samples never bring it below min_delay
+    fast = HedgePolicy(percentile=0.5, min_samples=1, min_delay=0.1)
+    fast.record(0.01)
+    assert fast.threshold == 0.1
+    assert HedgePolicy(delay=2.0).threshold == 2.0
+
+
+def test_censored_samples_keep_the_threshold_up():
+    policy = HedgePolicy(percentile=0.9, window=10, min_samples=10, min_delay=0.1)
+    for _ in range(8):
+        policy.record(0.2)
+    # Two slow requests lost their race after waiting 2 s
+    policy.record(2.0, censored=True)
+    policy.record(2.0, censored=True)
+    assert policy.threshold == 2.0
+    assert policy.stats.censored == 2
+
+
+def test_slow_first_token_is_hedged(use_transport):
+    calls = []
+
+    async def slow(request):
+        calls.append("http://gpu-1")
+        await asyncio.sleep(2)
+        return httpx.Response(200, content=ollama_reply("slow"))
+
+    def fast(request):
+        calls.append("http://gpu-2")
+        return httpx.Response(200, content=ollama_reply("fast"))
+
+    async def main():
+        client = make_client(hedge_delay=0.05)
+        first, second = client.endpoints
+        use_transport(first.client, slow)
+        use_transport(second.client, fast)
+        try:
+            events = [event async for event in client.chat_stream("llama2", MESSAGES)]
+            return client, events
+        finally:
+            await client.aclose()
+
+    client, events = asyncio.run(main())
+    assert [e.text for e in events if isinstance(e, ContentDelta)] == ["fast"]
+    assert [e.endpoint for e in events if isinstance(e, Usage)] == ["http://gpu-2"]
+    assert calls == ["http://gpu-1", "http://gpu-2"]
+    stats = client.hedge_stats["ollama"]
+    assert (stats.requests, stats.fired, stats.won) == (1, 1, 1)
+    # The loser waited longer than the winner: kept as a lower bound of its latency
+    assert stats.censored == 1
+    won, lost = client.hedging["ollama"]._samples
+    assert lost >= 0.05 and lost > won
+    # The losing request was cancelled and its endpoint given back
+    assert all(e.in_flight == 0 for e in client.endpoints)
+
+
+def test_fast_first_token_is_not_hedged(use_transport):
+    def reply(request):
+        return httpx.Response(200, content=ollama_reply("hello"))
+
+    async def main():
+        client = make_client(hedge_delay=1.0)
+        for endpoint in client.endpoints:
+            use_transport(endpoint.client, reply)
+        try:
+            events = [event async for event in client.chat_stream("llama2", MESSAGES)]
+            return client, events
+        finally:
+            await client.aclose()
+
+    client, events = asyncio.run(main())
+    assert [e.text for e in events if isinstance(e, ContentDelta)] == ["hello"]
+    stats = client.hedge_stats["ollama"]
+    assert (stats.requests, stats.fired, stats.won, stats.censored) == (1, 0, 0, 0)
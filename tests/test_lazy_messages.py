@@ -0,0 +1,70 @@
+"""Decoding stored messages on first use."""
+import copy
+import json
+import pickle
+
+from cmdai_terminal.models.conversation import Conversation
+from cmdai_terminal.models.lazy_messages import LazyMessages
+from cmdai_terminal.models.message import Message
+from conftest import START, assert_same, make_conversation
+
+
+def test_length_and_records_without_decoding():
+    conversation = make_conversation(3)
+    records = [message.to_dict() for message in conversation.messages]
+    messages = LazyMessages(records)
+    assert len(messages) == 3
+    assert list(messages.iter_records()) == records
+    assert not messages.decoded
+
+    assert messages[1] == conversation.messages[1]
+    assert messages.decoded
+    assert len(messages) == 3
+    assert list(messages.iter_records()) == records
+
+
+def test_list_operations_decode_first():
+    records = [message.to_dict() for message in make_conversation(2).messages]
+    messages = LazyMessages(list(records))
+    messages.append(Message("user", "more", START))
+    assert [m.content for m in messages] == ["message 0", "message 1", "more"]
+
+    messages = LazyMessages(list(records))
+    assert messages == [Message.from_dict(record) for record in records]
+    assert messages.pop().content == "message 1"
+    assert len(messages) == 1
+
+
+def test_loaded_conversations_decode_on_first_use(open_json):
+    storage = open_json()
+    conversation = make_conversation(4)
+    storage.save_conversation(conversation)
+
+    loaded = open_json().load_conversation(conversation.id)
+    assert isinstance(loaded.messages, LazyMessages)
+    assert not loaded.messages.decoded
+    assert Conversation.from_dict(conversation.to_dict(), lazy=True).to_dict() == conversation.to_dict()
+    assert_same(loaded, conversation)
+    assert loaded.messages.decoded
+
+
+def test_lazy_conversation_serializes_like_a_decoded_one(open_json):
+    storage = open_json()
+    conversation = make_conversation(3)
+    storage.save_conversation(conversation)
+    expected = json.dumps(conversation.to_dict())
+
+    assert json.dumps(open_json().load_conversation(conversation.id).to_dict()) == expected
+
+    loaded = open_json().load_conversation(conversation.id)
+    # Copies and list operations see the messages before they are decoded
+    for messages in (
+        copy.copy(loaded.messages),
+        copy.deepcopy(loaded.messages),
+        pickle.loads(pickle.dumps(loaded.messages)),
+        [] + loaded.messages,
+    ):
+        assert json.dumps([m.to_dict() for m in messages]) == json.dumps(conversation.to_dict()["messages"])
+    assert json.dumps(loaded.to_dict()) == expected
+    assert loaded.messages == conversation.messages
+    assert conversation.messages == loaded.messages
@@ -0,0 +1,47 @@
+"""Rendering streamed markdown incrementally."""
+import pytest
+from rich.console import Console
+from rich.markdown import Markdown
+
+from cmdai_terminal.components.markdown_stream import IncrementalMarkdown
+
+DOCUMENTS = {
+    "paragraphs": "First paragraph\nstill first.\n\nSecond **bold** paragraph.\n",
+    "lists": "Options:\n\n- one\n- two\n\n- loose three\n\n  more of three\n\nAfter the list.",
+    "fenced code": "Run:\n\n```python\nprint('hi')\n\nprint('bye')\n```\n\nDone.",
+    "steps with code": (
+        "Steps:\n\n"
+        "1. Install:\n   ```bash\n   pip install foo\n   ```\n"
+        "2. Configure:\n\n   ```yaml\n   key: value\n\n   other: 1\n   ```\n\n"
+        "3. Run `foo`.\n\nThat's all."
+    ),
+    "quote and indented code": "Note:\n\n> quoted\n> text\n\n    indented code\n\nEnd.",
+}
+
+
+def render(renderable) -> str:
+    console = Console(width=60, record=True, file=open("/dev/null", "w"), color_system="truecolor")
+    console.print(renderable)
+    return console.export_text(styles=True)
+
+
+@pytest.mark.parametrize("name", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 4, 1000])
+def test_streamed_rendering_matches_the_full_text(name, chunk_size):
+    text = DOCUMENTS[name]
+    markdown = IncrementalMarkdown()
+    for start in range(0, len(text), chunk_size):
+        markdown.append(text[start:start + chunk_size])
+        # Rendering mid-stream must not disturb what follows
+        render(markdown)
+    assert markdown.text == text
+    assert render(markdown) == render(Markdown(text))
+
+
+def test_closed_blocks_are_not_parsed_again():
+    markdown = IncrementalMarkdown()
+    markdown.append("First paragraph.\n\nSecond paragraph\n")
+    [first] = markdown._closed
+    markdown.append("still streaming")
+    render(markdown)
+    assert markdown._closed == [first]
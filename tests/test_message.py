@@ -0,0 +1,50 @@
+"""The compact in-memory layout of messages."""
+import dataclasses
+import sys
+
+import pytest
+
+from cmdai_terminal.models.message import Message
+from conftest import START, make_conversation
+
+
+def test_round_trip():
+    message = Message("assistant", "hello", START, model="llama2", truncated=True, error="cut off")
+    data = message.to_dict()
+    assert data["timestamp"] == START.isoformat()
+    assert Message.from_dict(data) == message
+    assert message != Message("assistant", "hello", START, model="llama2")
+
+
+def test_timestamp_is_kept_as_epoch_seconds():
+    message = Message("user", "hi", START)
+    assert message.epoch == START.timestamp()
+    assert message.timestamp == START
+    assert Message("user", "hi", START.timestamp()).timestamp == START
+
+    later = START.replace(hour=13)
+    message.timestamp = later
+    assert message.epoch == later.timestamp()
+
+
+def test_roles_and_models_are_shared():
+    # Built at runtime, as when decoded from JSON
+    role = "".join(["assis", "tant"])
+    model = "".join(["llama", "2"])
+    message = Message(role, "hi", START, model=model)
+    assert message.role is sys.intern("assistant")
+    assert message.model is sys.intern("llama2")
+
+
+def test_no_instance_dict():
+    message = Message("user", "hi", START)
+    assert not hasattr(message, "__dict__")
+    with pytest.raises(AttributeError):
+        message.unknown = 1
+
+
+def test_conversation_can_still_be_replaced():
+    conversation = make_conversation(2)
+    copy = dataclasses.replace(conversation, title="Renamed")
+    assert copy.title == "Renamed"
+    assert copy.messages == conversation.messages
@@ -0,0 +1,68 @@
+"""Streaming performance metrics of assistant messages."""
+import pytest
+
+from cmdai_terminal.models.message import Message
+from cmdai_terminal.models.metrics import MessageMetrics, percentile
+from conftest import START
+
+
+def test_percentile():
+    assert percentile([], 0.5) is None
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([1.0, 2.0], 0.99) == 2.0
+
+
+def test_from_stream():
+    metrics = MessageMetrics.from_stream(
+        started_at=10.0,
+        first_chunk_at=10.5,
+        finished_at=12.5,
+        gaps=[0.01, 0.02, 0.03, 0.04],
+        chunks=5,
+        usage={"prompt_tokens": 7, "completion_tokens": 40, "endpoint": "http://gpu-1"},
+    )
+    assert metrics.ttft == 0.5
+    assert metrics.duration == 2.5
+    assert (metrics.itl_p50, metrics.itl_p90) == (0.03, 0.04)
+    # Tokens over the time from the first to the last chunk
+    assert metrics.tokens_per_second == 20.0
+    assert metrics.endpoint == "http://gpu-1"
+
+
+def test_server_generation_time_is_preferred():
+    metrics = MessageMetrics.from_stream(
+        10.0, 10.5, 12.5, [], 1, {"completion_tokens": 40, "eval_duration": 0.5},
+    )
+    assert metrics.tokens_per_second == 80.0
+    assert metrics.itl_p50 is None
+
+
+def test_interrupted_stream_has_no_timings():
+    metrics = MessageMetrics.from_stream(10.0, None, None, [], 0, {})
+    assert metrics.ttft is None and metrics.duration is None
+    assert metrics.tokens_per_second is None
+    assert metrics.summary() == ""
+
+
+def test_summary():
+    metrics = MessageMetrics(
+        ttft=0.25, duration=3.0, itl_p50=0.02, itl_p90=0.05,
+        chunks=12, completion_tokens=60, tokens_per_second=21.5,
+    )
+    assert metrics.summary() == "TTFT 0.25s · 21.5 tok/s · 60 tokens · ITL p50/p90 20/50ms · 3.0s"
+    assert MessageMetrics(chunks=12).summary() == "12 chunks"
+
+
+def test_metrics_are_saved_with_the_message():
+    metrics = MessageMetrics(ttft=0.25, chunks=3, completion_tokens=3, endpoint="http://gpu-1")
+    message = Message(role="assistant", content="hello", timestamp=START, model="llama2", metrics=metrics)
+    data = message.to_dict()
+    # Fields added by newer versions are ignored
+    data["metrics"]["unknown"] = 1
+    assert Message.from_dict(data).metrics == metrics
+    assert Message.from_dict(Message(role="user", content="hi", timestamp=START).to_dict()).metrics is None
+
+
+@pytest.mark.parametrize("usage", [{}, {"completion_tokens": 0}])
+def test_no_throughput_without_tokens(usage):
+    assert MessageMetrics.from_stream(0.0, 1.0, 2.0, [], 3, usage).tokens_per_second is None
@@ -0,0 +1,74 @@
+"""The on-disk model catalog cache."""
+import asyncio
+
+import httpx
+
+from cmdai_terminal.api.unified_client import UnifiedClient
+from cmdai_terminal.models.model_info import ModelInfo
+from cmdai_terminal.storage.model_cache import ModelCatalogCache
+from cmdai_terminal.storage.writer import BackgroundWriter
+
+SOURCE = "ollama@http://localhost:11434"
+
+
+def test_round_trip_on_the_background_writer(tmp_path):
+    path = tmp_path / "models.json"
+    cache = ModelCatalogCache(path)
+    cache.update(SOURCE, [ModelInfo("llama2", "ollama", family="llama")], {"etag": '"v1"'})
+
+    writer = BackgroundWriter()
+    cache.save(writer=writer)
+    # Rendered when saved: later updates wait for the next save
+    cache.update(SOURCE, [], {})
+    assert writer.close()
+
+    reloaded = ModelCatalogCache(path)
+    assert [m.name for m in reloaded.models([SOURCE])] == ["llama2"]
+    assert reloaded.validators() == {SOURCE: {"etag": '"v1"'}}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_stale_sources(tmp_path):
+    cache = ModelCatalogCache(tmp_path / "models.json", ttl=60)
+    other = "openai@https://api.openai.com/v1"
+    assert cache.stale_sources([SOURCE, other]) == [SOURCE, other]
+
+    # An unchanged catalog keeps its models and renews its timestamp
+    cache.update(SOURCE, [ModelInfo("llama2", "ollama")], {})
+    cache.update(SOURCE, None, {"etag": '"v2"'})
+    assert cache.stale_sources([SOURCE, other]) == [other]
+    assert [m.name for m in cache.models([SOURCE])] == ["llama2"]
+
+
+def test_corrupted_file_is_ignored(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text("{not json")
+    assert ModelCatalogCache(path).entries == {}
+
+
+def test_unchanged_catalog_is_revalidated(use_transport):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"etag": '"v1"'}, json={
+            "models": [{"name": "llama2", "size": 1, "details": {"family": "llama"}}],
+        })
+
+    async def main():
+        client = UnifiedClient(ollama_base_url="http://localhost:11434", ollama_timeout=5)
+        use_transport(client.ollama_client, handler)
+        try:
+            [(_, models, validators)] = [c async for c in client.iter_model_catalogs()]
+            [(_, unchanged, _)] = [c async for c in client.iter_model_catalogs({SOURCE: validators})]
+            return models, validators, unchanged
+        finally:
+            await client.aclose()
+
+    models, validators, unchanged = asyncio.run(main())
+    assert [(m.name, m.family) for m in models] == [("llama2", "llama")]
+    assert validators == {"etag": '"v1"'}
+    assert unchanged is None
+    assert seen == [None, '"v1"']
@@ -0,0 +1,68 @@
+"""One pooled HTTP client per provider endpoint."""
+import asyncio
+
+import httpx
+
+from cmdai_terminal.api.ollama import OllamaClient
+from cmdai_terminal.api.unified_client import UnifiedClient
+from conftest import ollama_reply
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_calls_share_the_client_until_closed():
+    async def main():
+        client = OllamaClient("http://ollama/", limits=httpx.Limits(max_connections=2))
+        shared = client.http
+        assert client.http is shared
+        assert shared.base_url == "http://ollama"
+        await client.aclose()
+        assert shared.is_closed
+        # Used again after closing: a new pool is opened
+        reopened = client.http
+        assert reopened is not shared
+        await client.aclose()
+
+    asyncio.run(main())
+
+
+def test_requests_go_through_the_shared_client(use_transport):
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama2"}]})
+        return httpx.Response(200, content=ollama_reply("hi"))
+
+    async def main():
+        client = OllamaClient("http://ollama")
+        use_transport(client, handler)
+        shared = client.http
+        try:
+            await client.get_model_catalog()
+            [event async for event in client.chat_stream("llama2", MESSAGES)]
+            await client.get_model_catalog()
+            assert client.http is shared
+        finally:
+            await client.aclose()
+
+    asyncio.run(main())
+    assert paths == ["/api/tags", "/api/chat", "/api/tags"]
+
+
+def test_unified_client_closes_every_pool():
+    async def main():
+        client = UnifiedClient(
+            ollama_base_url="http://gpu-1",
+            ollama_timeout=5,
+            openai_api_key="sk-test",
+            ollama_endpoints=["http://gpu-1", "http://gpu-2"],
+        )
+        pools = [endpoint.client.http for endpoint in client.endpoints]
+        await client.aclose()
+        return pools
+
+    pools = asyncio.run(main())
+    assert len(pools) == 3
+    assert all(pool.is_closed for pool in pools)
@@ -0,0 +1,42 @@
+"""Capping repaints of streamed text at a frame rate."""
+import asyncio
+
+from cmdai_terminal.components.render_scheduler import RenderScheduler
+
+
+def test_chunks_within_a_frame_are_rendered_together():
+    frames = []
+
+    async def main():
+        scheduler = RenderScheduler(frames.append, max_fps=10)
+        # The first chunk is rendered right away, the rest wait for the next frame
+        for i in range(5):
+            scheduler.push(str(i))
+        assert frames == ["0"]
+        await asyncio.sleep(0.15)
+        assert frames == ["0", "1234"]
+
+        scheduler.push("5")
+        scheduler.push("6")
+        scheduler.flush()
+        await asyncio.sleep(0.15)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    # Flushing at the end renders whatever is pending
+    assert "".join(frames) == "0123456"
+    assert scheduler.chunks_received == 7
+    assert scheduler.frames_rendered == len(frames) <= 4
+
+
+def test_zero_fps_renders_every_chunk():
+    frames = []
+
+    async def main():
+        scheduler = RenderScheduler(frames.append, max_fps=0)
+        for text in ("a", "b", "c"):
+            scheduler.push(text)
+        scheduler.flush()
+
+    asyncio.run(main())
+    assert frames == ["a", "b", "c"]
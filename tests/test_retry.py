@@ -0,0 +1,178 @@
+"""Retries of provider requests and streams."""
+import asyncio
+
+import httpx
+import pytest
+
+from cmdai_terminal.api.events import ContentDelta
+from cmdai_terminal.api.ollama import OllamaClient
+from cmdai_terminal.api.retry import (
+    ProviderError,
+    RetryPolicy,
+    classify_error,
+    parse_retry_after,
+    retry_request,
+    retry_stream,
+)
+from conftest import ollama_reply
+
+# No waiting between attempts
+NO_BACKOFF = RetryPolicy(max_retries=2, backoff_base=0.0)
+
+
+def texts(events) -> list[str]:
+    return [event.text for event in events if isinstance(event, ContentDelta)]
+
+
+async def collect(stream) -> list:
+    return [event async for event in stream]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.parametrize("status, retryable", [(429, True), (503, True), (400, False), (404, False)])
+def test_classify_status(status, retryable):
+    request = httpx.Request("POST", "http://ollama/api/chat")
+    response = httpx.Response(status, headers={"retry-after": "2"}, request=request)
+    error = classify_error(httpx.HTTPStatusError("failed", request=request, response=response))
+    assert error.retryable is retryable
+    assert error.retry_after == 2.0
+
+
+def test_classify_connection_errors():
+    assert classify_error(httpx.ConnectError("refused")).retryable
+    assert classify_error(httpx.RemoteProtocolError("closed")).retryable
+    timeout = classify_error(httpx.ReadTimeout("slow"))
+    assert not timeout.retryable and timeout.timeout and timeout.provider_down
+
+
+def test_policy_gives_up():
+    error = ProviderError("busy", retryable=True)
+    assert RetryPolicy(max_retries=1).delay(error, 1) is None
+    assert RetryPolicy().delay(ProviderError("bad request"), 0) is None
+    # Retry-After longer than backoff_max is not worth waiting for
+    slow = ProviderError("busy", retryable=True, retry_after=60)
+    assert RetryPolicy(backoff_max=8).delay(slow, 0) is None
+
+
+def test_backoff_grows_and_is_capped():
+    error = ProviderError("busy", retryable=True)
+    policy = RetryPolicy(max_retries=10, backoff_base=0.5, backoff_max=3.0)
+    for attempt, bound in [(0, 0.5), (1, 1.0), (2, 2.0), (5, 3.0)]:
+        assert all(0 <= policy.delay(error, attempt) <= bound for _ in range(50))
+    # Retry-After is honoured as given
+    hinted = ProviderError("busy", retryable=True, retry_after=2)
+    assert policy.delay(hinted, 0) == 2
+
+
+def test_retry_request_recovers_from_transient_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            async def call():
+                response = await http.get("http://ollama/api/tags")
+                response.raise_for_status()
+                return response.json()
+            return await retry_request(call, NO_BACKOFF)
+
+    assert asyncio.run(main()) == {"ok": True}
+    assert len(calls) == 3
+
+
+def test_retry_request_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            async def call():
+                response = await http.get("http://ollama/api/tags")
+                response.raise_for_status()
+            await retry_request(call, NO_BACKOFF)
+
+    with pytest.raises(ProviderError) as info:
+        asyncio.run(main())
+    assert not info.value.retryable
+    assert len(calls) == 1
+
+
+def test_stream_retried_until_first_token(use_transport):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        if len(calls) == 2:
+            return httpx.Response(502)
+        return httpx.Response(200, content=ollama_reply("Hel", "lo"))
+
+    async def main():
+        client = OllamaClient("http://ollama", retry_policy=NO_BACKOFF)
+        use_transport(client, handler)
+        try:
+            return await collect(client.chat_stream("llama2", [{"role": "user", "content": "hi"}]))
+        finally:
+            await client.aclose()
+
+    assert texts(asyncio.run(main())) == ["Hel", "lo"]
+    assert len(calls) == 3
+
+
+def test_stream_not_restarted_after_first_token():
+    attempts = []
+
+    async def open_stream():
+        attempts.append(1)
+        yield "first"
+        raise httpx.ReadError("connection reset")
+
+    async def main():
+        received = []
+        with pytest.raises(ProviderError):
+            async for item in retry_stream(open_stream, NO_BACKOFF):
+                received.append(item)
+        return received
+
+    # Restarting would duplicate "first"
+    assert asyncio.run(main()) == ["first"]
+    assert attempts == [1]
+
+
+def test_first_token_timeout_covers_all_attempts():
+    attempts = []
+
+    async def open_stream():
+        attempts.append(1)
+        await asyncio.sleep(0.15)
+        raise httpx.ConnectError("refused")
+        yield
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        policy = RetryPolicy(max_retries=50, backoff_base=0.0)
+        with pytest.raises(ProviderError) as info:
+            await collect(retry_stream(open_stream, policy, first_token_timeout=0.5))
+        return info.value, loop.time() - started
+
+    error, elapsed = asyncio.run(main())
+    assert error.timeout
+    assert elapsed < 1.0
+    assert 2 <= len(attempts) <= 4
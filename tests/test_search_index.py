@@ -0,0 +1,84 @@
+"""Full-text search across conversations."""
+from cmdai_terminal.models.message import Message
+from cmdai_terminal.storage.search_index import SearchIndex, make_snippet
+from conftest import START, make_conversation
+
+
+def conversation_about(*contents: str):
+    conversation = make_conversation(0)
+    for content in contents:
+        conversation.add_message(Message("user", content, START))
+    return conversation
+
+
+def test_every_word_must_match_and_the_last_may_be_a_prefix(tmp_path):
+    index = SearchIndex(tmp_path / "search.json")
+    conversation = conversation_about("asyncio event loops", "event sourcing", "threads")
+    index.update(conversation, 1)
+
+    assert [r[2] for r in index.search("event loops")] == [0]
+    assert sorted(r[2] for r in index.search("even")) == [0, 1]
+    assert index.search("loops threads") == []
+    assert index.search("") == []
+
+
+def test_rarer_terms_rank_higher(tmp_path):
+    index = SearchIndex(tmp_path / "search.json")
+    conversation = conversation_about("python python python", "python rust", "go")
+    index.update(conversation, 1)
+    assert [r[2] for r in index.search("python")][0] == 0
+    assert [r[2] for r in index.search("python rust")] == [1]
+
+
+def test_updates_and_removals_survive_a_reload(tmp_path):
+    path = tmp_path / "search.json"
+    index = SearchIndex(path)
+    kept = conversation_about("asyncio event loops")
+    removed = conversation_about("asyncio tasks")
+    index.update(kept, 1)
+    index.update(removed, 1)
+    index.save()
+
+    # Appended to the change log, not a new snapshot
+    kept.add_message(Message("user", "asyncio queues", START))
+    index.update(kept, 2)
+    index.remove(removed.id)
+    index.save(snapshot=False)
+
+    reloaded = SearchIndex(path)
+    assert sorted((r[1], r[2]) for r in reloaded.search("asyncio")) == [(kept.id, 0), (kept.id, 1)]
+    assert reloaded.conversations[kept.id]["mtime_ns"] == 2
+
+
+def test_sync_reindexes_changed_conversations(tmp_path):
+    index = SearchIndex(tmp_path / "search.json")
+    conversation = conversation_about("sourdough starter")
+    index.update(conversation, 1)
+    edited = conversation_about("rye starter")
+    edited.id = conversation.id
+
+    assert index.sync({conversation.id: 2}, {conversation.id: edited}.get) == 0
+    assert index.search("sourdough") == []
+    assert [r[2] for r in index.search("rye")] == [0]
+    index.sync({}, {}.get)
+    assert index.search("rye") == []
+
+
+def test_make_snippet():
+    content = "word " * 40 + "asyncio\nevent loop " + "tail " * 40
+    snippet = make_snippet(content, ["asyncio"], width=40)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "asyncio event loop" in snippet
+    assert make_snippet("short text", ["text"]) == "short text"
+
+
+def test_search_after_reload(open_json):
+    storage = open_json()
+    wanted = make_conversation(2, content="asyncio event loops")
+    storage.save_conversation(wanted)
+    storage.save_conversation(make_conversation(2, content="sourdough starter"))
+    storage.close()
+
+    results = open_json().search("asyncio")
+    assert [r.conversation_id for r in results] == [wanted.id, wanted.id]
+
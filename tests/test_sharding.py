@@ -0,0 +1,51 @@
+"""Conversation files sharded by id prefix."""
+import os
+
+from cmdai_terminal.storage.conversation_log import write_log
+from cmdai_terminal.storage.history import ConversationStorage
+from conftest import assert_same, make_conversation
+
+
+def test_flat_layout_is_migrated_to_shards(storage_dir, open_json):
+    storage_dir.mkdir()
+    conversations = [make_conversation(2, id=f"{prefix}-conversation") for prefix in ("ab", "cd", "ab2")]
+    for conversation in conversations:
+        write_log(storage_dir / f"{conversation.id}.jsonl", conversation)
+
+    storage = open_json()
+    assert (storage_dir / ConversationStorage.LAYOUT_MARKER).exists()
+    assert not list(storage_dir.glob("*.jsonl"))
+    assert sorted(p.name for p in (storage_dir / "ab").iterdir()) == [
+        "ab-conversation.jsonl", "ab2-conversation.jsonl",
+    ]
+    assert {s.id for s in storage.list_conversations()} == {c.id for c in conversations}
+    for conversation in conversations:
+        assert_same(storage.load_conversation(conversation.id), conversation)
+
+
+def test_interrupted_migration_resumes(storage_dir, open_json):
+    storage_dir.mkdir()
+    moved, left = make_conversation(2, id="ab-moved"), make_conversation(2, id="cd-left")
+    (storage_dir / "ab").mkdir()
+    write_log(storage_dir / "ab" / f"{moved.id}.jsonl", moved)
+    write_log(storage_dir / f"{left.id}.jsonl", left)
+
+    storage = open_json()
+    assert (storage_dir / "cd" / f"{left.id}.jsonl").exists()
+    assert {s.id for s in storage.list_conversations()} == {moved.id, left.id}
+
+
+def test_files_added_to_a_shard_are_listed(open_json):
+    storage = open_json()
+    storage.save_conversation(make_conversation(2, id="ab-first"))
+    assert [s.id for s in storage.list_conversations()] == ["ab-first"]
+
+    added = make_conversation(2, id="cd-added")
+    path = storage._path(added.id)
+    path.parent.mkdir()
+    write_log(path, added)
+    # Only the shards whose mtime changed are listed again
+    assert storage.index.stale
+    assert {s.id for s in storage.list_conversations()} == {"ab-first", "cd-added"}
+    os.unlink(path)
+    assert [s.id for s in storage.list_conversations()] == ["ab-first"]
@@ -0,0 +1,109 @@
+"""The SQLite storage backend."""
+import threading
+
+from cmdai_terminal.models.message import Message
+from cmdai_terminal.storage.backends import open_storage
+from cmdai_terminal.storage.conversation_log import write_log
+from cmdai_terminal.storage.history import ConversationStorage
+from cmdai_terminal.storage.sqlite_storage import SQLiteConversationStorage
+from conftest import START, assert_same, make_conversation
+
+
+def test_sqlite_backend_migrates_the_directory(tmp_path, open_json):
+    storage = open_json()
+    conversation = make_conversation(3)
+    storage.save_conversation(conversation)
+    storage.close()
+
+    database = open_storage("sqlite", storage.storage_dir, tmp_path / "conversations.db")
+    try:
+        assert_same(database.load_conversation(conversation.id), conversation)
+        assert [s.id for s in database.list_conversations()] == [conversation.id]
+    finally:
+        database.close()
+
+
+def test_migration_leaves_a_flat_directory_as_it_is(tmp_path, storage_dir):
+    storage_dir.mkdir()
+    conversations = [make_conversation(2, id=f"{prefix}-conversation") for prefix in ("ab", "cd")]
+    for conversation in conversations:
+        write_log(storage_dir / f"{conversation.id}.jsonl", conversation)
+
+    database = open_storage("sqlite", storage_dir, tmp_path / "conversations.db")
+    try:
+        for conversation in conversations:
+            assert_same(database.load_conversation(conversation.id), conversation)
+    finally:
+        database.close()
+    assert sorted(p.name for p in storage_dir.iterdir()) == ["ab-conversation.jsonl", "cd-conversation.jsonl"]
+    assert not (storage_dir / ConversationStorage.LAYOUT_MARKER).exists()
+
+
+def test_database_runs_in_wal_mode(tmp_path):
+    database = SQLiteConversationStorage(tmp_path / "conversations.db")
+    try:
+        assert database.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert database.conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    finally:
+        database.close()
+    durable = SQLiteConversationStorage(tmp_path / "conversations.db", fsync=True)
+    try:
+        assert durable.conn.execute("PRAGMA synchronous").fetchone()[0] == 2  # FULL
+    finally:
+        durable.close()
+
+
+def test_two_instances_share_one_database(tmp_path):
+    path = tmp_path / "conversations.db"
+    first, second = SQLiteConversationStorage(path), SQLiteConversationStorage(path)
+    try:
+        conversation = make_conversation(2, content="asyncio event loops")
+        first.save_conversation(conversation)
+        assert_same(second.load_conversation(conversation.id), conversation)
+
+        # Both write at the same time; WAL and the busy timeout serialize them
+        saved = [make_conversation(2) for _ in range(20)]
+
+        def save_half(storage, half):
+            for other in half:
+                storage.save_conversation(other)
+
+        writers = [
+            threading.Thread(target=save_half, args=(first, saved[::2])),
+            threading.Thread(target=save_half, args=(second, saved[1::2])),
+        ]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+
+        conversation.add_message(Message("user", "asyncio again", START))
+        second.save_conversation(conversation)
+        assert len(first.list_conversations()) == 21
+        assert [s.message_count for s in first.list_conversations() if s.id == conversation.id] == [3]
+        assert len(first.search("asyncio")) == 3
+    finally:
+        first.close()
+        second.close()
+
+
+def test_search_survives_vacuum(tmp_path):
+    database = SQLiteConversationStorage(tmp_path / "conversations.db")
+    try:
+        removed = make_conversation(2, content="sourdough starter")
+        wanted = make_conversation(2, content="asyncio event loops")
+        for conversation in (removed, wanted):
+            database.save_conversation(conversation)
+        wanted.add_message(Message("user", "asyncio again", START))
+        database.save_conversation(wanted)
+        database.delete_conversation(removed.id)
+        # May renumber implicit rowids, which the full-text index must not rely on
+        database.conn.execute("VACUUM")
+
+        results = database.search("async")
+        assert {(r.conversation_id, r.message_index) for r in results} == {
+            (wanted.id, 0), (wanted.id, 1), (wanted.id, 2),
+        }
+        assert database.search("sourdough") == []
+    finally:
+        database.close()
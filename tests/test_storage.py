@@ -0,0 +1,16 @@
+"""Saving and reloading conversations with the JSON storage backend."""
+from conftest import assert_same, make_conversation
+
+
+def test_round_trip(open_json):
+    storage = open_json()
+    conversation = make_conversation(4)
+    storage.save_conversation(conversation)
+    assert_same(storage.load_conversation(conversation.id), conversation)
+    storage.close()
+
+    reopened = open_json()
+    assert_same(reopened.load_conversation(conversation.id), conversation)
+    [summary] = reopened.list_conversations()
+    assert summary.id == conversation.id
+    assert summary.message_count == 4
@@ -0,0 +1,127 @@
+"""Parsing streamed responses from raw bytes."""
+import asyncio
+import json
+
+import httpx
+
+from cmdai_terminal.api import jsonlib
+from cmdai_terminal.api.events import ContentDelta, Finish, Heartbeat, Usage
+from cmdai_terminal.api.ollama import OllamaClient
+from cmdai_terminal.api.openai_client import OpenAIClient
+from cmdai_terminal.api.stream_parsers import NDJSONParser, SSEParser
+from conftest import ollama_reply
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def pieces(data: bytes, size: int):
+    """Deliver a body in small network reads that split lines and characters."""
+    async def body():
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+    return body()
+
+
+def test_ollama_stream_split_across_reads(use_transport):
+    body = ollama_reply("Grüße, ", "wörld")
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=pieces(body, 5))
+
+    async def main():
+        client = OllamaClient("http://ollama")
+        use_transport(client, handler)
+        try:
+            return [event async for event in client.chat_stream("llama2", MESSAGES)]
+        finally:
+            await client.aclose()
+
+    events = asyncio.run(main())
+    assert "".join(e.text for e in events if isinstance(e, ContentDelta)) == "Grüße, wörld"
+    usage = next(e for e in events if isinstance(e, Usage))
+    assert (usage.prompt_tokens, usage.completion_tokens) == (3, 2)
+    assert isinstance(events[-1], Finish) and events[-1].reason == "stop"
+
+
+def test_openai_sse_stream(use_transport):
+    def event(data) -> bytes:
+        return f"data: {json.dumps(data)}\n\n".encode()
+
+    body = b"".join([
+        b": keep-alive\n\n",
+        event({"choices": [{"delta": {"content": "Hello"}, "finish_reason": None}]}),
+        event({"choices": [{"delta": {"content": " there"}, "finish_reason": "length"}]}),
+        event({"choices": [], "usage": {"prompt_tokens": 4, "completion_tokens": 2}}),
+        b"data: [DONE]\n\n",
+    ])
+
+    def handler(request):
+        assert request.headers["authorization"] == "Bearer sk-test"
+        return httpx.Response(200, content=pieces(body, 7))
+
+    async def main():
+        client = OpenAIClient("sk-test")
+        use_transport(client, handler)
+        try:
+            return [event async for event in client.chat_stream("gpt-4o", MESSAGES)]
+        finally:
+            await client.aclose()
+
+    events = asyncio.run(main())
+    assert any(isinstance(e, Heartbeat) for e in events)
+    assert "".join(e.text for e in events if isinstance(e, ContentDelta)) == "Hello there"
+    assert [e.reason for e in events if isinstance(e, Finish)] == ["length"]
+    usage = next(e for e in events if isinstance(e, Usage))
+    assert (usage.prompt_tokens, usage.completion_tokens) == (4, 2)
+
+
+def test_ndjson_parser_skips_bad_lines():
+    parser = NDJSONParser(jsonlib.get_backend("json"))
+    assert parser.feed(b'{"a": 1}\nnot json\n{"b"') == [{"a": 1}]
+    assert parser.feed(b': 2}\n\n') == [{"b": 2}]
+    assert parser.feed(b'{"c": 3}') == []
+    assert parser.flush() == [{"c": 3}]
+
+
+def test_sse_parser_handles_the_spec_line_endings():
+    parser = SSEParser()
+    events = []
+    # A BOM, CRLF split between reads, a multi-line event and the id/retry fields
+    for data in (b"\xef\xbb", b"\xbfid: 7\r", b"\nretry: 100\r\nevent: note\n",
+                 b"data: one\rdata:two\r\r", b"data: {}\n\n", b"data: unterminated"):
+        events.extend(parser.feed(data))
+    assert [(e.event, e.data, e.id) for e in events] == [("note", b"one\ntwo", "7"), ("message", b"{}", "7")]
+    assert parser.retry == 100
+    # The end of the stream ends the last line and event
+    assert [(e.event, e.data) for e in parser.flush()] == [("message", b"unterminated")]
+    assert parser.flush() == []
+
+
+def test_sse_parser_dispatches_the_last_event_at_the_end():
+    parser = SSEParser()
+    assert [e.data for e in parser.feed(b"data: first\n\nevent: last\ndata: {}\r")] == [b"first"]
+    assert [(e.event, e.data) for e in parser.flush()] == [("last", b"{}")]
+
+
+def test_openai_stream_ending_without_a_blank_line(use_transport):
+    body = (
+        b'data: {"choices": [{"delta": {"content": "Hi"}, "finish_reason": "stop"}]}\n\n'
+        b'data: {"choices": [], "usage": {"prompt_tokens": 4, "completion_tokens": 1}}\n'
+    )
+
+    def handler(request):
+        return httpx.Response(200, content=pieces(body, 7))
+
+    async def main():
+        client = OpenAIClient("sk-test")
+        use_transport(client, handler)
+        try:
+            return [event async for event in client.chat_stream("gpt-4o", MESSAGES)]
+        finally:
+            await client.aclose()
+
+    events = asyncio.run(main())
+    assert [e.text for e in events if isinstance(e, ContentDelta)] == ["Hi"]
+    usage = next(e for e in events if isinstance(e, Usage))
+    assert (usage.prompt_tokens, usage.completion_tokens) == (4, 1)
@@ -0,0 +1,40 @@
+"""Reading streams in a producer task while the consumer renders."""
+import asyncio
+
+from cmdai_terminal.api.events import ContentDelta, Finish, StreamError, Usage
+from cmdai_terminal.api.stream_reader import StreamReader
+
+
+def test_reader_coalesces_when_consumer_falls_behind():
+    async def stream():
+        for i in range(10):
+            yield ContentDelta(str(i))
+        yield Finish("stop")
+
+    async def main():
+        reader = StreamReader(stream(), maxsize=3).start()
+        # Let the producer run ahead of the consumer
+        await asyncio.sleep(0.01)
+        return [text async for text in reader], reader
+
+    texts, reader = asyncio.run(main())
+    assert "".join(texts) == "0123456789"
+    assert reader.chunks == 10
+    assert reader.finish_reason == "stop"
+
+
+def test_reader_keeps_non_text_events():
+    async def stream():
+        yield ContentDelta("partial")
+        yield Usage(prompt_tokens=3, completion_tokens=1)
+        yield StreamError("connection reset")
+
+    async def main():
+        reader = StreamReader(stream()).start()
+        return [text async for text in reader], reader
+
+    texts, reader = asyncio.run(main())
+    assert texts == ["partial"]
+    assert reader.usage.completion_tokens == 1
+    assert reader.error_message == "connection reset"
+    assert reader.first_chunk_at is not None and not reader.cancelled
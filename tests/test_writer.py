@@ -0,0 +1,79 @@
+"""The background storage writer."""
+import threading
+
+import pytest
+
+from cmdai_terminal.storage.writer import BackgroundWriter
+
+
+def blocked(writer: BackgroundWriter) -> threading.Event:
+    """Occupy the writer thread until the returned event is set."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def job() -> None:
+        started.set()
+        release.wait(5)
+
+    writer.submit("blocker", job)
+    assert started.wait(5)
+    return release
+
+
+def test_repeated_saves_of_one_key_are_coalesced():
+    writer = BackgroundWriter()
+    ran = []
+    release = blocked(writer)
+    for version in range(3):
+        writer.submit("conversation", lambda version=version: ran.append(version))
+    release.set()
+
+    assert writer.flush(5)
+    assert ran == [2]
+    assert (writer.written, writer.coalesced) == (2, 2)
+    writer.close(5)
+
+
+def test_flush_waits_for_jobs_in_submission_order():
+    writer = BackgroundWriter()
+    ran = []
+    release = blocked(writer)
+    for key in ("a", "b", "c"):
+        writer.submit(key, lambda key=key: ran.append(key))
+    # A newer job for a queued key keeps that key's place
+    writer.submit("a", lambda: ran.append("a2"))
+    assert not writer.flush(0.01)
+    release.set()
+
+    assert writer.flush(5)
+    assert ran == ["a2", "b", "c"]
+    writer.close(5)
+
+
+def test_close_drains_the_queue():
+    writer = BackgroundWriter()
+    ran = []
+    release = blocked(writer)
+    for key in range(5):
+        writer.submit(key, lambda key=key: ran.append(key))
+    release.set()
+
+    assert writer.close(5)
+    assert ran == [0, 1, 2, 3, 4]
+    with pytest.raises(RuntimeError):
+        writer.submit("late", lambda: None)
+
+
+def test_failed_jobs_do_not_stop_the_writer():
+    writer = BackgroundWriter()
+    ran = []
+
+    def fail() -> None:
+        raise OSError("disk full")
+
+    writer.submit("bad", fail)
+    writer.submit("good", lambda: ran.append("good"))
+    assert writer.close(5)
+    assert ran == ["good"]
+    assert writer.failed == 1 and isinstance(writer.last_error, OSError)
+    assert BackgroundWriter().close()